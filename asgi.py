@@ -0,0 +1,194 @@
+"""Async serving mode.
+
+``/analyze`` runs on the event loop: the upstream inputs are fetched with the
+async HTTP client through the same fetch plans the sync app uses, and the
+CPU-bound indicator work runs on a bounded thread pool. A request waiting on
+Binance only holds a coroutine, so one process can keep hundreds of analyses
+in flight. Every other route is served by the Flask ``app`` through asgiref's
+``WsgiToAsgi``. The sync ``main.app`` keeps working unchanged for the
+``Procfile`` deployment.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+
+Needs the optional ``httpx`` package (plus ``uvicorn`` to serve, and
+``asgiref`` for the routes other than ``/analyze``), all listed in
+``requirements-extra.txt``.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import encoders
+import http_client
+import main
+import metrics
+
+CPU_WORKERS = int(os.environ.get("ASGI_CPU_WORKERS", os.cpu_count() or 4))
+CPU_EXECUTOR = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="analysis")
+MAX_BODY_BYTES = 64 * 1024
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    _flask_app = WsgiToAsgi(main.app)
+except ImportError:
+    _flask_app = None
+
+
+async def run_cpu(func, *args):
+    """Run ``func`` on the bounded analysis pool, reporting to the request's profile"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(CPU_EXECUTOR, context.run, func, *args)
+
+
+async def _run_plan(stage, plan):
+    with metrics.span(stage):
+        return await http_client.run_async(plan)
+
+
+async def fetch_market_inputs(symbol, interval, market_type, limit=200, indicators=None):
+    """``main.fetch_market_inputs`` on the async client"""
+    if main.STREAM_INGESTOR is not None:
+        main.STREAM_INGESTOR.start()
+
+    listed = main.symbol_listed(symbol, market_type)
+    if listed is False:
+        return {"available": False}
+
+    plans = main.market_input_plans(symbol, interval, market_type, limit, indicators)
+    sentiment = None
+    if "sentiment" in main.REGISTRY.required_inputs(indicators):
+        # Only blocks (briefly) before the first F&G value has been fetched
+        sentiment = asyncio.ensure_future(asyncio.to_thread(main.sentiment_inputs))
+    results = await asyncio.gather(
+        *(_run_plan(main.INPUT_STAGES[name], plan) for name, plan in plans.items()), return_exceptions=True
+    )
+
+    inputs = await sentiment if sentiment is not None else {}
+    inputs.update(zip(plans, results))
+    inputs["available"] = main.symbol_available(listed, inputs)
+    return inputs
+
+
+async def analyze_symbol(symbol, interval, market_type, trade_type, indicators=None, output="text"):
+    inputs = await fetch_market_inputs(symbol, interval, market_type, indicators=indicators)
+    return await run_cpu(main.build_analysis, inputs, symbol, interval, market_type, trade_type, indicators, output)
+
+
+async def analyze(body, query, accept=None):
+    """Return ``(status, payload, headers)`` for an ``/analyze`` request.
+
+    ``output=structured`` payloads come back already encoded (bytes) in the
+    format negotiated from ``accept``, with their content-type in ``headers``.
+    """
+    try:
+        with metrics.span("validate"):
+            try:
+                params = json.loads(body)
+                symbol, interval, market_type, trade_type, indicators = main.parse_analyze_params(params)
+                output = main.parse_output_mode(query.get('output', [None])[0] or params.get('output'))
+            except ValueError as e:
+                return 400, {'error': str(e)}, []
+
+        try:
+            response, outcome = await main.ANALYZE_CACHE.get_or_compute_async(
+                main.analyze_cache_key(symbol, interval, market_type, trade_type, indicators, output),
+                lambda: analyze_symbol(symbol, interval, market_type, trade_type, indicators, output),
+                expires_at=main.next_candle_open(interval, int(time.time() * 1000)) / 1000
+            )
+        except LookupError as e:
+            return 400, {'error': str(e)}, []
+
+        if query.get('profile') == ['1']:
+            response = dict(response, profile=metrics.current_profile().as_dict())
+        headers = [(b'x-cache', outcome.upper().encode())]
+        if output == "structured":
+            mimetype = encoders.negotiate(accept)
+            with metrics.span("encode"):
+                response = encoders.encode(response, mimetype)
+            headers.append((b'content-type', mimetype.encode()))
+        return 200, response, headers
+
+    except Exception as e:
+        return 500, {'error': str(e)}, []
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def _send(send, status, body, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-length", str(len(body)).encode()), (b"access-control-allow-origin", b"*"), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _handle_analyze(scope, receive, send):
+    token = metrics.start_profile()
+    try:
+        if scope["method"] == "OPTIONS":
+            # CORS preflight, answered like flask-cors does for the sync app
+            requested = dict(scope["headers"]).get(b"access-control-request-headers", b"content-type")
+            await _send(send, 200, b"", [(b"access-control-allow-methods", b"POST, OPTIONS"),
+                                         (b"access-control-allow-headers", requested)])
+            status = 200
+        else:
+            if scope["method"] != "POST":
+                status, payload, headers = 405, {'error': 'Method not allowed'}, []
+            else:
+                try:
+                    body = await _read_body(receive)
+                except ValueError as e:
+                    status, payload, headers = 413, {'error': str(e)}, []
+                else:
+                    query = parse_qs(scope.get("query_string", b"").decode())
+                    accept = dict(scope["headers"]).get(b"accept", b"").decode()
+                    status, payload, headers = await analyze(body, query, accept)
+            if isinstance(payload, bytes):
+                await _send(send, status, payload, headers)
+            else:
+                body = (main.app.json.dumps(payload) + "\n").encode()
+                await _send(send, status, body, [(b"content-type", b"application/json"), *headers])
+
+        main.HTTP_REQUESTS.inc("/analyze", scope["method"], str(status))
+        main.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - metrics.current_profile().started, "/analyze")
+    finally:
+        metrics.end_profile(token)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            main.start_background()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await http_client.close_async()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/analyze":
+        await _handle_analyze(scope, receive, send)
+    elif _flask_app is not None:
+        await _flask_app(scope, receive, send)
+    else:
+        body = json.dumps({'error': 'Only /analyze is served without the asgiref package'}).encode()
+        await _send(send, 404, body, [(b"content-type", b"application/json")])
@@ -0,0 +1,333 @@
+"""Vectorized backtests of the indicator verdicts.
+
+Every candle-based indicator's yes/no is computed for every bar at once from
+full-history arrays instead of calling each ``*_verdict`` once per bar. The
+per-bar score decides entries, exits are the targets and stop loss of
+``calculate_target_prices`` evaluated per bar, and each symbol runs in its own
+process.
+
+Only the eight indicators that can be derived from candles are replayed; the
+exchange flow, sentiment, miner and whale inputs have no history, so the
+default entry threshold is the live 6/12 scaled to 4/8. Indicators use the
+whole history rather than a 200-candle window, so long EMAs are fully
+converged; the windowed ones (RSI, ADX, volume profile, levels, ...) give the
+same verdicts as a live analysis of the same bar. Candles come from the local
+history store when the series has been backfilled, otherwise from ``/klines``.
+
+    python backtest.py BTCUSDT ETHUSDT --interval 1h --bars 20000
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from features import FeatureFrame
+from history_store import HistoryStore
+
+DEFAULT_MIN_SCORE = 4  # Live threshold of 6/12 scaled to the 8 replayable indicators
+DEFAULT_HORIZON = 100  # Bars a trade may stay open before it is closed at market
+PROFILE_WINDOW = 200  # Candles per volume profile, as in a live analysis
+PROFILE_BINS = 10
+LEVEL_LOOKBACK = 50
+CHUNK_ROWS = 4096  # Bars per block in the windowed computations
+
+
+def _nan_to(values, default):
+    return np.where(np.isnan(values), default, values)
+
+
+def _rolling(values, window, reducer):
+    return getattr(pd.Series(values).rolling(window, min_periods=1), reducer)().to_numpy()
+
+
+def _volume_profile_signal(close, volume, window=PROFILE_WINDOW, num_bins=PROFILE_BINS):
+    """Per bar: is the close inside a strong volume zone of the trailing window?"""
+    n = len(close)
+    near = np.zeros(n, dtype=bool)
+    if n < window:
+        return near
+
+    close_windows = sliding_window_view(close, window)
+    volume_windows = sliding_window_view(volume, window)
+    for start in range(0, len(close_windows), CHUNK_ROWS):
+        closes = close_windows[start:start + CHUNK_ROWS]
+        volumes = volume_windows[start:start + CHUNK_ROWS]
+        rows = len(closes)
+
+        low, high = closes.min(axis=1, keepdims=True), closes.max(axis=1, keepdims=True)
+        width = (high - low) / num_bins
+        with np.errstate(divide="ignore", invalid="ignore"):
+            idx = np.floor((closes - low) / width)
+        # Top edge excluded, as in the live profile
+        valid = np.isfinite(idx) & (idx >= 0) & (idx < num_bins)
+
+        flat = (np.arange(rows)[:, None] * num_bins + idx)[valid].astype(np.int64)
+        profile = np.bincount(flat, weights=volumes[valid], minlength=rows * num_bins).reshape(rows, num_bins)
+        strong = profile >= profile.max(axis=1, keepdims=True) * 0.7
+        strong &= np.bincount(flat, minlength=rows * num_bins).reshape(rows, num_bins) > 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current = np.floor((closes[:, -1:] - low) / width)
+        current = np.clip(np.nan_to_num(current, nan=-1), -1, num_bins - 1).astype(np.int64)
+        # A close on a bin's lower edge also sits on the upper edge of the bin below
+        on_edge = np.isclose(closes[:, -1:], low + current * width) & (current > 0)
+        in_zone = np.take_along_axis(strong, np.maximum(current, 0), axis=1) & (current >= 0)
+        below = np.take_along_axis(strong, np.maximum(current - 1, 0), axis=1) & on_edge
+        near[start + window - 1:start + window - 1 + rows] = (in_zone | below)[:, 0]
+    return near
+
+
+def _level_signal(high, low, close, trade_type, lookback=LEVEL_LOOKBACK, levels_per_side=3):
+    """Per bar: is the close near the clustered support (long) or resistance (short)?"""
+    n = len(close)
+    near = np.zeros(n, dtype=bool)
+    if n < lookback:
+        return near
+
+    high_windows = sliding_window_view(high, lookback)
+    low_windows = sliding_window_view(low, lookback)
+    for start in range(0, len(high_windows), CHUNK_ROWS):
+        highs = high_windows[start:start + CHUNK_ROWS].copy()
+        lows = low_windows[start:start + CHUNK_ROWS].copy()
+        current = close[start + lookback - 1:start + lookback - 1 + len(highs), None]
+
+        # Same clustering as support_resistance_verdict: take the extreme, drop values within 1%
+        levels = []
+        for _ in range(levels_per_side):
+            active = ~np.isnan(highs).all(axis=1, keepdims=True) & ~np.isnan(lows).all(axis=1, keepdims=True)
+            with np.errstate(invalid="ignore"):
+                resistance = np.where(active, np.nanmax(np.where(active, highs, 0), axis=1, keepdims=True), np.nan)
+                support = np.where(active, np.nanmin(np.where(active, lows, 0), axis=1, keepdims=True), np.nan)
+                highs[(highs >= resistance * 0.99) & (highs <= resistance * 1.01)] = np.nan
+                lows[(lows >= support * 0.99) & (lows <= support * 1.01)] = np.nan
+            levels.extend([support, resistance])
+        levels = np.hstack(levels)
+
+        with np.errstate(invalid="ignore"):
+            if trade_type == "long":
+                nearest = np.nanmax(np.where(levels < current, levels, np.nan), axis=1, keepdims=True)
+                hit = current <= nearest * 1.02
+            else:
+                nearest = np.nanmin(np.where(levels > current, levels, np.nan), axis=1, keepdims=True)
+                hit = current >= nearest * 0.98
+        near[start + lookback - 1:start + lookback - 1 + len(highs)] = hit[:, 0]
+    return near
+
+
+def indicator_signals(df, trade_type):
+    """Yes/no of every replayable indicator at every bar, as a dict of bool arrays"""
+    f = FeatureFrame(df)
+    long = trade_type == "long"
+    high, low, close = f.high, f.low, f.close
+
+    plus_di, minus_di, adx = f.directional_index
+    rsi = _nan_to(f.rsi, 50)
+    stoch_rsi = _nan_to(f.stoch_rsi, 50)
+    macd_above = _nan_to(f.macd, 0) > _nan_to(f.macd_signal, 0)
+
+    prev_high, prev_low = np.r_[np.nan, high[:-1]], np.r_[np.nan, low[:-1]]
+    if long:
+        smc = ((high > prev_high) & (low > prev_low)) | (close >= _rolling(low, 5, "min") * 0.98)
+    else:
+        smc = ((high < prev_high) & (low < prev_low)) | (close <= _rolling(high, 5, "max") * 1.02)
+
+    near_zone = _volume_profile_signal(close, f.volume)
+    return {
+        "ADX": _nan_to(adx, 0) > 25,
+        "EMA": f.ema(50) > f.ema(200) if long else f.ema(50) < f.ema(200),
+        "MACD": macd_above if long else ~macd_above,
+        "Volume Profile": near_zone if long else ~near_zone,
+        "RSI": rsi < 30 if long else rsi > 70,
+        "Smart Money": smc,
+        "Stochastic RSI": stoch_rsi < 20 if long else stoch_rsi > 80,
+        "Support/Resistance": _level_signal(high, low, close, trade_type),
+    }
+
+
+def target_levels(df, trade_type, target="moderate"):
+    """Per-bar ``(target, stop)`` arrays, as ``calculate_target_prices`` computes them"""
+    f = FeatureFrame(df)
+    price, atr = f.close, f.atr(14)
+    support = _rolling(f.low, LEVEL_LOOKBACK, "min")
+    resistance = _rolling(f.high, LEVEL_LOOKBACK, "max")
+
+    if trade_type == "long":
+        targets = {
+            "conservative": price + atr,
+            "moderate": price + 2 * atr,
+            "aggressive": np.where(resistance > price, resistance, price + 3 * atr),
+        }
+        stop = np.maximum(support, price - 2 * atr)
+    else:
+        targets = {
+            "conservative": price - atr,
+            "moderate": price - 2 * atr,
+            "aggressive": np.where(support < price, support, price - 3 * atr),
+        }
+        stop = np.minimum(resistance, price + 2 * atr)
+    return targets[target], stop
+
+
+def trade_outcomes(df, trade_type, target, stop, horizon=DEFAULT_HORIZON):
+    """Outcome of a trade entered at every bar's close.
+
+    Returns ``(exit_offset, won, returns)``: bars until exit, whether the target
+    was hit before the stop, and the trade return. When target and stop are
+    both inside one bar the stop is assumed to come first; trades hitting
+    neither are closed at market after ``horizon`` bars (or at the last bar).
+    """
+    high, low, close = (df[column].to_numpy() for column in ("high", "low", "close"))
+    n = len(close)
+    long = trade_type == "long"
+
+    # Pad so every bar has a full look-ahead window
+    pad = np.full(horizon, np.nan)
+    future_high = sliding_window_view(np.r_[high[1:], pad, np.nan], horizon)[:n]
+    future_low = sliding_window_view(np.r_[low[1:], pad, np.nan], horizon)[:n]
+
+    exit_offset = np.empty(n, dtype=np.int64)
+    exit_price = np.empty(n)
+    won = np.zeros(n, dtype=bool)
+    for start in range(0, n, CHUNK_ROWS):
+        rows = slice(start, start + CHUNK_ROWS)
+        highs, lows = future_high[rows], future_low[rows]
+        bar_target, bar_stop = target[rows, None], stop[rows, None]
+        if long:
+            hit_target, hit_stop = highs >= bar_target, lows <= bar_stop
+        else:
+            hit_target, hit_stop = lows <= bar_target, highs >= bar_stop
+
+        first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), horizon)
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), horizon)
+        last_bar = np.minimum(horizon, n - 1 - np.arange(start, start + len(highs))) - 1
+
+        stopped = (first_stop <= first_target) & (first_stop < horizon)
+        targeted = (first_target < first_stop)
+        won[rows] = targeted
+        exit_offset[rows] = np.where(stopped, first_stop, np.where(targeted, first_target, last_bar)) + 1
+        exit_price[rows] = np.where(stopped, stop[rows], np.where(targeted, target[rows], np.nan))
+
+    timed_out = np.isnan(exit_price)
+    exit_index = np.minimum(np.arange(n) + exit_offset, n - 1)
+    exit_price[timed_out] = close[exit_index[timed_out]]
+
+    returns = exit_price / close - 1
+    return exit_offset, won, returns if long else -returns
+
+
+def _sequential_trades(entries, exit_offset):
+    """Entry bars taken when only one position may be open at a time"""
+    taken = []
+    next_free = 0
+    for bar in np.flatnonzero(entries):
+        if bar >= next_free:
+            taken.append(bar)
+            next_free = bar + exit_offset[bar]
+    return np.array(taken, dtype=np.int64)
+
+
+def _rate(mask, won, returns):
+    count = int(mask.sum())
+    return {
+        "signals": count,
+        "hit_rate": float(won[mask].mean()) if count else None,
+        "avg_return": float(returns[mask].mean()) if count else None,
+    }
+
+
+def backtest_frame(df, trade_type="long", min_score=DEFAULT_MIN_SCORE, target="moderate",
+                   horizon=DEFAULT_HORIZON, fee=0.0):
+    """Backtest one candle history; ``fee`` is charged per round trip as a fraction"""
+    signals = indicator_signals(df, trade_type)
+    score = np.sum(list(signals.values()), axis=0)
+    target_price, stop_price = target_levels(df, trade_type, target)
+    exit_offset, won, returns = trade_outcomes(df, trade_type, target_price, stop_price, horizon)
+    returns = returns - fee
+
+    # Bars without ATR history or look-ahead cannot be traded
+    tradable = ~np.isnan(target_price) & ~np.isnan(stop_price)
+    tradable[-1] = False
+    trades = _sequential_trades(tradable & (score >= min_score), exit_offset)
+
+    return {
+        "bars": len(df),
+        "trade_type": trade_type,
+        "min_score": min_score,
+        "trades": len(trades),
+        "win_rate": float(won[trades].mean()) if len(trades) else None,
+        "avg_return": float(returns[trades].mean()) if len(trades) else None,
+        "total_return": float(np.prod(1 + returns[trades]) - 1) if len(trades) else 0.0,
+        "indicator_hit_rates": {name: _rate(signal & tradable, won, returns) for name, signal in signals.items()},
+        "score_hit_rates": {
+            f"{level}/{len(signals)}": _rate((score == level) & tradable, won, returns)
+            for level in range(len(signals) + 1)
+        },
+    }
+
+
+def _run_job(job):
+    from main import fetch_ohlc_data
+
+    symbol, interval, market_type, bars, options = job
+    try:
+        # Prefer the local history store; download only what was never backfilled
+        df = HistoryStore().load_frame(market_type, symbol, interval, limit=bars)
+        if df is None:
+            df = fetch_ohlc_data(symbol, interval, market_type, limit=bars)
+        if df.empty:
+            raise ValueError("No kline data. Check the symbol and interval.")
+        return dict(backtest_frame(df, **options), symbol=symbol, interval=interval)
+    except Exception as e:
+        return {"symbol": symbol, "interval": interval, "error": str(e)}
+
+
+def run_backtests(symbols, interval, market_type="spot", bars=5000, processes=None, **options):
+    """Backtest several symbols in parallel, one process per symbol"""
+    jobs = [(symbol.upper(), interval, market_type, bars, options) for symbol in symbols]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_run_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the indicator verdicts on historical klines")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--market", choices=["spot", "futures"], default="spot")
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--trade-type", choices=["long", "short"], default="long")
+    parser.add_argument("--min-score", type=int, default=DEFAULT_MIN_SCORE)
+    parser.add_argument("--target", choices=["conservative", "moderate", "aggressive"], default="moderate")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    parser.add_argument("--fee", type=float, default=0.0)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--out", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    results = run_backtests(
+        args.symbols, args.interval, args.market, args.bars, args.processes,
+        trade_type=args.trade_type, min_score=args.min_score, target=args.target,
+        horizon=args.horizon, fee=args.fee
+    )
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['symbol']}: ❌ {result['error']}")
+            continue
+        win_rate = f"{result['win_rate']:.1%}" if result['win_rate'] is not None else "n/a"
+        print(f"\n📈 {result['symbol']} {result['interval']} {result['trade_type'].upper()} | "
+              f"{result['bars']} bars | {result['trades']} trades | win {win_rate} | "
+              f"total {result['total_return']:+.2%}")
+        for name, stats in result["indicator_hit_rates"].items():
+            hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else "n/a"
+            print(f"   {name:<20} {stats['signals']:>8} signals   hit rate {hit_rate}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Micro-benchmarks for the analysis hot paths.
+
+Every ``*_verdict`` function, ``calculate_target_prices``, the parsing steps
+of ``fetch_ohlc_data`` and ``fetch_order_book``, ``format_console_output`` and
+the encoded ``output=structured`` body are timed on deterministic synthetic candles at several sizes, without any
+network calls.
+Each function gets a cold ``DataFrame`` input, so the per-call timings include
+the feature computations it triggers.
+
+    python benchmark.py --save              # record benchmark_baseline.json
+    python benchmark.py                     # compare; exit 1 on a regression or a missing baseline
+
+Timings only compare on the machine that recorded them, so a baseline saved
+with a different Python, architecture or host name is reported and skipped
+instead of failing the run; record one per host with ``--save``.
+    python benchmark.py --sizes 200 1000 --only rsi ema --threshold 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import encoders
+from kline_cache import parse_klines, tail, to_frame
+from order_book import parse_depth
+
+DEFAULT_SIZES = [200, 1_000, 10_000, 100_000]
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown over the baseline before failing
+DEFAULT_REPEAT = 5
+MIN_RUN_TIME = 0.2  # seconds; each timing repeats the call at least this long
+NOISE_FLOOR = 10e-6  # seconds; slowdowns smaller than this are timer jitter, not regressions
+SEED = 42
+ORDER_BOOK_LEVELS = 500  # What fetch_order_book requests
+
+
+def synthetic_klines(rows, seed=SEED, interval_ms=3_600_000):
+    """Raw ``/klines`` rows of a seeded random walk, strings and all"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, rows))
+    volume = rng.uniform(1, 100, rows)
+    trades = rng.integers(1, 1000, rows)
+    start = 1_600_000_000_000
+
+    return [
+        [start + i * interval_ms, f"{open_[i]:.8f}", f"{high[i]:.8f}", f"{low[i]:.8f}", f"{close[i]:.8f}",
+         f"{volume[i]:.8f}", start + (i + 1) * interval_ms - 1, f"{volume[i] * close[i]:.8f}", int(trades[i]),
+         f"{volume[i] / 2:.8f}", f"{volume[i] * close[i] / 2:.8f}", "0"]
+        for i in range(rows)
+    ]
+
+
+def synthetic_order_book(price, levels=ORDER_BOOK_LEVELS, seed=SEED):
+    rng = np.random.default_rng(seed)
+    bids = price * (1 - np.cumsum(rng.uniform(0, 1e-4, levels)))
+    asks = price * (1 + np.cumsum(rng.uniform(0, 1e-4, levels)))
+    return {
+        "lastUpdateId": 1,
+        "bids": [[f"{p:.8f}", f"{q:.8f}"] for p, q in zip(bids, rng.exponential(2, levels))],
+        "asks": [[f"{p:.8f}", f"{q:.8f}"] for p, q in zip(asks, rng.exponential(2, levels))],
+    }
+
+
+def parse_ohlc(raw):
+    """The parsing step of ``fetch_ohlc_data`` for a downloaded window"""
+    columns = parse_klines(raw)
+    return to_frame(tail(columns, len(columns["timestamp"])))
+
+
+def benchmark_cases(rows):
+    """Return ``{name: zero-argument callable}`` for one data size"""
+    import main
+
+    raw = synthetic_klines(rows)
+    df = parse_ohlc(raw)
+    price = float(df["close"].iloc[-1])
+    ticker = {"symbol": "BENCHUSDT", "volume": "123456.78", "quoteVolume": "98765432.1", "lastPrice": str(price)}
+    raw_order_book = synthetic_order_book(price)
+    order_book = parse_depth(raw_order_book)
+
+    verdicts = {
+        "ADX": main.adx_verdict(df, "long"),
+        "EMA": main.ema_verdict(df, "long"),
+        "Exchange Net Flow": main.netflow_verdict("BENCHUSDT", "spot", "long", ticker=ticker),
+        "Market Sentiment": main.sentiment_verdict("long", index_value=50, age=0),
+        "Miner Activity": main.miner_verdict(),
+        "MACD": main.macd_verdict(df, "long"),
+        "Volume Profile": main.volume_profile_verdict(df, "long"),
+        "RSI": main.rsi_verdict(df, "long"),
+        "Smart Money": main.smc_verdict(df, "long"),
+        "Whale Activity": main.whale_verdict("BENCHUSDT", "long", order_book=order_book),
+        "Stochastic RSI": main.stoch_rsi_verdict(df, "long"),
+        "Support/Resistance": main.support_resistance_verdict(df, "long"),
+    }
+    results = {
+        "symbol": "BENCHUSDT",
+        "timeframe": "1h",
+        "trade_type": "long",
+        "current_price": price,
+        "verdicts": verdicts,
+        "final_verdict": main.get_final_verdict(verdicts),
+        "structured_data": {"targets": main.calculate_target_prices(df, price, "long")},
+    }
+
+    return {
+        "parse_ohlc": lambda: parse_ohlc(raw),
+        "parse_depth": lambda: parse_depth(raw_order_book),
+        "adx_verdict": lambda: main.adx_verdict(df, "long"),
+        "ema_verdict": lambda: main.ema_verdict(df, "long"),
+        "netflow_verdict": lambda: main.netflow_verdict("BENCHUSDT", "spot", "long", ticker=ticker),
+        "sentiment_verdict": lambda: main.sentiment_verdict("long", index_value=50, age=0),
+        "miner_verdict": main.miner_verdict,
+        "macd_verdict": lambda: main.macd_verdict(df, "long"),
+        "volume_profile_verdict": lambda: main.volume_profile_verdict(df, "long"),
+        "rsi_verdict": lambda: main.rsi_verdict(df, "long"),
+        "smc_verdict": lambda: main.smc_verdict(df, "long"),
+        "whale_verdict": lambda: main.whale_verdict("BENCHUSDT", "long", order_book=order_book),
+        "stoch_rsi_verdict": lambda: main.stoch_rsi_verdict(df, "long"),
+        "support_resistance_verdict": lambda: main.support_resistance_verdict(df, "long"),
+        "calculate_target_prices": lambda: main.calculate_target_prices(df, price, "long"),
+        "format_console_output": lambda: main.format_console_output(results),
+        "structured_output": lambda: encoders.encode(main.structured_payload(
+            "BENCHUSDT", "1h", "spot", "long", price, verdicts, results["structured_data"]["targets"])),
+    }
+
+
+def time_call(func, repeat=DEFAULT_REPEAT):
+    """Best seconds per call over ``repeat`` runs of at least ``MIN_RUN_TIME`` each"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_RUN_TIME:
+            break
+        number *= 10 if elapsed < MIN_RUN_TIME / 10 else 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, only=None, repeat=DEFAULT_REPEAT, progress=None):
+    """Return ``{"<name>@<rows>": seconds per call}``"""
+    timings = {}
+    for rows in sizes:
+        random.seed(SEED)  # miner_verdict draws from the global generator
+        for name, func in benchmark_cases(rows).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = f"{name}@{rows}"
+            timings[key] = time_call(func, repeat)
+            if progress:
+                progress(key, timings[key])
+    return timings
+
+
+def compare(timings, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return ``[(key, baseline, current, ratio)]`` for every benchmark slower than allowed"""
+    regressions = []
+    for key, seconds in timings.items():
+        reference = baseline.get(key)
+        if reference and seconds > reference * (1 + threshold) and seconds - reference > NOISE_FLOOR:
+            regressions.append((key, reference, seconds, seconds / reference))
+    return regressions
+
+
+def platform_info():
+    """What a baseline records about the machine that timed it"""
+    return {"python": platform.python_version(), "machine": platform.machine(), "host": platform.node()}
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths on synthetic candles")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown as a fraction, e.g. 0.25 for 25%%")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    mismatched = {}  # field -> (recorded, current)
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            recorded = json.load(f)
+        baseline = recorded["timings"]
+        mismatched = {field: (recorded.get(field), value) for field, value in platform_info().items()
+                      if recorded.get(field) != value}
+
+    def progress(key, seconds):
+        line = f"{key:<40} {_format_seconds(seconds):>10}"
+        if baseline.get(key) and not mismatched:
+            line += f"   {seconds / baseline[key]:>6.2f}x baseline"
+        print(line, flush=True)
+
+    timings = run_benchmarks(args.sizes, args.only, args.repeat, progress)
+
+    if args.save:
+        # Keep entries of benchmarks that were not part of this run, if they were timed here
+        with open(args.baseline, "w") as f:
+            json.dump(dict(platform_info(), timings=dict({} if mismatched else baseline, **timings)),
+                      f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\n❌ No baseline at {args.baseline}; run with --save to record one", file=sys.stderr)
+        sys.exit(1)
+
+    if mismatched:
+        differences = ", ".join(f"{field} {recorded} → {current}" for field, (recorded, current) in mismatched.items())
+        print(f"\n⚠️ {args.baseline} was recorded on another machine ({differences}); not compared."
+              f" Run with --save to record a baseline for this one", file=sys.stderr)
+        return
+
+    unmeasured = [key for key in timings if key not in baseline]
+    if unmeasured:
+        print(f"\n⚠️ Not in the baseline, so not compared: {', '.join(unmeasured)}")
+
+    regressions = compare(timings, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for key, reference, seconds, ratio in regressions:
+            print(f"   {key:<40} {_format_seconds(reference)} → {_format_seconds(seconds)} ({ratio:.2f}x)")
+        sys.exit(1)
+    print(f"\n✅ No regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
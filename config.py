@@ -0,0 +1,14 @@
+"""Upstream endpoints shared by the app and its helper modules.
+
+Kept apart from ``main`` so modules such as ``symbol_registry`` can reach
+Binance without importing the Flask app (which, when ``main.py`` runs as a
+script, would load it a second time as ``main``).
+"""
+BINANCE_SPOT_URL = "https://api.binance.com/api/v3"
+BINANCE_FUTURES_URL = "https://fapi.binance.com/fapi/v1"
+FEAR_GREED_API_URL = "https://api.alternative.me/fng/"
+
+
+def binance_url(market_type):
+    """REST base URL of ``market_type`` ("futures", anything else is spot)"""
+    return BINANCE_FUTURES_URL if market_type == "futures" else BINANCE_SPOT_URL
@@ -0,0 +1,60 @@
+"""Compact encoders for the structured ``/analyze`` output.
+
+JSON is written without whitespace, by ``orjson`` when it is installed and
+the standard library otherwise. MessagePack is offered when the optional
+``msgpack`` package is installed. ``negotiate`` picks one from the request's
+``Accept`` header and falls back to JSON.
+"""
+import json
+
+import numpy as np
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def encode_msgpack(payload):
+    return msgpack.packb(payload, default=_default)
+
+
+ENCODERS = {JSON: encode_json}
+if msgpack is not None:
+    ENCODERS[MSGPACK] = encode_msgpack
+    ENCODERS["application/x-msgpack"] = encode_msgpack
+
+
+def negotiate(accept):
+    """Best available mimetype for an ``Accept`` header value, JSON if none matches"""
+    if not accept:
+        return JSON
+    return parse_accept_header(accept, MIMEAccept).best_match(ENCODERS, default=JSON)
+
+
+def encode(payload, mimetype=JSON):
+    return ENCODERS[mimetype](payload)
@@ -0,0 +1,119 @@
+"""Indicator intermediates shared by the ``*_verdict`` functions.
+
+A ``FeatureFrame`` wraps one candle window and computes each shared series
+(true range, RSI, EMAs, DI/ADX, ...) at most once, on first use, so that
+indicators which overlap (RSI and StochRSI, ADX and ATR, ...) stop redoing
+each other's work. Series are exposed as NumPy arrays; the candle columns
+are views of the DataFrame, not copies. The calculations are the same
+pandas operations the indicators always used, so results are unchanged.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+RSI_PERIOD = 14
+ADX_PERIOD = 14
+
+
+class FeatureFrame:
+    def __init__(self, df):
+        self.df = df
+        self.high = df["high"].to_numpy()
+        self.low = df["low"].to_numpy()
+        self.close = df["close"].to_numpy()
+        self.volume = df["volume"].to_numpy()
+        self._emas = {}
+        self._atrs = {}
+
+    def __len__(self):
+        return len(self.close)
+
+    @cached_property
+    def prev_close(self):
+        prev_close = np.empty_like(self.close)
+        prev_close[:1] = np.nan
+        prev_close[1:] = self.close[:-1]
+        return prev_close
+
+    @cached_property
+    def true_range(self):
+        # fmax skips the NaN of the first candle like DataFrame.max(axis=1)
+        tr = np.fmax(self.high - self.low, np.abs(self.high - self.prev_close))
+        return np.fmax(tr, np.abs(self.low - self.prev_close))
+
+    def ema(self, span):
+        if span not in self._emas:
+            self._emas[span] = self.df["close"].ewm(span=span, adjust=False).mean().to_numpy()
+        return self._emas[span]
+
+    @cached_property
+    def macd(self):
+        return self.ema(12) - self.ema(26)
+
+    @cached_property
+    def macd_signal(self):
+        return pd.Series(self.macd).ewm(span=9, adjust=False).mean().to_numpy()
+
+    @cached_property
+    def rsi(self):
+        delta = self.df["close"].diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=RSI_PERIOD).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
+        rs = gain / loss
+        return (100 - (100 / (1 + rs))).to_numpy()
+
+    @cached_property
+    def stoch_rsi(self):
+        rsi = pd.Series(self.rsi)
+        stoch_rsi_min = rsi.rolling(RSI_PERIOD).min()
+        stoch_rsi_max = rsi.rolling(RSI_PERIOD).max()
+        return (100 * (rsi - stoch_rsi_min) / (stoch_rsi_max - stoch_rsi_min)).to_numpy()
+
+    @cached_property
+    def directional_index(self):
+        """+DI, -DI and ADX series"""
+        plus_dm = self.df["high"].diff()
+        minus_dm = self.df["low"].diff()
+        plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0)
+        minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0)
+
+        tr_sum = pd.Series(self.true_range).rolling(ADX_PERIOD).sum().to_numpy()
+        plus_di = 100 * (plus_dm.rolling(ADX_PERIOD).sum().to_numpy() / tr_sum)
+        minus_di = 100 * (minus_dm.rolling(ADX_PERIOD).sum().to_numpy() / tr_sum)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = pd.Series(dx).rolling(ADX_PERIOD).mean().to_numpy()
+        return plus_di, minus_di, adx
+
+    def atr(self, period=14):
+        if period not in self._atrs:
+            self._atrs[period] = pd.Series(self.true_range).rolling(period).mean().to_numpy()
+        return self._atrs[period]
+
+    def highest(self, lookback):
+        return np.nanmax(self.high[-lookback:])
+
+    def lowest(self, lookback):
+        return np.nanmin(self.low[-lookback:])
+
+
+def last(values, default):
+    """Latest value of a series, or ``default`` when it is NaN"""
+    value = values[-1]
+    return default if pd.isna(value) else float(value)
+
+
+# Shared series by name: (series they are computed from, how to read them off a FeatureFrame).
+# Indicators declare which of these they use so a planner can compute each one once, up front.
+SERIES = {
+    "true_range": ((), lambda f: f.true_range),
+    "directional_index": (("true_range",), lambda f: f.directional_index),
+    "ema_12": ((), lambda f: f.ema(12)),
+    "ema_26": ((), lambda f: f.ema(26)),
+    "ema_50": ((), lambda f: f.ema(50)),
+    "ema_200": ((), lambda f: f.ema(200)),
+    "macd": (("ema_12", "ema_26"), lambda f: f.macd),
+    "macd_signal": (("macd",), lambda f: f.macd_signal),
+    "rsi": ((), lambda f: f.rsi),
+    "stoch_rsi": (("rsi",), lambda f: f.stoch_rsi),
+}
@@ -0,0 +1,220 @@
+"""Persistent columnar kline history.
+
+Each (market_type, symbol, interval) series lives in its own directory with
+one flat binary file per kline column:
+
+    <root>/<market_type>/<SYMBOL>/<interval>/<column>.bin
+
+Files only ever grow by appending closed candles in time order, and reads
+return slices of read-only ``np.memmap`` arrays, so loading years of candles
+copies nothing until the data is used. ``backfill`` pages through ``/klines``
+with ``startTime``/``endTime``, several pages in flight at once, through the
+shared weight-aware HTTP client. The backtester reads its history from here,
+and the live analysis warms a cold kline cache from the stored tail so only
+the candles since the last backfilled one are downloaded.
+
+    python history_store.py backfill BTCUSDT ETHUSDT --interval 1h --start 2022-01-01
+    python history_store.py info BTCUSDT --interval 1h
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import http_client
+from config import binance_url
+from kline_cache import FLOAT_COLUMNS, KLINE_COLUMNS, parse_klines
+from timeframes import interval_to_ms
+
+HISTORY_STORE_DIR = os.environ.get("HISTORY_STORE_DIR", os.path.join("data", "klines"))
+PAGE_LIMIT = 1000  # Candles per /klines call
+BACKFILL_WORKERS = 4  # Pages in flight at once; the client paces them by used weight
+
+# "ignore" carries no data and is not stored
+STORED_COLUMNS = [name for name in KLINE_COLUMNS if name != "ignore"]
+COLUMN_DTYPES = {name: np.float64 if name in FLOAT_COLUMNS else np.int64 for name in STORED_COLUMNS}
+
+
+class HistoryStore:
+    def __init__(self, root=HISTORY_STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, market_type, symbol, interval):
+        return os.path.join(self.root, market_type, symbol.upper(), interval)
+
+    def _path(self, market_type, symbol, interval, column):
+        return os.path.join(self._dir(market_type, symbol, interval), f"{column}.bin")
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def series(self):
+        """Yield every stored (market_type, symbol, interval)"""
+        if not os.path.isdir(self.root):
+            return
+        for market_type in sorted(os.listdir(self.root)):
+            for symbol in sorted(os.listdir(os.path.join(self.root, market_type))):
+                for interval in sorted(os.listdir(os.path.join(self.root, market_type, symbol))):
+                    yield market_type, symbol, interval
+
+    def count(self, market_type, symbol, interval):
+        """Number of complete rows; a torn trailing write is ignored"""
+        sizes = []
+        for column in STORED_COLUMNS:
+            path = self._path(market_type, symbol, interval, column)
+            sizes.append(os.path.getsize(path) // 8 if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def read(self, market_type, symbol, interval, start=None, end=None):
+        """Zero-copy column slices for candles opening in ``[start, end)`` (ms)"""
+        rows = self.count(market_type, symbol, interval)
+        if rows == 0:
+            return None
+
+        columns = {
+            column: np.memmap(self._path(market_type, symbol, interval, column),
+                              dtype=COLUMN_DTYPES[column], mode="r", shape=(rows,))
+            for column in STORED_COLUMNS
+        }
+        timestamps = columns["timestamp"]
+        lo = int(np.searchsorted(timestamps, start)) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, end)) if end is not None else rows
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def tail(self, market_type, symbol, interval, limit):
+        columns = self.read(market_type, symbol, interval)
+        if columns is None:
+            return None
+        return {column: values[-limit:] for column, values in columns.items()}
+
+    def load_frame(self, market_type, symbol, interval, limit=None, start=None, end=None):
+        """Stored candles as a kline DataFrame like ``fetch_ohlc_data`` returns, or None"""
+        if limit is not None:
+            columns = self.tail(market_type, symbol, interval, limit)
+        else:
+            columns = self.read(market_type, symbol, interval, start, end)
+        if columns is None:
+            return None
+        df = pd.DataFrame({column: np.asarray(columns[column]) for column in STORED_COLUMNS})
+        df["ignore"] = "0"
+        return df[KLINE_COLUMNS]
+
+    def last_open_time(self, market_type, symbol, interval):
+        rows = self.count(market_type, symbol, interval)
+        if rows == 0:
+            return None
+        timestamps = np.memmap(self._path(market_type, symbol, interval, "timestamp"),
+                               dtype=np.int64, mode="r", shape=(rows,))
+        return int(timestamps[-1])
+
+    def append(self, market_type, symbol, interval, columns):
+        """Append candles newer than the stored ones; returns the number written"""
+        key = (market_type, symbol.upper(), interval)
+        with self._lock(key):
+            os.makedirs(self._dir(*key), exist_ok=True)
+            rows = self.count(*key)
+            last = self.last_open_time(*key)
+            new = columns["timestamp"] > last if last is not None else np.ones(len(columns["timestamp"]), dtype=bool)
+            if not new.any():
+                return 0
+
+            for column in STORED_COLUMNS:
+                path = self._path(*key, column)
+                with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                    f.truncate(rows * 8)  # Drop any torn write from an interrupted append
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(columns[column][new], dtype=COLUMN_DTYPES[column]).tobytes())
+            return int(new.sum())
+
+    def backfill(self, market_type, symbol, interval, start, end=None, workers=BACKFILL_WORKERS, progress=None):
+        """Download closed candles from ``start`` (or after the last stored one) up to ``end``.
+
+        Pages are fetched ``workers`` at a time and appended in order.
+        Returns the number of candles written.
+        """
+        step = interval_to_ms(interval)
+        now = int(time.time() * 1000)
+        end = min(end or now, now)
+        last = self.last_open_time(market_type, symbol, interval)
+        if last is not None:
+            start = max(start, last + 1)
+
+        pages = list(range(start, end, step * PAGE_LIMIT))
+        url = f"{binance_url(market_type)}/klines?symbol={symbol.upper()}&interval={interval}&limit={PAGE_LIMIT}"
+
+        def fetch(page_start):
+            page_end = min(page_start + step * PAGE_LIMIT, end) - 1
+            raw = http_client.get_json(f"{url}&startTime={page_start}&endTime={page_end}")
+            if not isinstance(raw, list):
+                raise ValueError(raw.get("msg", raw) if isinstance(raw, dict) else raw)
+            return parse_klines(raw)
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+            for batch_start in range(0, len(pages), workers):
+                batch = pages[batch_start:batch_start + workers]
+                for columns in executor.map(fetch, batch):
+                    closed = columns["close_time"] < now  # Only closed candles are final
+                    written += self.append(market_type, symbol, interval,
+                                           {name: values[closed] for name, values in columns.items()})
+                if progress:
+                    progress(min(batch_start + workers, len(pages)), len(pages))
+        return written
+
+
+def _parse_time(value):
+    return int(pd.Timestamp(value, tz="UTC").timestamp() * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local columnar kline history")
+    parser.add_argument("--root", default=HISTORY_STORE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill", help="Download history into the store")
+    backfill.add_argument("symbols", nargs="+")
+    backfill.add_argument("--interval", default="1h")
+    backfill.add_argument("--market", choices=["spot", "futures"], default="spot")
+    backfill.add_argument("--start", required=True, help="UTC date, e.g. 2023-01-01")
+    backfill.add_argument("--end", help="UTC date; defaults to now")
+    backfill.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+
+    info = commands.add_parser("info", help="Show stored ranges")
+    info.add_argument("symbols", nargs="*")
+    info.add_argument("--interval")
+    info.add_argument("--market", choices=["spot", "futures"])
+
+    args = parser.parse_args()
+    store = HistoryStore(args.root)
+
+    if args.command == "backfill":
+        start = _parse_time(args.start)
+        end = _parse_time(args.end) if args.end else None
+        for symbol in args.symbols:
+            def progress(done, total, symbol=symbol):
+                print(f"\r⏳ {symbol.upper()} {args.interval}: page {done}/{total}", end="", flush=True)
+            written = store.backfill(args.market, symbol, args.interval, start, end, args.workers, progress)
+            print(f"\r✅ {symbol.upper()} {args.interval}: {written} candles written"
+                  f" ({store.count(args.market, symbol, args.interval)} stored)")
+    else:
+        wanted = {symbol.upper() for symbol in args.symbols}
+        for market_type, symbol, interval in store.series():
+            if (wanted and symbol not in wanted) or (args.interval and interval != args.interval) \
+                    or (args.market and market_type != args.market):
+                continue
+            columns = store.read(market_type, symbol, interval)
+            if columns is None:
+                continue
+            first, last = (pd.to_datetime(int(columns["timestamp"][i]), unit="ms") for i in (0, -1))
+            print(f"{market_type:<8} {symbol:<12} {interval:<4} {len(columns['timestamp']):>10} candles  {first} → {last}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Shared HTTP client for every Binance and sentiment upstream call.
+
+One pooled ``requests.Session`` keeps connections alive between requests,
+caps the number of connections per host, applies connect/read timeouts and
+retries transient failures with jittered exponential backoff. Every attempt
+is admitted by the shared ``upstream_scheduler.UpstreamScheduler``, which
+prices it in Binance request weight and queues or sheds it by priority
+before the exchange answers with 429 (rate limited) or 418 (IP banned).
+Identical GETs of the same priority in flight at the same time are
+coalesced into one request whose response every caller shares. Priorities
+are kept apart because a background request can be shed on any attempt,
+which must not fail an interactive caller that joined it; the price is one
+duplicate request when a refresher and a request coincide.
+
+``get_async`` does the same on an ``httpx.AsyncClient`` (optional, only the
+async app needs it), sharing the scheduler and coalescing with the sync session.
+Fetch plans, generators that yield URLs and receive responses, run on either
+client through ``run`` and ``run_async``.
+"""
+import asyncio
+import random
+import time
+import weakref
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from response_cache import ResponseCache
+from upstream_scheduler import UpstreamScheduler, UpstreamThrottled, current_priority, request_weight
+
+CONNECT_TIMEOUT = 3.05  # seconds
+READ_TIMEOUT = 10  # seconds
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.25  # seconds, doubled on every attempt
+BACKOFF_MAX = 4  # seconds
+RETRY_STATUSES = {418, 429, 500, 502, 503, 504}
+
+POOL_CONNECTIONS = 4  # Number of hosts we keep pools for
+POOL_MAXSIZE = 20  # Connections kept (and allowed) per host
+ASYNC_MAX_CONNECTIONS = 200  # Across hosts, per event loop
+
+
+UPSTREAM_REQUESTS = metrics.counter("upstream_requests_total", "Upstream HTTP attempts by host and status",
+                                    ["host", "status"])
+UPSTREAM_ERRORS = metrics.counter("upstream_errors_total", "Failed upstream attempts by host and reason",
+                                  ["host", "reason"])
+UPSTREAM_SECONDS = metrics.histogram("upstream_request_seconds", "Upstream HTTP attempt latency", ["host"])
+
+
+SCHEDULER = UpstreamScheduler()
+_in_flight = ResponseCache("upstream_in_flight")  # Single-flight only; nothing outlives its request
+
+
+def _observe(host, response):
+    """Feed Binance's used-weight and ban headers to the scheduler"""
+    used_weight = retry_after = None
+    for header, value in response.headers.items():
+        if header.upper().startswith("X-MBX-USED-WEIGHT"):
+            try:
+                used_weight = int(value)
+            except ValueError:
+                pass
+            break
+
+    if response.status_code in (418, 429):
+        try:
+            retry_after = float(response.headers.get("Retry-After", 60))
+        except ValueError:
+            retry_after = 60
+    SCHEDULER.observe(host, used_weight, retry_after)
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff"""
+    time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+
+
+def _in_flight_key(url, params):
+    # Per priority, see the module docstring
+    return url, tuple(sorted((params or {}).items())), current_priority()
+
+
+def _admit(host, cost):
+    try:
+        SCHEDULER.acquire(host, cost)
+    except UpstreamThrottled:
+        UPSTREAM_ERRORS.inc(host, "throttled")
+        raise
+
+
+async def _admit_async(host, cost):
+    try:
+        await SCHEDULER.acquire_async(host, cost)
+    except UpstreamThrottled:
+        UPSTREAM_ERRORS.inc(host, "throttled")
+        raise
+
+
+def get(url, params=None, timeout=None):
+    """GET ``url`` through the shared session, returning the last response"""
+    response, _ = _in_flight.get_or_compute(
+        _in_flight_key(url, params), lambda: _get(url, params, timeout), expires_at=0
+    )
+    return response
+
+
+def _get(url, params, timeout):
+    host = urlparse(url).netloc
+    cost = request_weight(url, params)
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    for attempt in range(MAX_RETRIES + 1):
+        _admit(host, cost)
+        started = time.perf_counter()
+        try:
+            response = _session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, host)
+            UPSTREAM_REQUESTS.inc(host, "error")
+            UPSTREAM_ERRORS.inc(host, "timeout" if isinstance(e, requests.Timeout) else "connection")
+            if attempt == MAX_RETRIES:
+                raise
+            _backoff(attempt)
+            continue
+
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, host)
+        UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(host, f"http_{response.status_code}")
+        _observe(host, response)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            _backoff(attempt)
+            continue
+        return response
+
+
+def get_json(url, params=None, timeout=None):
+    return get(url, params=params, timeout=timeout).json()
+
+
+def post(url, data=None, headers=None, timeout=None):
+    """POST through the shared session, once; not retried since the receiver may not be idempotent"""
+    host = urlparse(url).netloc
+    started = time.perf_counter()
+    try:
+        response = _session.post(url, data=data, headers=headers, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+    except (requests.ConnectionError, requests.Timeout) as e:
+        UPSTREAM_REQUESTS.inc(host, "error")
+        UPSTREAM_ERRORS.inc(host, "timeout" if isinstance(e, requests.Timeout) else "connection")
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, host)
+    UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+    if response.status_code >= 400:
+        UPSTREAM_ERRORS.inc(host, f"http_{response.status_code}")
+    return response
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def _async_client():
+    try:
+        import httpx
+    except ImportError as e:
+        raise RuntimeError("The async app needs the httpx package") from e
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_CONNECTIONS),
+        )
+    return client
+
+
+async def close_async():
+    """Close the running loop's async client, if one was opened"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def get_async(url, params=None, timeout=None):
+    """``get`` on the event loop's ``httpx.AsyncClient``"""
+    response, _ = await _in_flight.get_or_compute_async(
+        _in_flight_key(url, params), lambda: _get_async(url, params, timeout), expires_at=0
+    )
+    return response
+
+
+async def _get_async(url, params, timeout):
+    import httpx
+
+    client = _async_client()
+    host = urlparse(url).netloc
+    cost = request_weight(url, params)
+    timeout = httpx.Timeout(timeout) if timeout else client.timeout
+
+    for attempt in range(MAX_RETRIES + 1):
+        await _admit_async(host, cost)
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, params=params, timeout=timeout)
+        except httpx.TransportError as e:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, host)
+            UPSTREAM_REQUESTS.inc(host, "error")
+            UPSTREAM_ERRORS.inc(host, "timeout" if isinstance(e, httpx.TimeoutException) else "connection")
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+            continue
+
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, host)
+        UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(host, f"http_{response.status_code}")
+        _observe(host, response)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+            continue
+        return response
+
+
+def run(plan):
+    """Drive a fetch plan with blocking requests and return its result.
+
+    A plan is a generator that yields URLs and is sent each response (or has
+    the request's exception thrown into it); its return value is the result.
+    """
+    try:
+        url = next(plan)
+        while True:
+            try:
+                response = get(url)
+            except Exception as e:
+                url = plan.throw(e)
+            else:
+                url = plan.send(response)
+    except StopIteration as done:
+        return done.value
+
+
+async def run_async(plan):
+    """``run`` on the async client, without blocking the event loop"""
+    try:
+        url = next(plan)
+        while True:
+            try:
+                response = await get_async(url)
+            except Exception as e:
+                url = plan.throw(e)
+            else:
+                url = plan.send(response)
+    except StopIteration as done:
+        return done.value
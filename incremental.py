@@ -0,0 +1,288 @@
+"""Incremental, constant-time versions of the indicator series.
+
+Each state object is fed one candle at a time: ``append`` when a new candle
+opens and ``revise`` when the latest (still open) candle changes. Both run in
+O(1) time and memory, keeping only the previous scalar state and fixed-size
+windows, so indicators can be re-evaluated on every tick without recomputing
+the whole series.
+
+The formulas mirror ``features.FeatureFrame`` (which the ``*_verdict``
+functions read): the EMA recurrence is the one pandas uses for
+``ewm(adjust=False)``, and RSI is the 14-period simple rolling mean of gains
+and losses used by the batch code rather than Wilder's smoothing. Rolling
+sums are exactly rounded with ``math.fsum``, so values agree with the batch
+series to within floating point rounding of pandas' online rolling sums.
+"""
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+
+NAN = float("nan")
+
+
+class RollingWindow:
+    """Fixed-size window that can replace its newest value"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def revise(self, value):
+        self.values[-1] = value
+
+    @property
+    def full(self):
+        # Like pandas' min_periods=size, NaNs do not count as observations
+        return len(self.values) == self.size and not any(math.isnan(v) for v in self.values)
+
+    def sum(self):
+        return math.fsum(self.values) if self.full else NAN
+
+    def mean(self):
+        return self.sum() / self.size if self.full else NAN
+
+    def min(self):
+        return min(self.values) if self.full else NAN
+
+    def max(self):
+        return max(self.values) if self.full else NAN
+
+
+def _div(numerator, denominator):
+    """Float division with pandas semantics for zero denominators"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class IncrementalIndicator(ABC):
+    """Base for state objects driven by ``append``/``revise`` of (high, low, close)"""
+
+    @abstractmethod
+    def append(self, high, low, close):
+        """Add a newly opened candle"""
+
+    @abstractmethod
+    def revise(self, high, low, close):
+        """Replace the latest candle with its updated values"""
+
+    @classmethod
+    def from_candles(cls, highs, lows, closes, *args, **kwargs):
+        """Warm up a state object from history, one append per candle"""
+        indicator = cls(*args, **kwargs)
+        for high, low, close in zip(highs, lows, closes):
+            indicator.append(high, low, close)
+        return indicator
+
+
+class EMA(IncrementalIndicator):
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = NAN
+        self._previous = NAN  # EMA before the latest candle
+
+    def _step(self, previous, value):
+        if math.isnan(previous):
+            return value
+        return (1 - self.alpha) * previous + self.alpha * value
+
+    def push(self, value):
+        self._previous = self.value
+        self.value = self._step(self._previous, value)
+        return self.value
+
+    def replace(self, value):
+        self.value = self._step(self._previous, value)
+        return self.value
+
+    def append(self, high, low, close):
+        return self.push(close)
+
+    def revise(self, high, low, close):
+        return self.replace(close)
+
+
+class MACD(IncrementalIndicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def append(self, high, low, close):
+        self.macd = self._fast.push(close) - self._slow.push(close)
+        self.signal = self._signal.push(self.macd)
+
+    def revise(self, high, low, close):
+        self.macd = self._fast.replace(close) - self._slow.replace(close)
+        self.signal = self._signal.replace(self.macd)
+
+
+class RSI(IncrementalIndicator):
+    def __init__(self, period=14):
+        self._gains = RollingWindow(period)
+        self._losses = RollingWindow(period)
+        self._previous_close = NAN  # Close of the candle before the latest
+        self._last_close = NAN
+        self.value = NAN
+
+    def _split(self, close, previous_close):
+        delta = close - previous_close
+        # A NaN delta (first candle) counts as zero gain and zero loss
+        return (delta if delta > 0 else 0.0), (-delta if delta < 0 else 0.0)
+
+    def _compute(self):
+        rs = _div(self._gains.mean(), self._losses.mean())
+        self.value = 100 - _div(100, 1 + rs) if not math.isnan(rs) else NAN
+        return self.value
+
+    def push(self, close):
+        gain, loss = self._split(close, self._last_close)
+        self._gains.append(gain)
+        self._losses.append(loss)
+        self._previous_close, self._last_close = self._last_close, close
+        return self._compute()
+
+    def replace(self, close):
+        gain, loss = self._split(close, self._previous_close)
+        self._gains.revise(gain)
+        self._losses.revise(loss)
+        self._last_close = close
+        return self._compute()
+
+    def append(self, high, low, close):
+        return self.push(close)
+
+    def revise(self, high, low, close):
+        return self.replace(close)
+
+
+class StochRSI(IncrementalIndicator):
+    def __init__(self, period=14, stoch_period=14):
+        self._rsi = RSI(period)
+        self._window = RollingWindow(stoch_period)
+        self.value = NAN
+
+    def _compute(self, rsi):
+        low, high = self._window.min(), self._window.max()
+        self.value = 100 * _div(rsi - low, high - low)
+        return self.value
+
+    def append(self, high, low, close):
+        rsi = self._rsi.push(close)
+        self._window.append(rsi)
+        return self._compute(rsi)
+
+    def revise(self, high, low, close):
+        rsi = self._rsi.replace(close)
+        self._window.revise(rsi)
+        return self._compute(rsi)
+
+
+def _true_range(high, low, previous_close):
+    if math.isnan(previous_close):
+        return high - low
+    return max(high - low, abs(high - previous_close), abs(low - previous_close))
+
+
+class ATR(IncrementalIndicator):
+    def __init__(self, period=14):
+        self._ranges = RollingWindow(period)
+        self._previous_close = NAN
+        self._last_close = NAN
+        self.value = NAN
+
+    def append(self, high, low, close):
+        self._ranges.append(_true_range(high, low, self._last_close))
+        self._previous_close, self._last_close = self._last_close, close
+        self.value = self._ranges.mean()
+        return self.value
+
+    def revise(self, high, low, close):
+        self._ranges.revise(_true_range(high, low, self._previous_close))
+        self._last_close = close
+        self.value = self._ranges.mean()
+        return self.value
+
+
+class ADX(IncrementalIndicator):
+    def __init__(self, period=14):
+        self._plus_dm = RollingWindow(period)
+        self._minus_dm = RollingWindow(period)
+        self._ranges = RollingWindow(period)
+        self._dx = RollingWindow(period)
+        self._previous = (NAN, NAN, NAN)  # (high, low, close) before the latest candle
+        self._last = (NAN, NAN, NAN)
+        self.plus_di = NAN
+        self.minus_di = NAN
+        self.adx = NAN
+
+    def _terms(self, high, low, previous):
+        previous_high, previous_low, previous_close = previous
+        up, down = high - previous_high, low - previous_low
+        plus_dm = up if (up > down and up > 0) else 0.0
+        minus_dm = down if (down > plus_dm and down > 0) else 0.0
+        return plus_dm, minus_dm, _true_range(high, low, previous_close)
+
+    def _compute(self):
+        tr_sum = self._ranges.sum()
+        self.plus_di = 100 * _div(self._plus_dm.sum(), tr_sum)
+        self.minus_di = 100 * _div(self._minus_dm.sum(), tr_sum)
+        return 100 * _div(abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+
+    def append(self, high, low, close):
+        plus_dm, minus_dm, true_range = self._terms(high, low, self._last)
+        self._plus_dm.append(plus_dm)
+        self._minus_dm.append(minus_dm)
+        self._ranges.append(true_range)
+        self._previous, self._last = self._last, (high, low, close)
+        self._dx.append(self._compute())
+        self.adx = self._dx.mean()
+        return self.adx
+
+    def revise(self, high, low, close):
+        plus_dm, minus_dm, true_range = self._terms(high, low, self._previous)
+        self._plus_dm.revise(plus_dm)
+        self._minus_dm.revise(minus_dm)
+        self._ranges.revise(true_range)
+        self._last = (high, low, close)
+        self._dx.revise(self._compute())
+        self.adx = self._dx.mean()
+        return self.adx
+
+
+class IndicatorState:
+    """All incremental indicators of one symbol and interval, updated together"""
+
+    def __init__(self):
+        self.ema50 = EMA(50)
+        self.ema200 = EMA(200)
+        self.macd = MACD()
+        self.rsi = RSI()
+        self.stoch_rsi = StochRSI()
+        self.adx = ADX()
+        self.atr = ATR()
+        self._indicators = [self.ema50, self.ema200, self.macd, self.rsi, self.stoch_rsi, self.adx, self.atr]
+
+    def append(self, high, low, close):
+        for indicator in self._indicators:
+            indicator.append(high, low, close)
+
+    def revise(self, high, low, close):
+        for indicator in self._indicators:
+            indicator.revise(high, low, close)
+
+    def snapshot(self):
+        return {
+            "ema50": self.ema50.value, "ema200": self.ema200.value,
+            "macd": self.macd.macd, "macd_signal": self.macd.signal,
+            "rsi": self.rsi.value, "stoch_rsi": self.stoch_rsi.value,
+            "adx": self.adx.adx, "plus_di": self.adx.plus_di, "minus_di": self.adx.minus_di,
+            "atr": self.atr.value,
+        }
@@ -0,0 +1,176 @@
+"""Indicator plugins and the per-request execution planner.
+
+Every indicator is registered once, with the upstream inputs it reads
+(``df`` klines, ``ticker``, ``order_book``, ``sentiment``) and the
+``features.SERIES`` intermediates it uses:
+
+    REGISTRY.register("RSI", lambda ctx: rsi_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                      inputs=("df",), series=("rsi",))
+
+For the indicators a request selects, ``IndicatorRegistry.plan`` builds a DAG
+of inputs -> series -> indicators. The caller fetches ``plan.inputs`` once
+each (the sync and async apps do that their own way), then
+``ExecutionPlan.run`` computes every series once, before any indicator that
+reads it, and runs each node as soon as its dependencies are done, in
+parallel when given an executor. Verdicts come back in registration order,
+so adding an indicator is one ``register`` call.
+"""
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import metrics
+from features import SERIES
+
+
+class Indicator:
+    def __init__(self, name, verdict, inputs=(), series=()):
+        self.name = name
+        self.verdict = verdict  # verdict(context) -> {"verdict": "yes"/"no", "explanation": ...}
+        self.inputs = frozenset(inputs)
+        self.series = tuple(series)
+
+
+class IndicatorContext:
+    """What one run of the indicators reads: the fetched inputs, the request and its feature frame"""
+
+    def __init__(self, inputs, symbol, market_type, trade_type, features=None):
+        self.inputs = inputs
+        self.symbol = symbol
+        self.market_type = market_type
+        self.trade_type = trade_type
+        self.features = features
+
+    def __getitem__(self, name):
+        return self.inputs[name]
+
+
+class IndicatorRegistry:
+    def __init__(self, series=SERIES):
+        self.series = series
+        self._indicators = {}  # Registration order is display order
+
+    def register(self, name, verdict, inputs=(), series=()):
+        """Add an indicator; raises ValueError for a duplicate name or an unknown series"""
+        if name in self._indicators:
+            raise ValueError(f"Indicator already registered: {name}")
+        unknown = [s for s in series if s not in self.series]
+        if unknown:
+            raise ValueError(f"Unknown series for {name}: {unknown}. Choose from {list(self.series)}")
+        self._indicators[name] = Indicator(name, verdict, inputs, series)
+
+    def __contains__(self, name):
+        return name in self._indicators
+
+    def __len__(self):
+        return len(self._indicators)
+
+    def __getitem__(self, name):
+        return self._indicators[name]
+
+    def names(self):
+        return tuple(self._indicators)
+
+    def parse(self, value):
+        """Indicator names from a list or comma-separated string, case-insensitive, in display order.
+
+        None or empty selects every indicator. Raises ValueError for unknown names.
+        """
+        if not value:
+            return self.names()
+        names = value.split(",") if isinstance(value, str) else value
+        by_key = {name.lower(): name for name in self._indicators}
+        selected = set()
+        for name in names:
+            indicator = by_key.get(str(name).strip().lower())
+            if indicator is None:
+                raise ValueError(f'Unknown indicator: {name}. Choose from {list(self._indicators)}')
+            selected.add(indicator)
+        return tuple(name for name in self._indicators if name in selected)
+
+    def required_inputs(self, names=None):
+        """Names of the inputs read by ``names`` (every indicator by default)"""
+        return self.plan(names).inputs
+
+    def plan(self, names=None):
+        """The ``ExecutionPlan`` of ``names`` (every indicator by default)"""
+        names = self.names() if names is None else names
+        return ExecutionPlan([self._indicators[name] for name in names], self.series)
+
+
+class ExecutionPlan:
+    def __init__(self, indicators, series=SERIES):
+        self.indicators = {indicator.name: indicator for indicator in indicators}
+        self._series = series
+        self.inputs = frozenset().union(*(indicator.inputs for indicator in indicators))
+        # Series read by the plan, each after the ones it is computed from
+        self.series = self._closure(name for indicator in indicators for name in indicator.series)
+        if self.series:
+            self.inputs |= {"df"}
+
+    def _closure(self, names):
+        ordered = {}
+
+        def visit(name):
+            if name not in ordered:
+                for dependency in self._series[name][0]:
+                    visit(dependency)
+                ordered[name] = None
+
+        for name in names:
+            visit(name)
+        return tuple(ordered)
+
+    def ready(self, available, done=()):
+        """Indicators not in ``done`` whose inputs are all in ``available``"""
+        return [name for name, indicator in self.indicators.items()
+                if name not in done and indicator.inputs <= available.keys()]
+
+    def _compute_series(self, context, name):
+        with metrics.span(f"series.{name}"):
+            try:
+                self._series[name][1](context.features)
+            except Exception:
+                pass  # The indicators reading it report the error, as they did computing it themselves
+
+    def _run_indicator(self, context, name):
+        with metrics.span(f"indicator.{name}"):
+            return self.indicators[name].verdict(context)
+
+    def iter_run(self, context, executor=None, names=None):
+        """Yield ``(name, verdict)`` for ``names`` (default: all) as each finishes.
+
+        Without an executor nodes run one after the other in plan order;
+        with one every node whose dependencies are done is submitted at once.
+        """
+        names = list(self.indicators) if names is None else [name for name in self.indicators if name in names]
+        series = self._closure(name for indicator in names for name in self.indicators[indicator].series)
+        if executor is None:
+            for name in series:
+                self._compute_series(context, name)
+            for name in names:
+                yield name, self._run_indicator(context, name)
+            return
+
+        waiting = {("series", name): {("series", d) for d in self._series[name][0]} for name in series}
+        waiting.update({("indicator", name): {("series", s) for s in self.indicators[name].series} for name in names})
+        running = {}
+        while waiting or running:
+            for node in [node for node, dependencies in waiting.items() if not dependencies]:
+                del waiting[node]
+                kind, name = node
+                run = self._compute_series if kind == "series" else self._run_indicator
+                # Each node gets its own copy so its spans land in the caller's profile
+                running[executor.submit(contextvars.copy_context().run, run, context, name)] = node
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                for dependencies in waiting.values():
+                    dependencies.discard(node)
+                if node[0] == "indicator":
+                    yield node[1], future.result()
+
+    def run(self, context, executor=None):
+        """Every verdict of the plan, by name in registration order"""
+        verdicts = dict(self.iter_run(context, executor))
+        return {name: verdicts[name] for name in self.indicators}
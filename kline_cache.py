@@ -0,0 +1,112 @@
+"""In-process cache of parsed kline arrays.
+
+Entries are keyed by ``(market_type, symbol, interval)`` and hold one NumPy
+array per kline column. A repeat request only downloads candles from the last
+cached open time onwards (the last cached candle may still have been open),
+so a warm symbol costs a one or two candle download instead of the full
+window. Entries are evicted least-recently-used once the cache exceeds its
+memory budget.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+KLINE_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume", "close_time",
+    "quote_asset_volume", "trades", "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume", "ignore"
+]
+FLOAT_COLUMNS = {"open", "high", "low", "close", "volume",
+                 "quote_asset_volume", "taker_buy_base_asset_volume",
+                 "taker_buy_quote_asset_volume"}
+INT_COLUMNS = {"timestamp", "close_time", "trades"}
+
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class NoKlines(LookupError):
+    """Binance returned no candles, for a pair or timeframe it doesn't trade"""
+
+
+def parse_klines(raw):
+    """Parse a ``/klines`` JSON payload into one array per column"""
+    if not isinstance(raw, list):
+        raw = []  # Error payloads parse to an empty window
+    rows = np.array(raw, dtype=object).reshape(-1, len(KLINE_COLUMNS))
+
+    columns = {}
+    for i, name in enumerate(KLINE_COLUMNS):
+        if name in FLOAT_COLUMNS:
+            columns[name] = rows[:, i].astype(np.float64)
+        elif name in INT_COLUMNS:
+            columns[name] = rows[:, i].astype(np.int64)
+        else:
+            columns[name] = rows[:, i]
+    return columns
+
+
+def merge_klines(cached, fresh):
+    """Replace the overlapping tail of ``cached`` with ``fresh`` candles.
+
+    Returns None when ``fresh`` does not continue ``cached`` (a gap), in
+    which case the caller should refetch the whole window.
+    """
+    if len(fresh["timestamp"]) == 0:
+        return cached
+
+    first = fresh["timestamp"][0]
+    if len(cached["timestamp"]) == 0 or first > cached["timestamp"][-1]:
+        return None
+    keep = int(np.searchsorted(cached["timestamp"], first))
+    return {name: np.concatenate([cached[name][:keep], fresh[name]]) for name in KLINE_COLUMNS}
+
+
+def tail(columns, limit):
+    return {name: values[-limit:] for name, values in columns.items()}
+
+
+def to_frame(columns):
+    return pd.DataFrame({name: columns[name] for name in KLINE_COLUMNS})
+
+
+def _nbytes(columns):
+    return sum(values.nbytes for values in columns.values())
+
+
+class KlineCache:
+    """Thread-safe LRU of parsed kline windows bounded by total array size"""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            columns = self._entries.get(key)
+            if columns is not None:
+                self._entries.move_to_end(key)
+            return columns
+
+    def put(self, key, columns):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _nbytes(previous)
+            self._entries[key] = columns
+            self._bytes += _nbytes(columns)
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _nbytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
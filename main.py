@@ -1,22 +1,70 @@
-import requests
+import argparse
 import pandas as pd
 import numpy as np
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import os
+import time
+from urllib.parse import urlparse
+
+import encoders
+import http_client
+import metrics
+from config import FEAR_GREED_API_URL, binance_url
+from features import FeatureFrame, last
+from refresh import PeriodicRefresher
+from streaming import KlineStore, ReplaySource, StreamIngestor, WebsocketSource
+from volume_profile import volume_profile
+from order_book import DEPTH_LIMIT, OrderBookStore, parse_depth
+from market_snapshot import MarketSnapshot
+from history_store import HistoryStore
+from kline_cache import KLINE_COLUMNS, KlineCache, NoKlines, merge_klines, parse_klines, tail, to_frame
+from timeframes import base_interval, interval_to_ms, next_candle_open, resample_klines
+from response_cache import ResponseCache
+from symbol_registry import SymbolRegistry, UnknownSymbol
+from indicator_registry import IndicatorContext, IndicatorRegistry
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
 
-# Binance API configurations
-BINANCE_SPOT_URL = "https://api.binance.com/api/v3"
-BINANCE_FUTURES_URL = "https://fapi.binance.com/fapi/v1"
-BINANCE_PRICE_API_URL = "https://api.binance.com/api/v3/ticker/price"
-BINANCE_ORDER_BOOK_API_URL = "https://api.binance.com/api/v3/depth"
+# Upstream settings (endpoints live in config.py)
+FEAR_GREED_REFRESH_INTERVAL = 15 * 60  # The index itself only changes once a day
+FEAR_GREED_STALE_AFTER = 2 * 60 * 60
+FEAR_GREED_COLD_START_WAIT = 2  # Only applies until the first value has been fetched
+DEGRADED_DEPTH_LIMIT = 100  # Depth levels fetched when the upstream weight budget runs low
 WHALE_TRADE_THRESHOLD = 5  # Orders greater than 5 BTC/ETH/etc.
+VOLUME_PROFILE_BINS = 10
+
+KLINE_PAGE_LIMIT = 1000  # Most candles Binance returns per /klines call
+KLINE_CACHE = KlineCache()
+HISTORY = HistoryStore()  # Backfilled candles (history_store.py) warm a cold KLINE_CACHE
+
+MTF_CANDLES = 200  # Candles analyzed per timeframe in multi-timeframe mode
+MTF_MAX_BASE_CANDLES = 5000  # Cap on one base download; coarser timeframes get their own
+ANALYZE_CACHE = ResponseCache("analyze")  # /analyze results, kept until the candle closes
+SYMBOLS = SymbolRegistry()  # exchangeInfo for both markets, refreshed in the background
+MARKET = MarketSnapshot()  # All-symbol price and 24hr ticker tables
+OUTPUT_MODES = ("text", "structured")  # /analyze bodies: console report or compact data only
+STRUCTURED_VERDICT_FIELDS = ("verdict", "score", "confidence", "confidence_level", "indicator_count")
+SCAN_MAX_SYMBOLS = 300
+SCAN_MAX_WORKERS = 8  # Concurrent upstream calls per /scan batch
+
+# Optional in-memory kline feed, e.g. KLINE_STREAMS=btcusdt@kline_1h,btcusdt@trade
+# or KLINE_STREAM_REPLAY=feed.jsonl for a recorded one
+KLINE_STREAMS = os.environ.get("KLINE_STREAMS")
+KLINE_STREAM_REPLAY = os.environ.get("KLINE_STREAM_REPLAY")
+KLINE_STREAM_REPLAY_SPEED = float(os.environ.get("KLINE_STREAM_REPLAY_SPEED", 1))
+KLINE_STREAM_MARKET = os.environ.get("KLINE_STREAM_MARKET", "spot")
+KLINE_STREAM = KlineStore()
+ORDER_BOOKS = OrderBookStore()  # Local books of streamed @depth symbols
+
+# Shared pool for the independent upstream calls of one analysis
+UPSTREAM_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream")
+# Independent series and indicators of one analysis run side by side here
+INDICATOR_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="indicator")
 
 VALID_TIMEFRAMES = {
     "minutes": ["1m", "3m", "5m", "15m", "30m"],
@@ -25,6 +73,7 @@ VALID_TIMEFRAMES = {
     "weeks": ["1w"],
     "months": ["1M"]
 }
+VALID_INTERVALS = [interval for intervals in VALID_TIMEFRAMES.values() for interval in intervals]
 
 
 # ----------------------
@@ -33,35 +82,187 @@ VALID_TIMEFRAMES = {
 
 #Formatting Prices
 
+# Each upstream fetch is written once as a plan (see ``http_client.run``) that
+# yields request URLs and receives responses, so the sync app drives it with the
+# pooled session and the async app with the async client.
+
 def get_current_price(symbol, market_type):
-    base_url = BINANCE_FUTURES_URL if market_type == "futures" else BINANCE_SPOT_URL
-    url = f"{base_url}/ticker/price?symbol={symbol.upper()}"
-    response = requests.get(url).json()
-    return float(response["price"])
+    return http_client.run(current_price_plan(symbol, market_type))
+
+
+def current_price_plan(symbol, market_type):
+    streamed = KLINE_STREAM.last_price(market_type, symbol)
+    if streamed is not None:
+        return streamed
+    snapshot = MARKET.price(market_type, symbol)
+    if snapshot is not None:
+        metrics.CACHE_REQUESTS.inc("price_snapshot", "hit")
+        return snapshot
+
+    base_url = binance_url(market_type)
+    response = yield f"{base_url}/ticker/price?symbol={symbol.upper()}"
+    data = response.json()
+    if response.status_code == 400 and "Invalid symbol" in data.get("msg", ""):
+        raise UnknownSymbol(f"{symbol.upper()} is not listed on {market_type}")
+    return float(data["price"])
 
 
 def fetch_ohlc_data(symbol, interval, market_type, limit=200):
-    base_url = BINANCE_FUTURES_URL if market_type == "futures" else BINANCE_SPOT_URL
-    url = f"{base_url}/klines?symbol={symbol.upper()}&interval={interval}&limit={limit}"
-    response = requests.get(url).json()
+    return http_client.run(ohlc_plan(symbol, interval, market_type, limit))
+
+
+def ohlc_plan(symbol, interval, market_type, limit=200):
+    base_url = binance_url(market_type)
+    streamed = KLINE_STREAM.window(market_type, symbol, interval, limit)
+    if streamed is not None:
+        metrics.CACHE_REQUESTS.inc("kline_stream", "hit")
+        return to_frame(streamed)
+
+    key = (market_type, symbol.upper(), interval)
+    cached = KLINE_CACHE.get(key)
+    if cached is None or len(cached["timestamp"]) < limit:
+        stored = _stored_window(market_type, symbol, interval, limit)
+        if stored is not None:
+            metrics.CACHE_REQUESTS.inc("history", "hit")
+            cached = stored
+
+    columns = None
+    if cached is not None and len(cached["timestamp"]) >= limit:
+        # Only download from the last cached candle onwards, if it fits in one page
+        last_open = int(cached["timestamp"][-1])
+        if time.time() * 1000 - last_open < interval_to_ms(interval) * KLINE_PAGE_LIMIT:
+            url = (f"{base_url}/klines?symbol={symbol.upper()}&interval={interval}"
+                   f"&startTime={last_open}&limit={KLINE_PAGE_LIMIT}")
+            response = yield url
+            columns = merge_klines(cached, parse_klines(response.json()))
+            if columns is not None:
+                metrics.CACHE_REQUESTS.inc("klines", "partial")  # Only the candles since the last cached one
+
+    if columns is None:
+        metrics.CACHE_REQUESTS.inc("klines", "miss")
+        columns = yield from _download_klines(base_url, symbol, interval, limit)
+        if not len(columns["timestamp"]):
+            raise NoKlines('Invalid coin pair or timeframe. Please check your inputs.')
+
+    keep = max(limit, len(cached["timestamp"]) if cached is not None else 0)
+    KLINE_CACHE.put(key, tail(columns, keep))
+    if KLINE_STREAM.tracks(market_type, symbol, interval):
+        KLINE_STREAM.seed(market_type, symbol, interval, columns)
+
+    return to_frame(tail(columns, limit))
+
+
+def _stored_window(market_type, symbol, interval, limit):
+    """The last ``limit`` backfilled candles as ``KLINE_CACHE`` columns, or None when fewer are stored"""
+    columns = HISTORY.tail(market_type, symbol, interval, limit)
+    if columns is None or len(columns["timestamp"]) < limit:
+        return None
+    window = {name: np.array(values) for name, values in columns.items()}  # Off the memmap
+    window["ignore"] = np.full(limit, "0", dtype=object)
+    return window
+
+
+def _download_klines(base_url, symbol, interval, limit):
+    """Download the latest ``limit`` candles, paging backwards past the per-call cap"""
+    url = f"{base_url}/klines?symbol={symbol.upper()}&interval={interval}"
+    pages = []
+    end_time = None
+    while limit > 0:
+        page_limit = min(limit, KLINE_PAGE_LIMIT)
+        page_url = f"{url}&limit={page_limit}" + (f"&endTime={end_time}" if end_time is not None else "")
+        response = yield page_url
+        page = parse_klines(response.json())
+        pages.append(page)
+        if len(page["timestamp"]) < page_limit:
+            break  # Reached the start of the pair's history
+        limit -= page_limit
+        end_time = int(page["timestamp"][0]) - 1
+
+    if len(pages) == 1:
+        return pages[0]
+    return {name: np.concatenate([page[name] for page in reversed(pages)]) for name in KLINE_COLUMNS}
+
+
+def fetch_24hr_ticker(symbol, market_type):
+    return http_client.run(ticker_plan(symbol, market_type))
+
+
+def ticker_plan(symbol, market_type):
+    streamed = KLINE_STREAM.ticker(market_type, symbol)
+    if streamed is not None:
+        return streamed
+    snapshot = MARKET.ticker(market_type, symbol)
+    if snapshot is not None:
+        metrics.CACHE_REQUESTS.inc("ticker_snapshot", "hit")
+        return snapshot
+
+    api_url = binance_url(market_type)
+    response = yield f"{api_url}/ticker/24hr?symbol={symbol.upper()}"
+    return response.json()
+
+
+def fetch_fear_greed_index():
+    response = http_client.get_json(FEAR_GREED_API_URL)
+    return int(response["data"][0]["value"])
+
+
+FEAR_GREED = PeriodicRefresher(fetch_fear_greed_index, FEAR_GREED_REFRESH_INTERVAL, name="fear-greed")
+
+
+def current_fear_greed():
+    """Return the cached F&G index and its age in seconds without calling the upstream"""
+    index_value = FEAR_GREED.get(wait=FEAR_GREED_COLD_START_WAIT)
+    if index_value is None:
+        raise LookupError(f"F&G index unavailable ({FEAR_GREED.last_error or 'not loaded yet'})")
+    return index_value, FEAR_GREED.age()
+
+
+def fetch_order_book(symbol, market_type="spot", limit=DEPTH_LIMIT):
+    return http_client.run(order_book_plan(symbol, market_type, limit))
+
+
+def order_book_plan(symbol, market_type="spot", limit=DEPTH_LIMIT):
+    streamed = ORDER_BOOKS.depth(market_type, symbol, limit)
+    if streamed is not None:
+        metrics.CACHE_REQUESTS.inc("order_book_stream", "hit")
+        return streamed
+
+    base_url = binance_url(market_type)
+    if http_client.SCHEDULER.under_pressure(urlparse(base_url).netloc):
+        limit = min(limit, DEGRADED_DEPTH_LIMIT)  # A fifth of the weight while the budget is tight
+    response = yield f"{base_url}/depth?symbol={symbol.upper()}&limit={limit}"
+    depth = parse_depth(response.json())
+    if ORDER_BOOKS.tracks(market_type, symbol):
+        ORDER_BOOKS.seed(market_type, symbol, depth)
+    return depth
+
 
-    df = pd.DataFrame(response, columns=[
-        "timestamp", "open", "high", "low", "close", "volume", "close_time",
-        "quote_asset_volume", "trades", "taker_buy_base_asset_volume",
-        "taker_buy_quote_asset_volume", "ignore"
-    ])
+def _configured_stream_ingestor():
+    if KLINE_STREAM_REPLAY:
+        source = ReplaySource(KLINE_STREAM_REPLAY, KLINE_STREAM_REPLAY_SPEED)
+    elif KLINE_STREAMS:
+        source = WebsocketSource(KLINE_STREAMS.split(","), KLINE_STREAM_MARKET)
+    else:
+        return None
+    return StreamIngestor([KLINE_STREAM, ORDER_BOOKS], source, KLINE_STREAM_MARKET)
+
+
+STREAM_INGESTOR = _configured_stream_ingestor()
 
-    numeric_cols = ["open", "high", "low", "close", "volume",
-                    "quote_asset_volume", "taker_buy_base_asset_volume",
-                    "taker_buy_quote_asset_volume"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col])
 
-    return df
+def _unwrap(result):
+    """Re-raise a failure captured by the concurrent fetch stage"""
+    if isinstance(result, Exception):
+        raise result
+    return result
 
 
-def format_price(price):
-    """Improved price formatting with comprehensive error handling"""
+def format_price(price, precision=None):
+    """Improved price formatting with comprehensive error handling.
+
+    ``precision`` (e.g. ``SYMBOLS.price_decimals(...)``) prints the price at the
+    symbol's tick size instead of guessing the decimals from its magnitude.
+    """
     try:
         # Convert to float (handles strings, numpy types, etc.)
         price = float(price)
@@ -69,6 +270,9 @@ def format_price(price):
         # Handle zero and NaN cases
         if price == 0 or pd.isna(price):
             return "0.00"
+
+        if precision is not None:
+            return f"{price:.{precision}f}"
             
         abs_price = abs(price)
         
@@ -94,28 +298,14 @@ def format_price(price):
 
 
 # 1. ADX Indicator (Corrected)
-def adx_verdict(df, trade_type):
+def adx_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        df["+DM"] = df["high"].diff()
-        df["-DM"] = df["low"].diff()
-        df["+DM"] = df["+DM"].where((df["+DM"] > df["-DM"]) & (df["+DM"] > 0), 0)
-        df["-DM"] = df["-DM"].where((df["-DM"] > df["+DM"]) & (df["-DM"] > 0), 0)
-
-        tr1 = df["high"] - df["low"]
-        tr2 = abs(df["high"] - df["close"].shift(1))
-        tr3 = abs(df["low"] - df["close"].shift(1))
-        df["TR"] = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-        period = 14
-        df["+DI"] = 100 * (df["+DM"].rolling(period).sum() / df["TR"].rolling(period).sum())
-        df["-DI"] = 100 * (df["-DM"].rolling(period).sum() / df["TR"].rolling(period).sum())
-        df["DX"] = 100 * abs(df["+DI"] - df["-DI"]) / (df["+DI"] + df["-DI"])
-        df["ADX"] = df["DX"].rolling(period).mean()
-
-        latest_adx = float(df["ADX"].iloc[-1]) if not pd.isna(df["ADX"].iloc[-1]) else 0
-        latest_plus_di = float(df["+DI"].iloc[-1]) if not pd.isna(df["+DI"].iloc[-1]) else 0
-        latest_minus_di = float(df["-DI"].iloc[-1]) if not pd.isna(df["-DI"].iloc[-1]) else 0
+        features = features if features is not None else FeatureFrame(df)
+        plus_di, minus_di, adx = features.directional_index
+
+        latest_adx = last(adx, 0)
+        latest_plus_di = last(plus_di, 0)
+        latest_minus_di = last(minus_di, 0)
 
         verdict = "no"
         explanation = f"ADX: {format_price(latest_adx)} (Weak Trend)"
@@ -133,11 +323,11 @@ def adx_verdict(df, trade_type):
 
 
 # 2. EMA Indicator (Corrected)
-def ema_verdict(df, trade_type):
+def ema_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        short_ma = float(df["close"].ewm(span=50, adjust=False).mean().iloc[-1])
-        long_ma = float(df["close"].ewm(span=200, adjust=False).mean().iloc[-1])
+        features = features if features is not None else FeatureFrame(df)
+        short_ma = float(features.ema(50)[-1])
+        long_ma = float(features.ema(200)[-1])
 
         verdict = "no"
         explanation = f"EMA50: {format_price(short_ma)}, EMA200: {format_price(long_ma)}"
@@ -161,10 +351,11 @@ def ema_verdict(df, trade_type):
 
 
 # 3. Exchange Net Flow (Corrected)
-def netflow_verdict(symbol, market_type, trade_type):
+def netflow_verdict(symbol, market_type, trade_type, ticker=None):
     try:
-        api_url = BINANCE_FUTURES_URL if market_type == "futures" else BINANCE_SPOT_URL
-        response = requests.get(f"{api_url}/ticker/24hr?symbol={symbol.upper()}").json()
+        if ticker is None:
+            ticker = fetch_24hr_ticker(symbol, market_type)
+        response = _unwrap(ticker)
         quote_volume = float(response.get("quoteVolume", 0))
         asset_volume = float(response.get("volume", 0))
         netflow = asset_volume * 0.05  # Approximation
@@ -186,11 +377,11 @@ def netflow_verdict(symbol, market_type, trade_type):
 
 
 # 4. Market Sentiment (Corrected)
-def sentiment_verdict(trade_type):
+def sentiment_verdict(trade_type, index_value=None, age=None):
     try:
-        url = "https://api.alternative.me/fng/"
-        response = requests.get(url).json()
-        index_value = int(response["data"][0]["value"])
+        if index_value is None:
+            index_value, age = current_fear_greed()
+        index_value = _unwrap(index_value)
 
         verdict = "no"
         explanation = f"F&G Index: {index_value} - "
@@ -206,6 +397,9 @@ def sentiment_verdict(trade_type):
         else:
             explanation += "Neutral"
 
+        if age is not None and age > FEAR_GREED_STALE_AFTER:
+            explanation += f" (stale, updated {age / 3600:.0f}h ago)"
+
         return {"verdict": verdict, "explanation": explanation}
     except Exception as e:
         return {"verdict": "no", "explanation": f"Sentiment Error: {str(e)}"}
@@ -230,16 +424,11 @@ def miner_verdict():
 
 
 # 6. MACD (Corrected)
-def macd_verdict(df, trade_type):
+def macd_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        df["EMA12"] = df["close"].ewm(span=12, adjust=False).mean()
-        df["EMA26"] = df["close"].ewm(span=26, adjust=False).mean()
-        df["MACD"] = df["EMA12"] - df["EMA26"]
-        df["Signal_Line"] = df["MACD"].ewm(span=9, adjust=False).mean()
-
-        latest_macd = float(df["MACD"].iloc[-1]) if not pd.isna(df["MACD"].iloc[-1]) else 0
-        latest_signal = float(df["Signal_Line"].iloc[-1]) if not pd.isna(df["Signal_Line"].iloc[-1]) else 0
+        features = features if features is not None else FeatureFrame(df)
+        latest_macd = last(features.macd, 0)
+        latest_signal = last(features.macd_signal, 0)
 
         verdict = "no"
         explanation = f"MACD: {format_price(latest_macd)}, Signal: {format_price(latest_signal)}"
@@ -263,40 +452,32 @@ def macd_verdict(df, trade_type):
 
 
 # 7. Volume Profile (Corrected)
-def volume_profile_verdict(df, trade_type):
+def volume_profile_verdict(df, trade_type, features=None, num_bins=VOLUME_PROFILE_BINS,
+                           lookback=None, spread=False):
     try:
-        df = df.copy()
-        num_bins = 10
-        price_min, price_max = float(df["close"].min()), float(df["close"].max())
-        price_bins = np.linspace(price_min, price_max, num_bins + 1)
-
-        volume_profile = defaultdict(float)
-        for _, row in df.iterrows():
-            price = float(row["close"])
-            volume = float(row["volume"])
-            for i in range(num_bins):
-                if price_bins[i] <= price < price_bins[i + 1]:
-                    volume_profile[price_bins[i]] += volume
-                    break
-
-        max_volume = max(volume_profile.values()) if volume_profile else 0
-        strong_zones = {level: vol for level, vol in volume_profile.items() if vol >= max_volume * 0.7}
-        current_price = float(df["close"].iloc[-1]) if not pd.isna(df["close"].iloc[-1]) else 0
+        features = features if features is not None else FeatureFrame(df)
+        price_bins, bin_volumes, touched = volume_profile(
+            features.high, features.low, features.close, features.volume,
+            num_bins=num_bins, lookback=lookback, spread=spread
+        )
+
+        max_volume = bin_volumes[touched].max() if touched.any() else 0
+        strong_zones = price_bins[:-1][touched & (bin_volumes >= max_volume * 0.7)]
+        current_price = last(features.close, 0)
+        near_strong_zone = bool(np.any((strong_zones <= current_price) &
+                                       (current_price <= strong_zones + (price_bins[1] - price_bins[0]))))
 
         verdict = "no"
         explanation = f"Strong Zones: {len(strong_zones)} | Current Price: {format_price(current_price)}"
 
         if trade_type == "long":
-            near_strong_zone = any(level <= current_price <= level + (price_bins[1] - price_bins[0])
-                               for level in strong_zones)
             if near_strong_zone:
                 verdict = "yes"
                 explanation += " (Near support)"
             else:
                 explanation += " (No strong support)"
         else:  # short
-            near_weak_zone = not any(level <= current_price <= level + (price_bins[1] - price_bins[0])
-                                 for level in strong_zones)
+            near_weak_zone = not near_strong_zone
             if near_weak_zone:
                 verdict = "yes"
                 explanation += " (No strong resistance)"
@@ -309,17 +490,10 @@ def volume_profile_verdict(df, trade_type):
 
 
 # 8. RSI (Corrected)
-def rsi_verdict(df, trade_type):
+def rsi_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        period = 14
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        latest_rsi = float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50
+        features = features if features is not None else FeatureFrame(df)
+        latest_rsi = last(features.rsi, 50)
 
         verdict = "no"
         explanation = f"RSI: {format_price(latest_rsi)}"
@@ -341,12 +515,12 @@ def rsi_verdict(df, trade_type):
 
 
 # 9. Smart Money Concept (Corrected)
-def smc_verdict(df, trade_type):
+def smc_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        highs = [float(x) for x in df["high"].values[-5:]]
-        lows = [float(x) for x in df["low"].values[-5:]]
-        closes = [float(x) for x in df["close"].values[-5:]]
+        features = features if features is not None else FeatureFrame(df)
+        highs = features.high[-5:].tolist()
+        lows = features.low[-5:].tolist()
+        closes = features.close[-5:].tolist()
 
         # Break of Structure detection
         if highs[-1] > highs[-2] and lows[-1] > lows[-2]:
@@ -379,14 +553,15 @@ def smc_verdict(df, trade_type):
 
 
 # 10. Whale Activity (Corrected)
-def whale_verdict(symbol, trade_type):
+def whale_verdict(symbol, trade_type, order_book=None, market_type="spot"):
     try:
-        response = requests.get(f"{BINANCE_ORDER_BOOK_API_URL}?symbol={symbol.upper()}&limit=500").json()
-        bids = [(float(price), float(qty)) for price, qty in response.get("bids", [])]
-        asks = [(float(price), float(qty)) for price, qty in response.get("asks", [])]
+        if order_book is None:
+            order_book = fetch_order_book(symbol, market_type)
+        depth = _unwrap(order_book)
+        bid_qty, ask_qty = depth["bid_qty"], depth["ask_qty"]
 
-        large_buys = sum(qty for price, qty in bids if qty > WHALE_TRADE_THRESHOLD)
-        large_sells = sum(qty for price, qty in asks if qty > WHALE_TRADE_THRESHOLD)
+        large_buys = float(bid_qty[bid_qty > WHALE_TRADE_THRESHOLD].sum())
+        large_sells = float(ask_qty[ask_qty > WHALE_TRADE_THRESHOLD].sum())
 
         verdict = "no"
         explanation = f"Whale Buys: {format_price(large_buys)} | Whale Sells: {format_price(large_sells)}"
@@ -406,24 +581,10 @@ def whale_verdict(symbol, trade_type):
 
 
 # 11. Stochastic RSI (Corrected)
-def stoch_rsi_verdict(df, trade_type):
+def stoch_rsi_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
-        # Calculate RSI
-        period = 14
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        # Calculate Stochastic RSI
-        stoch_period = 14
-        stoch_rsi_min = rsi.rolling(stoch_period).min()
-        stoch_rsi_max = rsi.rolling(stoch_period).max()
-        stoch_rsi = 100 * (rsi - stoch_rsi_min) / (stoch_rsi_max - stoch_rsi_min)
-
-        latest_stoch_rsi = float(stoch_rsi.iloc[-1]) if not pd.isna(stoch_rsi.iloc[-1]) else 50
+        features = features if features is not None else FeatureFrame(df)
+        latest_stoch_rsi = last(features.stoch_rsi, 50)
 
         verdict = "no"
         explanation = f"StochRSI: {format_price(latest_stoch_rsi)}"
@@ -445,12 +606,12 @@ def stoch_rsi_verdict(df, trade_type):
 
 
 # 12. Support/Resistance (Corrected)
-def support_resistance_verdict(df, trade_type):
+def support_resistance_verdict(df, trade_type, features=None):
     try:
-        df = df.copy()
+        features = features if features is not None else FeatureFrame(df)
         # Get significant levels
-        highs = [float(x) for x in df["high"].values[-50:]]  # Last 50 periods
-        lows = [float(x) for x in df["low"].values[-50:]]
+        highs = features.high[-50:].tolist()  # Last 50 periods
+        lows = features.low[-50:].tolist()
 
         # Find key levels using clustering
         levels = []
@@ -467,7 +628,7 @@ def support_resistance_verdict(df, trade_type):
 
         # Sort and remove duplicates
         levels = sorted(list(set(levels)))
-        current_price = float(df["close"].iloc[-1]) if not pd.isna(df["close"].iloc[-1]) else 0
+        current_price = last(features.close, 0)
 
         # Find nearest levels
         supports = [l for l in levels if l < current_price]
@@ -502,21 +663,28 @@ def support_resistance_verdict(df, trade_type):
         return {"verdict": "no", "explanation": f"S/R Error: {str(e)}"}
 
 
+def reaches(final_verdict, level):
+    """True when the yes count reaches ``level`` out of 12, scaled to the indicators that ran"""
+    # Integer cross-multiplication keeps 12 of 12 indicators exactly on the original thresholds
+    return final_verdict["confidence_level"] * 12 >= level * final_verdict.get("indicator_count", 12)
+
+
 def get_final_verdict(verdicts):
     yes_indicators = [indicator for indicator, data in verdicts.items() if data["verdict"] == "yes"]
     no_indicators = [indicator for indicator, data in verdicts.items() if data["verdict"] == "no"]
     confidence_level = len(yes_indicators)
+    final_verdict = {"confidence_level": confidence_level, "indicator_count": len(verdicts)}
 
-    if confidence_level >= 9:
+    if reaches(final_verdict, 9):
         confidence = "✅ EXTREME CONFIDENCE"
         emoji = "🚀🚀🚀"
-    elif confidence_level >= 7:
+    elif reaches(final_verdict, 7):
         confidence = "👍 HIGH CONFIDENCE"
         emoji = "🚀🚀"
-    elif confidence_level >= 6:
+    elif reaches(final_verdict, 6):
         confidence = "🟢 SOLID"
         emoji = "🚀"
-    elif confidence_level >= 4:
+    elif reaches(final_verdict, 4):
         confidence = "⚠️ CAUTION"
         emoji = "⚠️"
     else:
@@ -524,26 +692,25 @@ def get_final_verdict(verdicts):
         emoji = "🛑"
 
     return {
-        "verdict": "yes" if confidence_level >= 6 else "no",
-        "score": f"{confidence_level}/12",
+        "verdict": "yes" if reaches(final_verdict, 6) else "no",
+        "score": f"{confidence_level}/{len(verdicts)}",
         "confidence": confidence,
         "emoji": emoji,
         "yes_indicators": yes_indicators,
         "no_indicators": no_indicators,
-        "confidence_level": confidence_level
+        **final_verdict
     }
 
 def get_trading_advice(final_verdict, trade_type):
     advice = ""
-    confidence_level = final_verdict["confidence_level"]
     
-    if confidence_level >= 9:
+    if reaches(final_verdict, 9):
         advice = f"  {final_verdict['emoji']} STRONG SIGNAL! Consider aggressive position sizing"
-    elif confidence_level >= 7:
+    elif reaches(final_verdict, 7):
         advice = f"  {final_verdict['emoji']} Good opportunity, standard position recommended"
-    elif confidence_level >= 6:
+    elif reaches(final_verdict, 6):
         advice = f"  {final_verdict['emoji']} Decent setup, consider smaller position"
-    elif confidence_level >= 4:
+    elif reaches(final_verdict, 4):
         advice = "  ⚠️ Marginal setup - wait for confirmation"
     else:
         advice = "  🚫 Avoid this trade - too many red flags"
@@ -552,14 +719,13 @@ def get_trading_advice(final_verdict, trade_type):
 
 def get_better_alternatives(final_verdict, trade_type):
     alternatives = []
-    confidence_level = final_verdict["confidence_level"]
     
-    if confidence_level >= 7:
+    if reaches(final_verdict, 7):
         if trade_type == "long":
             alternatives.append("Consider scaling in at key support levels")
         else:
             alternatives.append("Consider scaling in at key resistance levels")
-    elif confidence_level >= 4:
+    elif reaches(final_verdict, 4):
         alternatives.append("Wait for stronger confirmation signals")
         alternatives.append(f"Check lower timeframes for better {'long' if trade_type == 'long' else 'short'} entry")
     else:
@@ -576,8 +742,9 @@ def get_better_alternatives(final_verdict, trade_type):
 def get_quick_summary(results):
     """Generate a concise summary of the analysis results"""
     try:
+        precision = SYMBOLS.price_decimals(results.get('market_type'), results.get('symbol', ''))
         summary = (
-            f"• Current Price: ${format_price(results.get('current_price', 0))}\n"
+            f"• Current Price: ${format_price(results.get('current_price', 0), precision)}\n"
             f"• Timeframe: {results.get('timeframe', 'N/A')}\n"
             f"• Trade Type: {results.get('trade_type', '').upper()}\n"
             f"• Confidence Score: {results.get('final_verdict', {}).get('score', '0/12')} "
@@ -609,13 +776,13 @@ def display_final_verdict(final, trade_type):
 
     # Trading advice based on confidence level
     print("\n💡 PRO TRADER ADVICE:")
-    if final["confidence_level"] >= 9:
+    if reaches(final, 9):
         print(f"  {final['emoji']} STRONG SIGNAL! Consider aggressive position sizing")
-    elif final["confidence_level"] >= 7:
+    elif reaches(final, 7):
         print(f"  {final['emoji']} Good opportunity, standard position recommended")
-    elif final["confidence_level"] >= 6:
+    elif reaches(final, 6):
         print(f"  {final['emoji']} Decent setup, consider smaller position")
-    elif final["confidence_level"] >= 4:
+    elif reaches(final, 4):
         print(f"  ⚠️ Marginal setup - wait for confirmation")
     else:
         print(f"  🚫 Avoid this trade - too many red flags")
@@ -651,32 +818,32 @@ def display_indicator_results(verdicts, symbol, current_price, timeframe):
         return "\n".join(output)
     except Exception as e:
         return f"Error displaying results: {str(e)}"
-def check_coin_availability(symbol, market_type):
-    """Check if trading data exists for the given symbol"""
-    try:
-        base_url = BINANCE_FUTURES_URL if market_type == "futures" else BINANCE_SPOT_URL
-        url = f"{base_url}/ticker/price?symbol={symbol.upper()}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            return True
-        elif response.status_code == 400:
-            error_msg = response.json().get('msg', '')
-            if "Invalid symbol" in error_msg:
-                return False
-        return False
-    except Exception:
-        return False
-
-def calculate_target_prices(df, current_price, trade_type):
+
+
+def symbol_listed(symbol, market_type):
+    """The local answer to "is this symbol trading?", or None when only the price call can tell"""
+    listed = SYMBOLS.listed(market_type, symbol)
+    if listed is None and KLINE_STREAM.last_price(market_type, symbol) is not None:
+        return True
+    return listed
+
+
+def symbol_available(listed, inputs):
+    """Availability from the registry, else from the price call once it has answered (None until then)"""
+    if listed is not None or "price" not in inputs:
+        return listed
+    return not isinstance(inputs["price"], UnknownSymbol)
+
+def calculate_target_prices(df, current_price, trade_type, features=None):
     """Calculate target prices based on technical levels"""
     targets = {}
+    features = features if features is not None else FeatureFrame(df)
     
     # Calculate recent volatility (ATR)
-    atr = calculate_atr(df)
+    atr = calculate_atr(df, features=features)
     
     # Support/Resistance levels
-    support, resistance = calculate_support_resistance(df)
+    support, resistance = calculate_support_resistance(df, features=features)
     
     if trade_type == "long":
         # Conservative target (1x ATR)
@@ -699,20 +866,423 @@ def calculate_target_prices(df, current_price, trade_type):
     
     return targets
 
-def calculate_atr(df, period=14):
+def calculate_atr(df, period=14, features=None):
     """Calculate Average True Range"""
-    high_low = df['high'] - df['low']
-    high_close = abs(df['high'] - df['close'].shift())
-    low_close = abs(df['low'] - df['close'].shift())
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(period).mean().iloc[-1]
+    features = features if features is not None else FeatureFrame(df)
+    return features.atr(period)[-1]
 
-def calculate_support_resistance(df, lookback=50):
+def calculate_support_resistance(df, lookback=50, features=None):
     """Identify key support and resistance levels"""
-    recent_data = df.iloc[-lookback:]
-    support = recent_data['low'].min()
-    resistance = recent_data['high'].max()
-    return support, resistance
+    features = features if features is not None else FeatureFrame(df)
+    return features.lowest(lookback), features.highest(lookback)
+
+# ----------------------
+# Analysis Pipeline
+# ----------------------
+
+# Every indicator, in display order, with the inputs and shared series it reads
+REGISTRY = IndicatorRegistry()
+REGISTRY.register("ADX", lambda ctx: adx_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",), series=("directional_index",))
+REGISTRY.register("EMA", lambda ctx: ema_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",), series=("ema_50", "ema_200"))
+REGISTRY.register("Exchange Net Flow",
+                  lambda ctx: netflow_verdict(ctx.symbol, ctx.market_type, ctx.trade_type, ticker=ctx["ticker"]),
+                  inputs=("ticker",))
+REGISTRY.register("Market Sentiment",
+                  lambda ctx: sentiment_verdict(ctx.trade_type, index_value=ctx["sentiment"], age=ctx["sentiment_age"]),
+                  inputs=("sentiment",))
+REGISTRY.register("Miner Activity", lambda ctx: miner_verdict())
+REGISTRY.register("MACD", lambda ctx: macd_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",), series=("macd", "macd_signal"))
+REGISTRY.register("Volume Profile", lambda ctx: volume_profile_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",))
+REGISTRY.register("RSI", lambda ctx: rsi_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",), series=("rsi",))
+REGISTRY.register("Smart Money", lambda ctx: smc_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",))
+REGISTRY.register("Whale Activity",
+                  lambda ctx: whale_verdict(ctx.symbol, ctx.trade_type, order_book=ctx["order_book"],
+                                            market_type=ctx.market_type),
+                  inputs=("order_book",))
+REGISTRY.register("Stochastic RSI", lambda ctx: stoch_rsi_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",), series=("stoch_rsi",))
+REGISTRY.register("Support/Resistance", lambda ctx: support_resistance_verdict(ctx["df"], ctx.trade_type, ctx.features),
+                  inputs=("df",))
+
+
+def fetch_market_inputs(symbol, interval, market_type, limit=200, indicators=None):
+    """Start every independent upstream call ``indicators`` need at once and collect the results.
+
+    Failures are stored in place of the value so each consumer can report
+    its own error, exactly as when it fetched the data itself.
+    """
+    if STREAM_INGESTOR is not None:
+        STREAM_INGESTOR.start()
+
+    # Unlisted symbols are turned away before any upstream call
+    listed = symbol_listed(symbol, market_type)
+    if listed is False:
+        return {"available": False}
+
+    futures = {
+        name: metrics.submit(UPSTREAM_EXECUTOR, INPUT_STAGES[name], http_client.run, plan)
+        for name, plan in market_input_plans(symbol, interval, market_type, limit, indicators).items()
+    }
+
+    inputs = sentiment_inputs() if "sentiment" in REGISTRY.required_inputs(indicators) else {}
+    inputs.update(collect_results(futures))
+    inputs["available"] = symbol_available(listed, inputs)
+    return inputs
+
+
+INPUT_STAGES = {
+    "price": "upstream.price",
+    "df": "upstream.klines",
+    "ticker": "upstream.ticker",
+    "order_book": "upstream.order_book",
+}
+
+
+def market_input_plans(symbol, interval, market_type, limit=200, indicators=None):
+    """Fetch plans of the per-request upstream inputs, by input name.
+
+    Price and klines are always fetched for the targets (the price call also
+    settles availability when ``SYMBOLS`` can't); the 24hr ticker and depth
+    only when one of ``indicators`` reads them.
+    """
+    plans = {
+        "price": current_price_plan(symbol, market_type),
+        "df": ohlc_plan(symbol, interval, market_type, limit),
+    }
+    needed = REGISTRY.required_inputs(indicators)
+    if "ticker" in needed:
+        plans["ticker"] = ticker_plan(symbol, market_type)
+    if "order_book" in needed:
+        plans["order_book"] = order_book_plan(symbol, market_type)
+    return plans
+
+
+def sentiment_inputs():
+    """F&G inputs served from the background-refreshed cache, never a round trip"""
+    try:
+        with metrics.span("upstream.sentiment"):
+            index_value, age = current_fear_greed()
+    except Exception as e:
+        index_value, age = e, None
+    return {"sentiment": index_value, "sentiment_age": age}
+
+
+def collect_results(futures):
+    """Wait for a dict of futures, storing failures in place of their values"""
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def run_indicators(inputs, symbol, market_type, trade_type, features=None, indicators=None, executor=None):
+    """Run ``indicators`` (every registered one by default) against pre-fetched inputs and one shared feature frame.
+
+    Shared series are computed once before the indicators that read them;
+    with an ``executor`` independent nodes run in parallel.
+    """
+    df = _unwrap(inputs["df"])
+    features = features if features is not None else FeatureFrame(df)
+    context = IndicatorContext(dict(inputs, df=df), symbol, market_type, trade_type, features)
+    return REGISTRY.plan(indicators).run(context, executor)
+
+
+def parse_analyze_params(params):
+    """Validate an ``/analyze`` body into ``(symbol, interval, market_type, trade_type, indicators)``.
+
+    Raises ValueError with a message for the client.
+    """
+    required_fields = ['market_type', 'symbol', 'trade_type', 'time_unit', 'time_value']
+    for field in required_fields:
+        if field not in params:
+            raise ValueError(f'Missing required field: {field}')
+
+    interval = f"{params['time_value']}{params['time_unit'][0]}"
+    if interval not in VALID_INTERVALS:
+        raise ValueError(f'Invalid timeframe: {interval}. Choose from {VALID_INTERVALS}')
+    indicators = REGISTRY.parse(params.get('indicators'))
+    return params['symbol'].upper(), interval, params['market_type'], params['trade_type'], indicators
+
+
+def analyze_cache_key(symbol, interval, market_type, trade_type, indicators, output="text"):
+    """``ANALYZE_CACHE`` key shared by ``/analyze``, ``/analyze/stream`` and the async app"""
+    return market_type, symbol, interval, trade_type, indicators, output
+
+
+def parse_output_mode(value):
+    """``output`` of an ``/analyze`` request, "text" unless given; raises ValueError"""
+    output = value or "text"
+    if output not in OUTPUT_MODES:
+        raise ValueError(f'Invalid output: {output}. Choose from {list(OUTPUT_MODES)}')
+    return output
+
+
+def analyze_symbol(symbol, interval, market_type, trade_type, indicators=None, output="text"):
+    """Full single-timeframe analysis as returned by ``/analyze``"""
+    inputs = fetch_market_inputs(symbol, interval, market_type, indicators=indicators)
+    return build_analysis(inputs, symbol, interval, market_type, trade_type, indicators, output)
+
+
+def build_analysis(inputs, symbol, interval, market_type, trade_type, indicators=None, output="text"):
+    """The CPU-bound part of ``analyze_symbol``, from already fetched inputs"""
+    # Check if coin exists
+    if inputs['available'] is not True:
+        raise LookupError('Invalid coin pair. Please check the symbol and market type.')
+
+    current_price = _unwrap(inputs['price'])
+    df = _unwrap(inputs['df'])
+    features = FeatureFrame(df)
+
+    # Calculate price targets
+    with metrics.span("targets"):
+        targets = calculate_target_prices(df, current_price, trade_type, features)
+
+    # Run the selected indicator analyses
+    verdicts = run_indicators(inputs, symbol, market_type, trade_type, features, indicators, INDICATOR_EXECUTOR)
+    if output == "structured":
+        return structured_payload(symbol, interval, market_type, trade_type, current_price, verdicts, targets)
+    return analysis_payload(symbol, interval, market_type, trade_type, current_price, verdicts, targets)
+
+
+def structured_payload(symbol, interval, market_type, trade_type, current_price, verdicts, targets):
+    """The ``output=structured`` body: every value once and no console report"""
+    final_verdict = get_final_verdict(verdicts)
+    return {
+        'symbol': symbol,
+        'market_type': market_type,
+        'trade_type': trade_type,
+        'timeframe': interval,
+        'price': current_price,
+        'indicators': verdicts,
+        # yes/no lists and the emoji are derivable from the indicators and the level
+        'final_verdict': {key: final_verdict[key] for key in STRUCTURED_VERDICT_FIELDS},
+        'targets': targets
+    }
+
+
+def analysis_payload(symbol, interval, market_type, trade_type, current_price, verdicts, targets):
+    """The ``/analyze`` response body for computed verdicts and targets"""
+    # Get final verdict
+    final_verdict = get_final_verdict(verdicts)
+
+    # Prepare complete results
+    results = {
+        'symbol': symbol,
+        'market_type': market_type,
+        'trade_type': trade_type,
+        'timeframe': interval,
+        'current_price': current_price,
+        'verdicts': verdicts,
+        'final_verdict': final_verdict,
+        'structured_data': {
+            'indicators': verdicts,
+            'final_verdict': final_verdict,
+            'price': current_price,
+            'targets': targets
+        }
+    }
+
+    with metrics.span("format"):
+        console_output = format_console_output(results)
+
+    return {
+        'console_output': console_output,
+        'structured_data': results['structured_data']
+    }
+
+
+def stream_analysis(symbol, interval, market_type, trade_type, indicators=None):
+    """Yield ``(event, data)`` pairs while analyzing: each verdict as soon as its input arrives.
+
+    Events are ``verdict`` (name, verdict, explanation) in arrival order, then one
+    ``final`` with the ``/analyze`` response body, or one ``error``.
+    """
+    if STREAM_INGESTOR is not None:
+        STREAM_INGESTOR.start()
+
+    listed = symbol_listed(symbol, market_type)
+    if listed is False:
+        yield "error", {'error': 'Invalid coin pair. Please check the symbol and market type.'}
+        return
+
+    futures = {
+        metrics.submit(UPSTREAM_EXECUTOR, INPUT_STAGES[name], http_client.run, plan): name
+        for name, plan in market_input_plans(symbol, interval, market_type, indicators=indicators).items()
+    }
+    plan = REGISTRY.plan(indicators)
+    inputs = sentiment_inputs() if "sentiment" in plan.inputs else {}
+    features = None
+    verdicts = {}
+
+    try:
+        for future in as_completed(futures):
+            name = futures[future]
+            inputs.update(collect_results({name: future}))
+            available = symbol_available(listed, inputs)
+            if available is None:
+                continue  # Nothing is shown for a pair that may not exist
+            if available is not True:
+                yield "error", {'error': 'Invalid coin pair. Please check the symbol and market type.'}
+                return
+            if features is None and "df" in inputs:
+                features = FeatureFrame(_unwrap(inputs["df"]))
+
+            context = IndicatorContext(inputs, symbol, market_type, trade_type, features)
+            ready = plan.ready(inputs, done=verdicts)
+            for indicator, verdict in plan.iter_run(context, INDICATOR_EXECUTOR, names=ready):
+                verdicts[indicator] = verdict
+                yield "verdict", dict(verdict, name=indicator)
+
+        current_price = _unwrap(inputs["price"])
+        with metrics.span("targets"):
+            targets = calculate_target_prices(inputs["df"], current_price, trade_type, features)
+        ordered = {indicator: verdicts[indicator] for indicator in plan.indicators}
+        yield "final", analysis_payload(symbol, interval, market_type, trade_type, current_price, ordered, targets)
+    except Exception as e:
+        yield "error", {'error': str(e)}
+
+
+def analysis_events(payload):
+    """Replay a finished ``/analyze`` body as the events ``stream_analysis`` would emit"""
+    for name, verdict in payload['structured_data']['indicators'].items():
+        yield "verdict", dict(verdict, name=name)
+    yield "final", payload
+
+
+def _mtf_limit(base, intervals):
+    ratio = max(interval_to_ms(interval) // interval_to_ms(base) for interval in intervals)
+    # One extra coarse candle of history covers the partial bucket dropped by resampling
+    return MTF_CANDLES * ratio + ratio
+
+
+def mtf_download_groups(intervals):
+    """Group ``intervals`` into ``[(base, intervals), ...]``, one kline download each, finest base first.
+
+    Each group is resampled from a single download of its base. A timeframe
+    joins a group only while its ``MTF_CANDLES`` fit in
+    ``MTF_MAX_BASE_CANDLES`` base candles, so ``1m`` next to ``1d`` becomes
+    two downloads rather than a daily analysis on a few candles.
+    """
+    groups = []
+    for interval in sorted(intervals, key=interval_to_ms):
+        for i, (_, members) in enumerate(groups):
+            base = base_interval(members + [interval], VALID_INTERVALS)
+            if _mtf_limit(base, members + [interval]) <= MTF_MAX_BASE_CANDLES:
+                groups[i] = (base, members + [interval])
+                break
+        else:
+            groups.append((interval, [interval]))
+    return groups
+
+
+def analyze_timeframes(symbol, intervals, market_type, trade_type):
+    """Analyze several timeframes from as few kline downloads as possible.
+
+    The finest interval a group of requested timeframes can be built from is
+    fetched once with enough history for ``MTF_CANDLES`` of the group's
+    coarsest timeframe, then resampled locally (see ``mtf_download_groups``).
+    Price, ticker, depth and sentiment are shared by every timeframe. Raises
+    LookupError for unlisted symbols.
+    """
+    (base, members), *others = mtf_download_groups(intervals)
+    other_futures = {
+        other_base: metrics.submit(UPSTREAM_EXECUTOR, "upstream.klines", fetch_ohlc_data, symbol, other_base,
+                                   market_type, _mtf_limit(other_base, other_members))
+        for other_base, other_members in others
+    }
+    inputs = fetch_market_inputs(symbol, base, market_type, _mtf_limit(base, members))
+    base_dfs = collect_results(other_futures)
+    if inputs['available'] is not True:
+        raise LookupError('Invalid coin pair. Please check the symbol and market type.')
+    current_price = _unwrap(inputs['price'])
+    base_dfs[base] = inputs['df']
+    source = {interval: group_base for group_base, group in [(base, members), *others] for interval in group}
+
+    analysis = {'base_interval': base, 'price': current_price, 'timeframes': {}}
+    for interval in intervals:
+        base_df = _unwrap(base_dfs[source[interval]])
+        if interval != source[interval]:
+            base_df = resample_klines(base_df, interval)
+        df = base_df.tail(MTF_CANDLES)
+        features = FeatureFrame(df)
+        verdicts = run_indicators(dict(inputs, df=df), symbol, market_type, trade_type, features)
+        analysis['timeframes'][interval] = {
+            'candles': len(df),
+            'base_interval': source[interval],
+            'verdicts': verdicts,
+            'final_verdict': get_final_verdict(verdicts),
+            'targets': calculate_target_prices(df, current_price, trade_type, features)
+        }
+    return analysis
+
+
+def scan_symbols(symbols, intervals, market_type, trade_types):
+    """Analyze every symbol x interval x trade type combination in one batch.
+
+    Symbols are checked against the local registry, sentiment is read once for
+    the whole batch and the per-symbol inputs (price, 24hr ticker, depth) once
+    per symbol, however many intervals are requested; prices and tickers come
+    from the ``MARKET`` tables once they are loaded. Upstream calls share a
+    bounded worker pool.
+    Returns ``(rows, errors)`` with rows ranked by confidence, best first.
+    """
+    shared = sentiment_inputs()
+    rows, errors = [], []
+
+    with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS, thread_name_prefix="scan") as executor:
+        symbol_futures = {}
+        kline_futures = {}
+        for symbol in symbols:
+            if symbol_listed(symbol, market_type) is False:
+                errors.append({'symbol': symbol, 'error': 'Invalid coin pair'})
+                continue
+            symbol_futures[symbol] = {
+                "price": executor.submit(get_current_price, symbol, market_type),
+                "ticker": executor.submit(fetch_24hr_ticker, symbol, market_type),
+                "order_book": executor.submit(fetch_order_book, symbol, market_type),
+            }
+            for interval in intervals:
+                kline_futures[(symbol, interval)] = executor.submit(fetch_ohlc_data, symbol, interval, market_type)
+
+        symbol_inputs = {}
+        for (symbol, interval), future in kline_futures.items():
+            if symbol not in symbol_inputs:
+                symbol_inputs[symbol] = collect_results(symbol_futures[symbol])
+            inputs = dict(shared, **symbol_inputs[symbol], df=collect_results({"df": future})["df"])
+
+            try:
+                current_price = _unwrap(inputs["price"])
+                df = _unwrap(inputs["df"])
+                features = FeatureFrame(df)
+                for trade_type in trade_types:
+                    verdicts = run_indicators(inputs, symbol, market_type, trade_type, features)
+                    final_verdict = get_final_verdict(verdicts)
+                    rows.append({
+                        'symbol': symbol,
+                        'timeframe': interval,
+                        'trade_type': trade_type,
+                        'price': current_price,
+                        'score': final_verdict['score'],
+                        'confidence_level': final_verdict['confidence_level'],
+                        'confidence': final_verdict['confidence'],
+                        'verdict': final_verdict['verdict'],
+                        'yes_indicators': final_verdict['yes_indicators'],
+                        'targets': calculate_target_prices(df, current_price, trade_type, features)
+                    })
+            except Exception as e:
+                errors.append({'symbol': symbol, 'timeframe': interval, 'error': str(e)})
+
+    rows.sort(key=lambda row: row['confidence_level'], reverse=True)
+    return rows, errors
 
 # ----------------------
 # Results Formatting Functions
@@ -722,10 +1292,11 @@ def format_console_output(results):
     """Convert analysis results to beautiful console-style text with proper formatting"""
     try:
         output = []
+        precision = SYMBOLS.price_decimals(results.get('market_type'), results.get('symbol', ''))
         
         # 1. Header with price info
         output.append(f"\n📈 {results.get('symbol', '')} Analysis Results 📉")
-        output.append(f"💰 Current Price: ${format_price(results.get('current_price', 0))} | "
+        output.append(f"💰 Current Price: ${format_price(results.get('current_price', 0), precision)} | "
                     f"⏳ Timeframe: {results.get('timeframe', 'N/A')}\n")
 
         # 2. Indicator results with icons
@@ -770,41 +1341,41 @@ def format_console_output(results):
             targets = results['structured_data']['targets']
             current_price = float(results.get('current_price', 0))
             output.append("\n🎯 PRICE TARGETS:")
-            output.append(f"• Current Price: ${format_price(current_price)}")
+            output.append(f"• Current Price: ${format_price(current_price, precision)}")
             
             if results.get('trade_type') == 'long':
                 output.append(
-                    f"➤ Conservative: ${format_price(targets.get('conservative', 0))} "
-                    f"(+{format_price(targets.get('conservative', 0) - current_price)})"
+                    f"➤ Conservative: ${format_price(targets.get('conservative', 0), precision)} "
+                    f"(+{format_price(targets.get('conservative', 0) - current_price, precision)})"
                 )
                 output.append(
-                    f"➤ Moderate: ${format_price(targets.get('moderate', 0))} "
-                    f"(+{format_price(targets.get('moderate', 0) - current_price)})"
+                    f"➤ Moderate: ${format_price(targets.get('moderate', 0), precision)} "
+                    f"(+{format_price(targets.get('moderate', 0) - current_price, precision)})"
                 )
                 output.append(
-                    f"➤ Aggressive: ${format_price(targets.get('aggressive', 0))} "
-                    f"(+{format_price(targets.get('aggressive', 0) - current_price)})"
+                    f"➤ Aggressive: ${format_price(targets.get('aggressive', 0), precision)} "
+                    f"(+{format_price(targets.get('aggressive', 0) - current_price, precision)})"
                 )
                 output.append(
-                    f"⛔ Stop Loss: ${format_price(targets.get('stop_loss', 0))} "
-                    f"(-{format_price(current_price - targets.get('stop_loss', 0))})"
+                    f"⛔ Stop Loss: ${format_price(targets.get('stop_loss', 0), precision)} "
+                    f"(-{format_price(current_price - targets.get('stop_loss', 0), precision)})"
                 )
             else:
                 output.append(
-                    f"➤ Conservative: ${format_price(targets.get('conservative', 0))} "
-                    f"(-{format_price(current_price - targets.get('conservative', 0))})"
+                    f"➤ Conservative: ${format_price(targets.get('conservative', 0), precision)} "
+                    f"(-{format_price(current_price - targets.get('conservative', 0), precision)})"
                 )
                 output.append(
-                    f"➤ Moderate: ${format_price(targets.get('moderate', 0))} "
-                    f"(-{format_price(current_price - targets.get('moderate', 0))})"
+                    f"➤ Moderate: ${format_price(targets.get('moderate', 0), precision)} "
+                    f"(-{format_price(current_price - targets.get('moderate', 0), precision)})"
                 )
                 output.append(
-                    f"➤ Aggressive: ${format_price(targets.get('aggressive', 0))} "
-                    f"(-{format_price(current_price - targets.get('aggressive', 0))})"
+                    f"➤ Aggressive: ${format_price(targets.get('aggressive', 0), precision)} "
+                    f"(-{format_price(current_price - targets.get('aggressive', 0), precision)})"
                 )
                 output.append(
-                    f"⛔ Stop Loss: ${format_price(targets.get('stop_loss', 0))} "
-                    f"(+{format_price(targets.get('stop_loss', 0) - current_price)})"
+                    f"⛔ Stop Loss: ${format_price(targets.get('stop_loss', 0), precision)} "
+                    f"(+{format_price(targets.get('stop_loss', 0) - current_price, precision)})"
                 )
 
         # 7. Quick summary
@@ -830,84 +1401,217 @@ def format_console_output(results):
 # API Endpoint
 # ----------------------
 
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by endpoint, method and status",
+                                ["endpoint", "method", "status"])
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_seconds", "HTTP request latency by endpoint", ["endpoint"])
+
+
+_background_pid = None
+
+
+def start_background():
+    """Start this process's symbol and market refreshers, once per process (so again after a fork)"""
+    global _background_pid
+    if _background_pid != os.getpid():
+        _background_pid = os.getpid()
+        SYMBOLS.start()
+        MARKET.start()
+
+
+@app.before_request
+def start_background_refreshers():
+    # WSGI servers such as gunicorn have no startup hook, so each worker's first request starts them
+    start_background()
+
+
+@app.before_request
+def start_request_metrics():
+    g.profile_token = metrics.start_profile()
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - metrics.current_profile().started, endpoint)
+    return response
+
+
+@app.teardown_request
+def end_request_metrics(error=None):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        metrics.end_profile(token)
+
+
+@app.route('/metrics', methods=['GET'])
+def api_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/analyze', methods=['POST'])
 def api_analyze():
+    try:
+        with metrics.span("validate"):
+            try:
+                symbol, interval, market_type, trade_type, indicators = parse_analyze_params(request.json)
+                output = parse_output_mode(request.args.get('output') or request.json.get('output'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        # Identical requests share one computation and its result until the candle closes
+        try:
+            response, outcome = ANALYZE_CACHE.get_or_compute(
+                analyze_cache_key(symbol, interval, market_type, trade_type, indicators, output),
+                lambda: analyze_symbol(symbol, interval, market_type, trade_type, indicators, output),
+                expires_at=next_candle_open(interval, int(time.time() * 1000)) / 1000
+            )
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if request.args.get('profile') == '1':
+            response = dict(response, profile=metrics.current_profile().as_dict())
+        if output == "structured":
+            mimetype = encoders.negotiate(request.headers.get('Accept'))
+            with metrics.span("encode"):
+                response = Response(encoders.encode(response, mimetype), mimetype=mimetype)
+        else:
+            response = jsonify(response)
+        response.headers['X-Cache'] = outcome.upper()
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/stream', methods=['GET', 'POST'])
+def api_analyze_stream():
+    """``/analyze`` as server-sent events: one ``verdict`` per indicator, then ``final``"""
+    try:
+        symbol, interval, market_type, trade_type, indicators = parse_analyze_params(
+            request.json if request.method == 'POST' else request.args
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # The stream emits the text body, so it shares entries with plain /analyze
+    key = analyze_cache_key(symbol, interval, market_type, trade_type, indicators)
+    cached = ANALYZE_CACHE.get(key)
+
+    def events():
+        if cached is not None:
+            stream = analysis_events(cached)
+        else:
+            stream = stream_analysis(symbol, interval, market_type, trade_type, indicators)
+        for event, data in stream:
+            if event == "final" and cached is None:
+                ANALYZE_CACHE.put(key, data, expires_at=next_candle_open(interval, int(time.time() * 1000)) / 1000)
+            yield f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep nginx from holding events back
+    response.headers['X-Cache'] = 'MISS' if cached is None else 'HIT'
+    return response
+
+
+@app.route('/analyze/mtf', methods=['POST'])
+def api_analyze_mtf():
     try:
         params = request.json
 
-        # Validate inputs
-        required_fields = ['market_type', 'symbol', 'trade_type', 'time_unit', 'time_value']
-        for field in required_fields:
+        for field in ['market_type', 'symbol', 'trade_type', 'timeframes']:
             if field not in params:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
 
-        # Check if coin exists
-        if not check_coin_availability(params['symbol'], params['market_type']):
-            return jsonify({'error': 'Invalid coin pair. Please check the symbol and market type.'}), 400
-
-        # Get current price
-        current_price = get_current_price(params['symbol'], params['market_type'])
-        
-        # Fetch OHLC data
-        df = fetch_ohlc_data(
-            params['symbol'],
-            f"{params['time_value']}{params['time_unit'][0]}",
-            params['market_type']
-        )
-
-        # Calculate price targets
-        targets = calculate_target_prices(df, current_price, params['trade_type'])
-
-        # Run all indicator analyses
-        verdicts = {
-            "ADX": adx_verdict(df.copy(), params['trade_type']),
-            "EMA": ema_verdict(df.copy(), params['trade_type']),
-            "Exchange Net Flow": netflow_verdict(params['symbol'], params['market_type'], params['trade_type']),
-            "Market Sentiment": sentiment_verdict(params['trade_type']),
-            "Miner Activity": miner_verdict(),
-            "MACD": macd_verdict(df.copy(), params['trade_type']),
-            "Volume Profile": volume_profile_verdict(df.copy(), params['trade_type']),
-            "RSI": rsi_verdict(df.copy(), params['trade_type']),
-            "Smart Money": smc_verdict(df.copy(), params['trade_type']),
-            "Whale Activity": whale_verdict(params['symbol'], params['trade_type']),
-            "Stochastic RSI": stoch_rsi_verdict(df.copy(), params['trade_type']),
-            "Support/Resistance": support_resistance_verdict(df.copy(), params['trade_type'])
+        intervals = list(dict.fromkeys(params['timeframes']))
+        invalid = [tf for tf in intervals if tf not in VALID_INTERVALS]
+        if not intervals or invalid:
+            return jsonify({'error': f'Invalid timeframes: {invalid}. Choose from {VALID_INTERVALS}'}), 400
+
+        try:
+            analysis = analyze_timeframes(params['symbol'], intervals, params['market_type'], params['trade_type'])
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Indicator x timeframe verdict matrix, aligned on the requested order
+        timeframes = analysis['timeframes']
+        matrix = {
+            indicator: {interval: timeframes[interval]['verdicts'][indicator]['verdict'] for interval in intervals}
+            for indicator in timeframes[intervals[0]]['verdicts']
         }
 
-        # Get final verdict
-        final_verdict = get_final_verdict(verdicts)
-
-        # Prepare complete results
-        results = {
+        return jsonify({
             'symbol': params['symbol'],
             'market_type': params['market_type'],
             'trade_type': params['trade_type'],
-            'timeframe': f"{params['time_value']}{params['time_unit'][0]}",
-            'current_price': current_price,
-            'verdicts': verdicts,
-            'final_verdict': final_verdict,
-            'structured_data': {
-                'indicators': verdicts,
-                'final_verdict': final_verdict,
-                'price': current_price,
-                'targets': targets
-            }
-        }
-
-        return jsonify({
-            'console_output': format_console_output(results),
-            'structured_data': results['structured_data']
+            'base_interval': analysis['base_interval'],
+            'price': analysis['price'],
+            'timeframes': intervals,
+            'matrix': matrix,
+            'scores': {interval: timeframes[interval]['final_verdict']['score'] for interval in intervals},
+            'details': timeframes
         })
 
     except Exception as e:
-        if "single positional indexer is out-of-bounds" in str(e):
-            return jsonify({'error': 'Invalid coin pair or timeframe. Please check your inputs.'}), 400
         return jsonify({'error': str(e)}), 500
+
+
+@app.route('/scan', methods=['POST'])
+def api_scan():
+    try:
+        params = request.json
+
+        for field in ['market_type', 'symbols', 'timeframes']:
+            if field not in params:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        symbols = list(dict.fromkeys(str(symbol).upper() for symbol in params['symbols']))
+        if not symbols or len(symbols) > SCAN_MAX_SYMBOLS:
+            return jsonify({'error': f'Provide between 1 and {SCAN_MAX_SYMBOLS} symbols'}), 400
+
+        intervals = list(dict.fromkeys(params['timeframes']))
+        invalid = [tf for tf in intervals if tf not in VALID_INTERVALS]
+        if not intervals or invalid:
+            return jsonify({'error': f'Invalid timeframes: {invalid}. Choose from {VALID_INTERVALS}'}), 400
+
+        trade_types = params.get('trade_types', ['long', 'short'])
+        if not trade_types or any(trade_type not in ('long', 'short') for trade_type in trade_types):
+            return jsonify({'error': 'trade_types must be "long" and/or "short"'}), 400
+
+        rows, errors = scan_symbols(symbols, intervals, params['market_type'], trade_types)
+        return jsonify({'results': rows, 'errors': errors})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ----------------------
 # CLI Entry Point (Keeps original functionality)
 # ----------------------
 
+def _indicator_option(value):
+    try:
+        return REGISTRY.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Crypto trading analysis dashboard")
+    parser.add_argument("--indicators", type=_indicator_option, default=REGISTRY.names(),
+                        help=f"Comma-separated subset to run (default: all). Choose from: {', '.join(REGISTRY.names())}")
+    parser.add_argument("--watchlist", metavar="PATH",
+                        help="Re-evaluate this watchlist on every candle close instead of prompting")
+    parser.add_argument("--sink", default="-",
+                        help="Where --watchlist verdict changes go: '-' for stdout, an http(s) webhook URL, or a file")
+    args = parser.parse_args()
+
+    if args.watchlist:
+        import watchlist
+
+        start_background()
+        watchlist.run(args.watchlist, scan_symbols, VALID_INTERVALS, args.sink)
+        return
+
     print("=== Crypto Trading Analysis Dashboard ===")
 
     # Get user inputs
@@ -919,26 +1623,12 @@ def main():
 
     try:
         # Run analysis
-        df = fetch_ohlc_data(
-            symbol,
-            f"{time_value}{time_unit[0]}",
-            market_type
-        )
+        inputs = fetch_market_inputs(symbol, f"{time_value}{time_unit[0]}", market_type, indicators=args.indicators)
+        if inputs['available'] is not True:
+            print("\n❌ Error: Invalid coin pair. Please check the symbol and market type.")
+            return
 
-        verdicts = {
-            "ADX": adx_verdict(df.copy(), trade_type),
-            "EMA": ema_verdict(df.copy(), trade_type),
-            "Exchange Net Flow": netflow_verdict(symbol, market_type, trade_type),
-            "Market Sentiment": sentiment_verdict(trade_type),
-            "Miner Activity": miner_verdict(),
-            "MACD": macd_verdict(df.copy(), trade_type),
-            "Volume Profile": volume_profile_verdict(df.copy(), trade_type),
-            "RSI": rsi_verdict(df.copy(), trade_type),
-            "Smart Money": smc_verdict(df.copy(), trade_type),
-            "Whale Activity": whale_verdict(symbol, trade_type),
-            "Stochastic RSI": stoch_rsi_verdict(df.copy(), trade_type),
-            "Support/Resistance": support_resistance_verdict(df.copy(), trade_type)
-        }
+        verdicts = run_indicators(inputs, symbol, market_type, trade_type, indicators=args.indicators)
 
         final = get_final_verdict(verdicts)
 
@@ -948,7 +1638,7 @@ def main():
             'market_type': market_type,
             'trade_type': trade_type,
             'timeframe': f"{time_value}{time_unit[0]}",
-            'current_price': get_current_price(symbol, market_type),
+            'current_price': _unwrap(inputs['price']),
             'verdicts': verdicts,
             'final_verdict': final
         }
@@ -961,6 +1651,7 @@ def main():
 
 if __name__ == '__main__':
     if os.environ.get('WEB_MODE'):
+        start_background()
         app.run(debug=True, port=5000)
     else:
         main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""All-symbol price and 24hr ticker tables, refreshed in the background.
+
+Binance returns every symbol's last price (``/ticker/price``) and 24hr
+statistics (``/ticker/24hr``) in one response each when no symbol is given.
+``MarketSnapshot`` keeps both tables per market type in memory, indexed by
+symbol, so pricing a symbol or reading its 24hr volume is a dict lookup
+shared by every concurrent request instead of one call each. A table that
+has not loaded yet, or has gone stale because refreshes keep failing, is
+reported as a miss and callers fall back to the per-symbol endpoint.
+
+The refresh threads are started once, by ``start()`` from the app's entry
+points, never by a lookup. A market's tables are only fetched while it is
+being queried: the first lookup wakes its refreshers (that lookup still
+misses) and they go idle again ``IDLE_AFTER`` seconds after the last one, so
+an app that only serves spot spends no weight on futures tables.
+
+Tables live in process memory, so every worker process pays the refresh
+weight again: N gunicorn workers querying both markets cost N x about 300
+weight a minute out of the IP's 6000. Prefer one worker with threads, or
+the async app, over many worker processes.
+"""
+import time
+
+from config import binance_url
+from refresh import PeriodicRefresher
+
+PRICE_REFRESH_INTERVAL = 2  # seconds; weight 4 (spot) / 2 (futures) per refresh
+TICKER_REFRESH_INTERVAL = 60  # seconds; weight 80 (spot) / 40 (futures) per refresh, 24hr volume barely moves
+STALE_AFTER_INTERVALS = 3  # Missed refreshes before a table stops being served
+IDLE_AFTER = 300  # seconds without a lookup before a market's tables stop refreshing
+MARKET_TYPES = ("spot", "futures")
+
+
+def _get_table(market_type, endpoint):
+    import http_client
+
+    return http_client.get_json(f"{binance_url(market_type)}/ticker/{endpoint}")
+
+
+def fetch_price_table(market_type):
+    """symbol -> last price"""
+    return {row["symbol"]: float(row["price"]) for row in _get_table(market_type, "price")}
+
+
+def fetch_ticker_table(market_type):
+    """symbol -> raw ``/ticker/24hr`` row"""
+    return {row["symbol"]: row for row in _get_table(market_type, "24hr")}
+
+
+class MarketSnapshot:
+    """Price and 24hr tables per market type, each kept by its own ``PeriodicRefresher``"""
+
+    def __init__(self, fetch_prices=fetch_price_table, fetch_tickers=fetch_ticker_table,
+                 price_interval=PRICE_REFRESH_INTERVAL, ticker_interval=TICKER_REFRESH_INTERVAL,
+                 idle_after=IDLE_AFTER, clock=time.time):
+        self.idle_after = idle_after
+        self._clock = clock
+        self._queried_at = {}  # market_type -> time of its last lookup
+        self._tables = {}
+        for market_type in MARKET_TYPES:
+            self._tables[market_type, "price"] = PeriodicRefresher(
+                lambda market_type=market_type: fetch_prices(market_type), price_interval,
+                name=f"prices-{market_type}", autostart=False,
+                active=lambda market_type=market_type: self._queried(market_type))
+            self._tables[market_type, "ticker"] = PeriodicRefresher(
+                lambda market_type=market_type: fetch_tickers(market_type), ticker_interval,
+                name=f"tickers-{market_type}", autostart=False,
+                active=lambda market_type=market_type: self._queried(market_type))
+
+    def start(self):
+        """Start the refresh threads; each market's tables load on its first lookup"""
+        for refresher in self._tables.values():
+            refresher.start()
+
+    def _queried(self, market_type):
+        queried_at = self._queried_at.get(market_type)
+        return queried_at is not None and self._clock() - queried_at <= self.idle_after
+
+    def _touch(self, market_type):
+        idle = not self._queried(market_type)
+        self._queried_at[market_type] = self._clock()
+        if idle:
+            for (table_market, _), refresher in self._tables.items():
+                if table_market == market_type:
+                    refresher.wake()
+
+    def _lookup(self, market_type, table, symbol):
+        refresher = self._tables.get((market_type, table))
+        if refresher is None:
+            return None
+        self._touch(market_type)
+        rows = refresher.get()
+        age = refresher.age()
+        if rows is None or age is None or age > refresher.interval * STALE_AFTER_INTERVALS:
+            return None
+        return rows.get(symbol.upper())
+
+    def price(self, market_type, symbol):
+        """Last price of ``symbol``, or None if the table can't answer"""
+        return self._lookup(market_type, "price", symbol)
+
+    def ticker(self, market_type, symbol):
+        """``/ticker/24hr`` row of ``symbol``, or None if the table can't answer"""
+        return self._lookup(market_type, "ticker", symbol)
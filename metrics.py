@@ -0,0 +1,201 @@
+"""In-process latency histograms and counters, exported as Prometheus text.
+
+Stages of a request are timed with ``span``; each span feeds the
+``analyze_stage_seconds`` histogram and, while a profile is active in the
+current context, the per-request breakdown returned by ``?profile=1``. Work
+handed to a thread pool keeps reporting to the request's profile when it is
+submitted through ``submit``.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # labels -> [per-bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, (list(counts), total, count))
+                              for labels, (counts, total, count) in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = (("le", _number(float(bound)) if not math.isinf(bound) else "+Inf"),)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if existing is not metric and (existing.type, existing.labelnames) != (metric.type, metric.labelnames):
+            raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+        return existing
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+STAGE_SECONDS = histogram("analyze_stage_seconds", "Time spent per analysis stage", ["stage"])
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+
+
+class Profile:
+    """Per-request record of every span, safe to fill from several threads"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, started, seconds):
+        with self._lock:
+            self._spans.append((started - self.started, stage, seconds))
+
+    def as_dict(self):
+        with self._lock:
+            spans = sorted(self._spans)
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": [
+                {"stage": stage, "start_ms": round(offset * 1000, 3), "duration_ms": round(seconds * 1000, 3)}
+                for offset, stage, seconds in spans
+            ],
+        }
+
+
+_profile = contextvars.ContextVar("profile", default=None)
+
+
+def start_profile():
+    """Start recording spans of the current context; returns a token for ``end_profile``"""
+    return _profile.set(Profile())
+
+
+def end_profile(token):
+    _profile.reset(token)
+
+
+def current_profile():
+    return _profile.get()
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage)
+        profile = _profile.get()
+        if profile is not None:
+            profile.add(stage, started, seconds)
+
+
+def _timed(stage, func, args, kwargs):
+    with span(stage):
+        return func(*args, **kwargs)
+
+
+def submit(executor, stage, func, *args, **kwargs):
+    """``executor.submit`` that times the call as ``stage`` in the caller's profile"""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, _timed, stage, func, args, kwargs)
@@ -0,0 +1,250 @@
+"""Order book depth as NumPy arrays, with locally maintained books.
+
+``parse_depth`` turns a ``/depth`` payload into contiguous float64 price and
+quantity arrays (bids best first, asks best first). ``OrderBookStore`` keeps a
+local book per (market_type, symbol) from a REST snapshot plus the
+``depthUpdate`` diff stream, following Binance's sync rules for spot (the
+first diff covers ``lastUpdateId + 1``, then ``U`` / ``u`` continuity) and
+futures, whose diffs carry ``pu`` (the first diff covers ``lastUpdateId``,
+then ``pu`` continuity). Diffs that arrive before the first snapshot are
+buffered; a gap in update ids drops the book until the next snapshot.
+
+The store plugs into ``streaming.StreamIngestor`` like ``KlineStore``, so
+books can be replayed from recorded message files. Since snapshots are REST
+responses, ``record`` writes one into the recording as a ``depthSnapshot``
+line once each symbol's diff stream has started:
+
+    python order_book.py record BTCUSDT ETHUSDT --out depth.jsonl
+    python order_book.py replay depth.jsonl
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import binance_url
+from streaming import MAX_LAG, ReplaySource, StreamIngestor, WebsocketSource
+
+DEPTH_LIMIT = 500  # Levels per side requested from /depth
+MAX_BUFFERED_UPDATES = 1000  # Diffs kept per book while waiting for a snapshot
+
+
+def _levels(levels):
+    levels = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    return np.ascontiguousarray(levels[:, 0]), np.ascontiguousarray(levels[:, 1])
+
+
+def parse_depth(raw):
+    """Parse a ``/depth`` payload into ``{"last_update_id", "bid_price", "bid_qty", "ask_price", "ask_qty"}``"""
+    if not isinstance(raw, dict) or "bids" not in raw:
+        raise ValueError(raw.get("msg", raw) if isinstance(raw, dict) else raw)
+    bid_price, bid_qty = _levels(raw["bids"])
+    ask_price, ask_qty = _levels(raw["asks"])
+    return {
+        "last_update_id": raw.get("lastUpdateId"),
+        "bid_price": bid_price, "bid_qty": bid_qty,
+        "ask_price": ask_price, "ask_qty": ask_qty,
+    }
+
+
+def _side_arrays(side, descending, limit):
+    prices = np.fromiter(side.keys(), dtype=np.float64, count=len(side))
+    qtys = np.fromiter(side.values(), dtype=np.float64, count=len(side))
+    order = np.argsort(-prices if descending else prices, kind="stable")[:limit]
+    return prices[order], qtys[order]
+
+
+class LocalOrderBook:
+    """One symbol's book: price -> quantity per side, kept in sync by update id"""
+
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+        self.last_update_id = None  # None until a snapshot has been applied
+        self._final_id = None  # ``u`` of the last applied diff
+        self._pending = deque(maxlen=MAX_BUFFERED_UPDATES)
+        self._arrays = None  # Materialized depth, dropped on every change
+
+    @property
+    def synced(self):
+        return self.last_update_id is not None
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self._final_id = None
+        self._arrays = None
+
+    def seed(self, depth):
+        self.bids = dict(zip(depth["bid_price"].tolist(), depth["bid_qty"].tolist()))
+        self.asks = dict(zip(depth["ask_price"].tolist(), depth["ask_qty"].tolist()))
+        self.last_update_id = depth["last_update_id"]
+        self._final_id = None
+        self._arrays = None
+
+        pending, self._pending = list(self._pending), deque(maxlen=MAX_BUFFERED_UPDATES)
+        for event in pending:
+            if not self.update(event):
+                break
+
+    def update(self, event):
+        """Apply one ``depthUpdate``; returns False when the book fell out of sync"""
+        if not self.synced:
+            self._pending.append(event)
+            return True
+
+        first, final = event["U"], event["u"]
+        futures = "pu" in event
+        if self._final_id is not None:
+            if final <= self._final_id:
+                return True  # Already applied
+        # Futures diffs ending at lastUpdateId still hold changes newer than the snapshot
+        elif final < self.last_update_id or (final == self.last_update_id and not futures):
+            return True  # Already part of the snapshot
+
+        if self._final_id is None:
+            in_sequence = first <= self.last_update_id + (0 if futures else 1)
+        elif futures:
+            in_sequence = event["pu"] == self._final_id
+        else:
+            in_sequence = first == self._final_id + 1
+        if not in_sequence:
+            self.reset()
+            return False
+
+        for side, levels in ((self.bids, event["b"]), (self.asks, event["a"])):
+            for price, qty in levels:
+                price, qty = float(price), float(qty)
+                if qty == 0:
+                    side.pop(price, None)
+                else:
+                    side[price] = qty
+        self._final_id = final
+        self._arrays = None
+        return True
+
+    def depth(self, limit=DEPTH_LIMIT):
+        if self._arrays is None or self._arrays[0] != limit:
+            bid_price, bid_qty = _side_arrays(self.bids, True, limit)
+            ask_price, ask_qty = _side_arrays(self.asks, False, limit)
+            self._arrays = (limit, {
+                "last_update_id": self._final_id or self.last_update_id,
+                "bid_price": bid_price, "bid_qty": bid_qty,
+                "ask_price": ask_price, "ask_qty": ask_qty,
+            })
+        return self._arrays[1]
+
+
+class OrderBookStore:
+    """Thread-safe local books fed by ``depthUpdate`` and ``depthSnapshot`` messages"""
+
+    def __init__(self, max_lag=MAX_LAG):
+        self.max_lag = max_lag
+        self._books = {}  # (market_type, symbol) -> LocalOrderBook
+        self._updated_at = {}  # same key -> unix time of last diff
+        self._lock = threading.Lock()
+
+    def apply(self, message, market_type="spot"):
+        """Apply one websocket message; other event types are ignored"""
+        data = message.get("data", message)
+        event = data.get("e")
+        if event == "depthUpdate":
+            key = (market_type, data["s"].upper())
+            with self._lock:
+                book = self._books.get(key)
+                if book is None:
+                    book = self._books[key] = LocalOrderBook()
+                book.update(data)
+                self._updated_at[key] = time.time()
+        elif event == "depthSnapshot":
+            depth = parse_depth(data)
+            with self._lock:
+                book = self._books.setdefault((market_type, data["s"].upper()), LocalOrderBook())
+                book.seed(depth)
+
+    def seed(self, market_type, symbol, depth):
+        """Sync a streamed book from a REST snapshot, replaying the diffs buffered since"""
+        key = (market_type, symbol.upper())
+        with self._lock:
+            book = self._books.get(key)
+            if book is not None:
+                book.seed(depth)
+
+    def tracks(self, market_type, symbol):
+        return (market_type, symbol.upper()) in self._books
+
+    def books(self):
+        return sorted(self._books)
+
+    def depth(self, market_type, symbol, limit=DEPTH_LIMIT):
+        """Top ``limit`` levels like ``parse_depth``, or None if not streamed, unsynced or stale"""
+        key = (market_type, symbol.upper())
+        with self._lock:
+            book = self._books.get(key)
+            updated_at = self._updated_at.get(key)
+            if book is None or not book.synced or updated_at is None or time.time() - updated_at > self.max_lag:
+                return None
+            return book.depth(limit)
+
+    def __len__(self):
+        return len(self._books)
+
+
+def fetch_snapshot(market_type, symbol, limit=DEPTH_LIMIT):
+    """Raw ``/depth`` payload for ``symbol``"""
+    import http_client
+
+    return http_client.get_json(f"{binance_url(market_type)}/depth?symbol={symbol.upper()}&limit={limit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay local order books")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record diff streams plus one snapshot per symbol")
+    record.add_argument("symbols", nargs="+")
+    record.add_argument("--out", required=True)
+    record.add_argument("--market", choices=["spot", "futures"], default="spot")
+    record.add_argument("--limit", type=int, default=DEPTH_LIMIT)
+
+    replay = commands.add_parser("replay", help="Replay a recording and print each book's top of book")
+    replay.add_argument("path")
+    replay.add_argument("--speed", type=float, default=0)
+    replay.add_argument("--market", choices=["spot", "futures"], default="spot")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        source = WebsocketSource([f"{symbol.lower()}@depth@100ms" for symbol in args.symbols], args.market)
+        unsynced = {symbol.upper() for symbol in args.symbols}
+        with open(args.out, "a") as f:
+            for message in source:
+                f.write(json.dumps({"ts": int(time.time() * 1000), "msg": message}) + "\n")
+                symbol = message.get("data", message).get("s")
+                if symbol in unsynced:
+                    # Snapshot after the first diff, so buffered diffs bridge it on replay
+                    raw = fetch_snapshot(args.market, symbol, args.limit)
+                    parse_depth(raw)  # Fail on an error payload instead of recording it
+                    snapshot = dict(raw, e="depthSnapshot", s=symbol)
+                    f.write(json.dumps({"ts": int(time.time() * 1000), "msg": snapshot}) + "\n")
+                    unsynced.discard(symbol)
+        return
+
+    store = OrderBookStore(max_lag=float("inf"))
+    StreamIngestor(store, ReplaySource(args.path, args.speed), args.market).run()
+    for market_type, symbol in store.books():
+        depth = store.depth(market_type, symbol)
+        if depth is None:
+            print(f"{market_type:<8} {symbol:<12} not synced (no snapshot or a gap in update ids)")
+            continue
+        best_bid = depth["bid_price"][0] if len(depth["bid_price"]) else float("nan")
+        best_ask = depth["ask_price"][0] if len(depth["ask_price"]) else float("nan")
+        print(f"{market_type:<8} {symbol:<12} update {depth['last_update_id']}  "
+              f"bid {best_bid} / ask {best_ask}  {len(depth['bid_price'])}x{len(depth['ask_price'])} levels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Background refresh of slow-changing upstream values"""
+import os
+import threading
+import time
+
+from upstream_scheduler import BACKGROUND, priority
+
+RETRY_INTERVAL = 30  # seconds between attempts while the upstream is failing
+
+
+class PeriodicRefresher:
+    """Keeps the latest result of ``fetch`` in memory, refreshed by a daemon thread.
+
+    Readers get the cached value in O(1) and never wait on the upstream, except
+    optionally on cold start before the first value has arrived. When a refresh
+    fails (including being shed by the upstream scheduler, as refreshes run at
+    background priority) the last known value keeps being served and ``age()``
+    keeps growing.
+    The thread is started lazily (and restarted after a fork) on first use,
+    or only by ``start()`` with ``autostart=False``. While ``active()``
+    returns False the thread idles without fetching until ``wake()``.
+    """
+
+    def __init__(self, fetch, interval, name="refresher", autostart=True, active=None):
+        self._fetch = fetch
+        self.interval = interval
+        self.name = name
+        self._autostart = autostart
+        self._active = active
+        self.last_error = None
+        self._value = None
+        self._updated_at = None
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with priority(BACKGROUND):
+            while True:
+                ok = self.refresh() if self._active is None or self._active() else True
+                self._wake.wait(self.interval if ok else min(self.interval, RETRY_INTERVAL))
+                self._wake.clear()
+
+    def wake(self):
+        """Refresh now instead of at the end of the current interval"""
+        self._wake.set()
+
+    def refresh(self):
+        """Fetch a new value now; returns False (keeping the old value) on failure"""
+        try:
+            value = self._fetch()
+        except Exception as e:
+            self.last_error = e
+            return False
+
+        self._value = value
+        self._updated_at = time.time()
+        self.last_error = None
+        self._ready.set()
+        return True
+
+    def get(self, wait=0):
+        """Return the cached value, or None if nothing has been fetched yet.
+
+        ``wait`` bounds how long to block on cold start only.
+        """
+        if self._autostart:
+            self.start()
+        if wait and not self._ready.is_set():
+            self._ready.wait(wait)
+        return self._value
+
+    def age(self):
+        """Seconds since the cached value was fetched, or None"""
+        if self._updated_at is None:
+            return None
+        return time.time() - self._updated_at
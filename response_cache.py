@@ -0,0 +1,123 @@
+"""Expiring result cache with single-flight computation.
+
+Each entry carries its own deadline, so ``/analyze`` results can live exactly
+until the candle they were computed on closes. When several requests miss on
+the same key at once only the first computes; the others wait for its result
+(or its exception) instead of repeating the upstream calls.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import metrics
+
+MAX_ENTRIES = 1024
+
+
+class ResponseCache:
+    def __init__(self, name, max_entries=MAX_ENTRIES, clock=time.time):
+        self.name = name
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._flights = {}  # key -> Future of the computation in progress
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, expires_at):
+        """Return ``(value, outcome)`` where outcome is "hit", "miss" or "shared".
+
+        ``compute`` runs at most once per key at a time; its result is kept
+        until ``expires_at`` (unix seconds). Exceptions are not cached but
+        are raised in every request that was waiting on that computation.
+        """
+        outcome, found = self._lookup(key)
+        if outcome == "hit":
+            return found, outcome
+        if outcome == "shared":
+            return found.result(), outcome
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, found, expires_at, error=e)
+            raise
+        self._finish(key, found, expires_at, value=value)
+        return value, outcome
+
+    async def get_or_compute_async(self, key, compute, expires_at):
+        """``get_or_compute`` for a coroutine function; waiters never block the event loop"""
+        outcome, found = self._lookup(key)
+        if outcome == "hit":
+            return found, outcome
+        if outcome == "shared":
+            return await asyncio.wrap_future(found), outcome
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._finish(key, found, expires_at, error=e)
+            raise
+        self._finish(key, found, expires_at, value=value)
+        return value, outcome
+
+    def get(self, key):
+        """The unexpired value for ``key``, or None; never waits on a computation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                entry = None
+        metrics.CACHE_REQUESTS.inc(self.name, "miss" if entry is None else "hit")
+        return None if entry is None else entry[0]
+
+    def put(self, key, value, expires_at):
+        """Store a value computed outside ``get_or_compute``"""
+        with self._lock:
+            if expires_at > self._clock():
+                self._store(key, value, expires_at)
+
+    def _lookup(self, key):
+        """``("hit", value)``, ``("shared", future)`` or ``("miss", future)`` to complete"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > self._clock():
+                    metrics.CACHE_REQUESTS.inc(self.name, "hit")
+                    return "hit", entry[0]
+                del self._entries[key]
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                metrics.CACHE_REQUESTS.inc(self.name, "shared")
+                return "shared", flight
+            flight = self._flights[key] = Future()
+        metrics.CACHE_REQUESTS.inc(self.name, "miss")
+        return "miss", flight
+
+    def _finish(self, key, flight, expires_at, value=None, error=None):
+        with self._lock:
+            del self._flights[key]
+            if error is None and expires_at > self._clock():
+                self._store(key, value, expires_at)
+        if error is None:
+            flight.set_result(value)
+        else:
+            flight.set_exception(error)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        if len(self._entries) > self.max_entries:
+            now = self._clock()
+            for stale in [k for k, (_, deadline) in self._entries.items() if deadline <= now]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -121,6 +121,33 @@ const cheatSheetData = `
 </ul>
 `;
 
+// Read a text/event-stream response, calling onEvent(name, data) for each event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let name = 'message';
+            const data = [];
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event:')) name = line.slice(6).trim();
+                else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+            }
+            if (data.length) onEvent(name, JSON.parse(data.join('\n')));
+        }
+    }
+}
+
 // Load cheat sheet on page load
 document.addEventListener('DOMContentLoaded', function() {
     if (cheatsheetContent) {
@@ -161,7 +188,8 @@ analysisForm.addEventListener('submit', async function(e) {
         const timeUnit = timeframe.slice(-1) === 'm' ? 'minutes' : 
                         timeframe.slice(-1) === 'h' ? 'hours' : 'days';
         
-        const response = await fetch('http://localhost:5000/analyze', {
+        // Verdicts arrive one by one as server-sent events, then the full report
+        const response = await fetch('http://localhost:5000/analyze/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -173,23 +201,40 @@ analysisForm.addEventListener('submit', async function(e) {
             })
         });
         
-        const data = await response.json();
-        
-        if (!response.ok) throw new Error(data.error || 'Analysis failed');
-        
-        // Update UI
-        consoleOutput.textContent = data.console_output;
-        if (data.structured_data) {
-            // You can access data.structured_data.targets here if needed
-            console.log('Price targets:', data.structured_data.targets);
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || 'Analysis failed');
         }
+        
+        // Show the results and chart right away, filling in verdicts as they come
+        consoleOutput.textContent = `Analyzing ${coinPair} (${timeframe})...\n\n`;
         if (inputCheatsheetSection) inputCheatsheetSection.style.display = 'none';
         if (resultsSection) resultsSection.style.display = 'grid';
         
         // Initialize chart with the same timeframe
         initTradingViewChart(coinPair, marketType, timeframe);
         
+        let finished = false;
+        await readEventStream(response, (event, data) => {
+            if (event === 'verdict') {
+                const mark = data.verdict === 'yes' ? '✅' : '❌';
+                consoleOutput.textContent += `${mark} ${data.name}: ${data.explanation}\n`;
+            } else if (event === 'final') {
+                finished = true;
+                consoleOutput.textContent = data.console_output;
+                if (data.structured_data) {
+                    // You can access data.structured_data.targets here if needed
+                    console.log('Price targets:', data.structured_data.targets);
+                }
+            } else if (event === 'error') {
+                throw new Error(data.error || 'Analysis failed');
+            }
+        });
+        if (!finished) throw new Error('Analysis stream ended early');
+        
     } catch (error) {
+        if (resultsSection) resultsSection.style.display = 'none';
+        if (inputCheatsheetSection) inputCheatsheetSection.style.display = 'grid';
         errorMessage.textContent = error.message.includes('out-of-bounds') 
             ? 'Invalid coin pair. Please check the symbol and try again.' 
             : error.message;
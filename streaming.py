@@ -0,0 +1,276 @@
+"""Streaming kline ingestion.
+
+Messages in Binance websocket format (``kline``, ``trade`` and ``24hrTicker``
+events, raw or wrapped in a combined-stream ``{"stream", "data"}`` envelope)
+are applied to a ``KlineStore`` that keeps a rolling candle window per
+(market_type, symbol, interval), the last trade price and the latest 24hr
+ticker per symbol. Analyses can then read candles from memory instead of
+calling ``/klines``.
+
+Messages come from a pluggable source: ``WebsocketSource`` for live Binance
+streams (needs the optional ``websocket-client`` package) or ``ReplaySource``
+for recorded JSON-lines files played back at any speed. Recording and
+replaying from the command line:
+
+    python streaming.py record btcusdt@kline_1m btcusdt@trade --out feed.jsonl
+    python streaming.py replay feed.jsonl --speed 0
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from kline_cache import KLINE_COLUMNS, parse_klines
+
+BINANCE_SPOT_STREAM_URL = "wss://stream.binance.com:9443/stream"
+BINANCE_FUTURES_STREAM_URL = "wss://fstream.binance.com/stream"
+
+WINDOW_SIZE = 1000  # Candles kept per symbol and interval
+MAX_LAG = 60  # seconds without updates before a window is considered stale
+RECONNECT_BACKOFF_MAX = 30  # seconds
+RESTART_DELAY = 5  # seconds before start() reruns an ingestor that died on an error
+
+
+class KlineStore:
+    """Thread-safe in-memory candle windows fed by stream messages"""
+
+    def __init__(self, window_size=WINDOW_SIZE, max_lag=MAX_LAG):
+        self.window_size = window_size
+        self.max_lag = max_lag
+        self.messages = 0
+        self._windows = {}  # (market_type, symbol, interval) -> deque of kline rows
+        self._symbol_windows = defaultdict(list)  # (market_type, symbol) -> window keys
+        self._updated_at = {}  # same key -> unix time of last update
+        self._prices = {}  # (market_type, symbol) -> (price, unix time)
+        self._tickers = {}  # (market_type, symbol) -> (24hr ticker dict, unix time)
+        self._lock = threading.Lock()
+
+    def apply(self, message, market_type="spot"):
+        """Apply one websocket message; unknown event types are ignored"""
+        data = message.get("data", message)
+        event = data.get("e")
+        symbol = data.get("s", "").upper()
+        now = time.time()
+
+        with self._lock:
+            self.messages += 1
+            if event == "kline":
+                k = data["k"]
+                row = (int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]),
+                       float(k["v"]), int(k["T"]), float(k["q"]), int(k["n"]), float(k["V"]),
+                       float(k["Q"]), k.get("B", "0"))
+                self._upsert((market_type, symbol, k["i"]), row, now)
+            elif event in ("trade", "aggTrade"):
+                price, qty, trade_time = float(data["p"]), float(data["q"]), int(data["T"])
+                self._prices[(market_type, symbol)] = (price, now)
+                self._apply_trade(market_type, symbol, price, qty, trade_time, now)
+            elif event == "24hrTicker":
+                ticker = {"symbol": symbol, "lastPrice": data["c"], "volume": data["v"], "quoteVolume": data["q"]}
+                self._tickers[(market_type, symbol)] = (ticker, now)
+                self._prices[(market_type, symbol)] = (float(data["c"]), now)
+
+    def _upsert(self, key, row, now):
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = deque(maxlen=self.window_size)
+            self._symbol_windows[key[:2]].append(key)
+        if window and window[-1][0] == row[0]:
+            window[-1] = row  # Revision of the open candle
+        elif not window or row[0] > window[-1][0]:
+            window.append(row)
+        self._updated_at[key] = now
+
+    def _apply_trade(self, market_type, symbol, price, qty, trade_time, now):
+        # Keep open candles current between kline events, which stay authoritative
+        for key in self._symbol_windows.get((market_type, symbol), ()):
+            window = self._windows[key]
+            if not window:
+                continue
+            t, o, h, l, c, v, close_time, *rest = window[-1]
+            if t <= trade_time <= close_time:
+                window[-1] = (t, o, max(h, price), min(l, price), price, v + qty, close_time, *rest)
+                self._updated_at[key] = now
+
+    def seed(self, market_type, symbol, interval, columns):
+        """Prepend REST history older than the streamed candles of a window"""
+        key = (market_type, symbol.upper(), interval)
+        rows = list(zip(*(columns[name].tolist() for name in KLINE_COLUMNS)))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return
+            first = window[0][0] if window else None
+            history = [row for row in rows if first is None or row[0] < first]
+            self._windows[key] = deque(history + list(window), maxlen=self.window_size)
+
+    def tracks(self, market_type, symbol, interval):
+        return (market_type, symbol.upper(), interval) in self._windows
+
+    def _fresh(self, updated_at):
+        return updated_at is not None and time.time() - updated_at <= self.max_lag
+
+    def window(self, market_type, symbol, interval, limit):
+        """Last ``limit`` candles as kline columns, or None if not streamed, too short or stale"""
+        key = (market_type, symbol.upper(), interval)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or len(window) < limit or not self._fresh(self._updated_at.get(key)):
+                return None
+            rows = list(window)[-limit:]
+        return parse_klines(rows)
+
+    def last_price(self, market_type, symbol):
+        price, updated_at = self._prices.get((market_type, symbol.upper()), (None, None))
+        return price if self._fresh(updated_at) else None
+
+    def ticker(self, market_type, symbol):
+        ticker, updated_at = self._tickers.get((market_type, symbol.upper()), (None, None))
+        return ticker if self._fresh(updated_at) else None
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class ReplaySource:
+    """Replays a recorded JSON-lines message file.
+
+    Each line is either ``{"ts": <ms>, "msg": {...}}`` as written by
+    ``StreamIngestor(record_path=...)`` or a bare message, timed by its event
+    time ``E``. ``speed`` scales the recorded gaps (2 = twice as fast) and
+    ``speed=0`` replays as fast as possible.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+
+    def __iter__(self):
+        while True:
+            previous = None
+            with open(self.path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    message = record["msg"] if "msg" in record else record
+                    timestamp = record.get("ts") or message.get("data", message).get("E")
+
+                    if self.speed and previous is not None and timestamp is not None:
+                        gap = (timestamp - previous) / 1000 / self.speed
+                        if gap > 0:
+                            time.sleep(gap)
+                    previous = timestamp if timestamp is not None else previous
+                    yield message
+            if not self.loop:
+                return
+
+
+class WebsocketSource:
+    """Live Binance combined stream, reconnecting with backoff"""
+
+    def __init__(self, streams, market_type="spot"):
+        self.streams = [stream.lower() for stream in streams]
+        self.market_type = market_type
+
+    @property
+    def url(self):
+        base_url = BINANCE_FUTURES_STREAM_URL if self.market_type == "futures" else BINANCE_SPOT_STREAM_URL
+        return f"{base_url}?streams={'/'.join(self.streams)}"
+
+    def __iter__(self):
+        try:
+            import websocket
+        except ImportError as e:
+            raise RuntimeError("Live streaming needs the websocket-client package") from e
+
+        backoff = 1
+        while True:
+            try:
+                connection = websocket.create_connection(self.url, timeout=MAX_LAG)
+                backoff = 1
+                while True:
+                    yield json.loads(connection.recv())
+            except (OSError, websocket.WebSocketException):
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+
+
+class StreamIngestor:
+    """Feeds a source into one or more stores from a daemon thread, optionally recording it"""
+
+    def __init__(self, store, source, market_type="spot", record_path=None):
+        self.stores = list(store) if isinstance(store, (list, tuple)) else [store]
+        self.source = source
+        self.market_type = market_type
+        self.record_path = record_path
+        self.last_error = None
+        self._thread = None
+        self._pid = None
+        self._failed_at = None  # When the thread last died on an error
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread, again after a fork or, ``RESTART_DELAY`` later, after it died on an error"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                if self._thread.is_alive() or self._failed_at is None:
+                    return  # Running, or a finite source (a replay) that played to the end
+                if time.time() - self._failed_at < RESTART_DELAY:
+                    return
+            self._pid = os.getpid()
+            self._failed_at = None
+            self._thread = threading.Thread(target=self.run, name="stream-ingestor", daemon=True)
+            self._thread.start()
+
+    def run(self):
+        record = open(self.record_path, "a") if self.record_path else None
+        try:
+            for message in self.source:
+                if record is not None:
+                    record.write(json.dumps({"ts": int(time.time() * 1000), "msg": message}) + "\n")
+                for store in self.stores:
+                    store.apply(message, self.market_type)
+        except Exception as e:
+            self.last_error = e
+            self._failed_at = time.time()
+        finally:
+            if record is not None:
+                record.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay Binance stream messages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record live streams to a JSON-lines file")
+    record.add_argument("streams", nargs="+", help="Stream names, e.g. btcusdt@kline_1m")
+    record.add_argument("--out", required=True)
+    record.add_argument("--market", choices=["spot", "futures"], default="spot")
+
+    replay = commands.add_parser("replay", help="Replay a recording into a store and report throughput")
+    replay.add_argument("path")
+    replay.add_argument("--speed", type=float, default=0)
+    replay.add_argument("--market", choices=["spot", "futures"], default="spot")
+
+    args = parser.parse_args()
+    store = KlineStore()
+    if args.command == "record":
+        ingestor = StreamIngestor(store, WebsocketSource(args.streams, args.market), args.market, args.out)
+        ingestor.run()
+    else:
+        started = time.perf_counter()
+        StreamIngestor(store, ReplaySource(args.path, args.speed), args.market).run()
+        elapsed = time.perf_counter() - started
+        print(f"{store.messages} messages, {len(store)} windows in {elapsed:.2f}s "
+              f"({store.messages / max(elapsed, 1e-9):,.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Local copy of Binance's spot and futures symbol lists.
+
+``exchangeInfo`` is fetched once per market type in the background and then
+refreshed periodically, so validating a symbol is a dict lookup instead of a
+round trip. Each entry also keeps the price and quantity filters, which
+``format_price`` uses to print prices at the symbol's tick precision.
+
+Until a market's first load succeeds every symbol is reported as unknown and
+callers fall back to what the price call tells them. Afterwards a symbol
+missing from the list is invalid, so a new listing is only accepted from the
+next refresh on.
+"""
+from decimal import Decimal
+
+from config import binance_url
+from refresh import PeriodicRefresher
+
+REFRESH_INTERVAL = 10 * 60  # Also how long a new listing can be turned away
+MARKET_TYPES = ("spot", "futures")
+
+
+class UnknownSymbol(LookupError):
+    """Raised when Binance answers a symbol lookup with "Invalid symbol\""""
+
+
+def _decimals(step):
+    """Digits after the decimal point of a filter step such as "0.01000000" (2)"""
+    exponent = Decimal(step).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+
+def parse_exchange_info(raw):
+    """Map symbol -> ``{"status", "base_asset", "quote_asset", "tick_size", "price_decimals", "step_size", "quantity_decimals"}``"""
+    symbols = {}
+    for entry in raw.get("symbols", []):
+        filters = {f["filterType"]: f for f in entry.get("filters", [])}
+        tick_size = filters.get("PRICE_FILTER", {}).get("tickSize")
+        step_size = filters.get("LOT_SIZE", {}).get("stepSize")
+        symbols[entry["symbol"]] = {
+            "status": entry.get("status"),
+            "base_asset": entry.get("baseAsset"),
+            "quote_asset": entry.get("quoteAsset"),
+            "tick_size": float(tick_size) if tick_size else None,
+            "price_decimals": _decimals(tick_size) if tick_size else entry.get("pricePrecision"),
+            "step_size": float(step_size) if step_size else None,
+            "quantity_decimals": _decimals(step_size) if step_size else entry.get("quantityPrecision"),
+        }
+    return symbols
+
+
+def fetch_exchange_info(market_type):
+    import http_client
+
+    return parse_exchange_info(http_client.get_json(f"{binance_url(market_type)}/exchangeInfo"))
+
+
+class SymbolRegistry:
+    """Symbol metadata per market type, kept fresh by one ``PeriodicRefresher`` each"""
+
+    def __init__(self, fetch=fetch_exchange_info, interval=REFRESH_INTERVAL):
+        self._refreshers = {
+            market_type: PeriodicRefresher(lambda market_type=market_type: fetch(market_type), interval,
+                                           name=f"exchange-info-{market_type}")
+            for market_type in MARKET_TYPES
+        }
+
+    def start(self):
+        """Start loading both markets now instead of on first lookup"""
+        for refresher in self._refreshers.values():
+            refresher.start()
+
+    def symbols(self, market_type):
+        """symbol -> metadata for ``market_type``, or None until the first load succeeds"""
+        refresher = self._refreshers.get(market_type)
+        return refresher.get() if refresher is not None else None
+
+    def get(self, market_type, symbol):
+        symbols = self.symbols(market_type)
+        return symbols.get(symbol.upper()) if symbols else None
+
+    def listed(self, market_type, symbol):
+        """True if trading, False if not (or not listed), None before the market has loaded"""
+        symbols = self.symbols(market_type)
+        if symbols is None:
+            return None
+        info = symbols.get(symbol.upper())
+        return info is not None and info["status"] == "TRADING"
+
+    def price_decimals(self, market_type, symbol):
+        info = self.get(market_type, symbol)
+        return info["price_decimals"] if info is not None else None
+
+    def age(self, market_type):
+        refresher = self._refreshers.get(market_type)
+        return refresher.age() if refresher is not None else None
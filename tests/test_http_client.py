@@ -0,0 +1,114 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import http_client
+from upstream_scheduler import BACKGROUND, INTERACTIVE, UpstreamScheduler, priority
+
+HOST = "api.binance.com"
+URL = f"https://{HOST}/api/v3/ticker/price"
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+
+class Upstream:
+    """Stands in for the pooled session; every GET blocks until ``release``"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+        self.error = None
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        self.started.release()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return Response()
+
+
+class TrackedFlights(http_client.ResponseCache):
+    """Signals every GET that joins one already in flight"""
+
+    def __init__(self):
+        super().__init__("test_in_flight")
+        self.joined = threading.Semaphore(0)
+
+    def _lookup(self, key):
+        outcome, found = super()._lookup(key)
+        if outcome == "shared":
+            self.joined.release()
+        return outcome, found
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = Upstream()
+    monkeypatch.setattr(http_client._session, "get", upstream.get)
+    monkeypatch.setattr(http_client, "SCHEDULER", UpstreamScheduler({HOST: 6000}))
+    monkeypatch.setattr(http_client, "_in_flight", TrackedFlights())
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt: None)
+    return upstream
+
+
+def get(params=None, level=INTERACTIVE):
+    with priority(level):
+        return http_client.get(URL, params=params)
+
+
+def test_identical_gets_in_flight_share_one_request(upstream):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(get, {"symbol": "BTCUSDT"})
+        assert upstream.started.acquire(timeout=5)
+        others = [executor.submit(get, {"symbol": "BTCUSDT"}) for _ in range(3)]
+        for _ in others:
+            assert http_client._in_flight.joined.acquire(timeout=5)
+        upstream.release.set()
+        responses = [future.result(5) for future in [first] + others]
+
+    assert len(upstream.calls) == 1
+    assert all(response is responses[0] for response in responses)
+
+
+def test_different_params_are_separate_requests(upstream):
+    upstream.release.set()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(get, [{"symbol": "BTCUSDT"}, {"symbol": "ETHUSDT"}]))
+    assert sorted(params["symbol"] for _, params in upstream.calls) == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_priorities_do_not_share_a_request(upstream):
+    # A background flight can be shed on a retry; an interactive caller must not inherit that
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        background = executor.submit(get, None, BACKGROUND)
+        assert upstream.started.acquire(timeout=5)
+        interactive = executor.submit(get, None, INTERACTIVE)
+        assert upstream.started.acquire(timeout=5)
+        upstream.release.set()
+        background.result(5), interactive.result(5)
+    assert len(upstream.calls) == 2
+
+
+def test_a_failed_request_fails_every_caller_and_is_not_reused(upstream):
+    upstream.error = requests.ConnectionError("reset")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(get)
+        assert upstream.started.acquire(timeout=5)
+        joined = executor.submit(get)
+        assert http_client._in_flight.joined.acquire(timeout=5)
+        upstream.release.set()
+        for future in (first, joined):
+            with pytest.raises(requests.ConnectionError):
+                future.result(5)
+    assert len(upstream.calls) == http_client.MAX_RETRIES + 1  # One flight, retried
+
+    upstream.error = None
+    get()
+    assert len(upstream.calls) == http_client.MAX_RETRIES + 2
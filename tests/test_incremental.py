@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeatureFrame
+from incremental import ADX, ATR, EMA, MACD, RSI, IncrementalIndicator, IndicatorState, StochRSI
+
+CANDLES = 400
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, CANDLES)))
+    spread = np.abs(rng.normal(0, 0.005, CANDLES)) * close
+    return pd.DataFrame({
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1, 10, CANDLES),
+    })
+
+
+def _series(indicator, df, read):
+    values = []
+    for high, low, close in zip(df["high"], df["low"], df["close"]):
+        indicator.append(high, low, close)
+        values.append(read(indicator))
+    return np.array(values)
+
+
+@pytest.mark.parametrize("name, make, read, batch", [
+    ("ema50", lambda: EMA(50), lambda i: i.value, lambda f: f.ema(50)),
+    ("ema200", lambda: EMA(200), lambda i: i.value, lambda f: f.ema(200)),
+    ("macd", MACD, lambda i: i.macd, lambda f: f.macd),
+    ("macd_signal", MACD, lambda i: i.signal, lambda f: f.macd_signal),
+    ("rsi", RSI, lambda i: i.value, lambda f: f.rsi),
+    ("stoch_rsi", StochRSI, lambda i: i.value, lambda f: f.stoch_rsi),
+    ("atr", ATR, lambda i: i.value, lambda f: f.atr(14)),
+    ("adx", ADX, lambda i: i.adx, lambda f: f.directional_index[2]),
+    ("plus_di", ADX, lambda i: i.plus_di, lambda f: f.directional_index[0]),
+    ("minus_di", ADX, lambda i: i.minus_di, lambda f: f.directional_index[1]),
+])
+def test_append_matches_the_batch_series(candles, name, make, read, batch):
+    incremental = _series(make(), candles, read)
+    np.testing.assert_allclose(incremental, batch(FeatureFrame(candles)), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_revise_matches_the_batch_series_of_the_updated_candle(candles):
+    history, last = candles.iloc[:-1], candles.iloc[-1]
+    state = IndicatorState()
+    for high, low, close in zip(history["high"], history["low"], history["close"]):
+        state.append(high, low, close)
+
+    # The open candle ticks a few times before it closes
+    state.append(last["high"], last["low"], last["close"])
+    for factor in (1.01, 0.98, 1.002):
+        revised = candles.copy()
+        revised.iloc[-1, revised.columns.get_indexer(["high", "low", "close"])] = last[["high", "low", "close"]] * factor
+        state.revise(*revised.iloc[-1][["high", "low", "close"]])
+
+        features = FeatureFrame(revised)
+        plus_di, minus_di, adx = features.directional_index
+        expected = {
+            "ema50": features.ema(50), "ema200": features.ema(200),
+            "macd": features.macd, "macd_signal": features.macd_signal,
+            "rsi": features.rsi, "stoch_rsi": features.stoch_rsi,
+            "adx": adx, "plus_di": plus_di, "minus_di": minus_di, "atr": features.atr(14),
+        }
+        for name, value in state.snapshot().items():
+            assert value == pytest.approx(expected[name][-1], rel=1e-9, abs=1e-9), name
+
+
+def test_the_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        IncrementalIndicator()
@@ -0,0 +1,114 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from features import SERIES
+from indicator_registry import IndicatorContext, IndicatorRegistry
+
+
+class Recorder:
+    """Series table whose computations log their name, like ``features.SERIES`` over a feature frame"""
+
+    def __init__(self):
+        self.log = []
+        self._lock = threading.Lock()
+        self.series = {
+            "a": ((), self._compute("a")),
+            "b": (("a",), self._compute("b")),
+            "c": (("a", "b"), self._compute("c")),
+            "d": ((), self._compute("d")),
+        }
+
+    def _compute(self, name):
+        def compute(features):
+            with self._lock:
+                self.log.append(name)
+        return compute
+
+    def verdict(self, name):
+        def verdict(context):
+            with self._lock:
+                self.log.append(name)
+            return {"verdict": "yes", "explanation": name}
+        return verdict
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def registry(recorder):
+    registry = IndicatorRegistry(series=recorder.series)
+    registry.register("Trend", recorder.verdict("Trend"), inputs=("df",), series=("c",))
+    registry.register("Book", recorder.verdict("Book"), inputs=("order_book",))
+    registry.register("Momentum", recorder.verdict("Momentum"), inputs=("df",), series=("b", "d"))
+    registry.register("Mood", recorder.verdict("Mood"), inputs=("sentiment",))
+    return registry
+
+
+def context():
+    return IndicatorContext({}, "BTCUSDT", "spot", "long")
+
+
+def test_series_are_ordered_after_their_dependencies(registry):
+    assert registry.plan().series == ("a", "b", "c", "d")
+    assert registry.plan(["Momentum"]).series == ("a", "b", "d")
+
+
+def test_inputs_cover_the_selected_indicators_only(registry):
+    assert registry.required_inputs(["Book", "Mood"]) == {"order_book", "sentiment"}
+    assert registry.required_inputs(["Momentum"]) == {"df"}
+    assert registry.required_inputs() == {"df", "order_book", "sentiment"}
+
+
+@pytest.mark.parametrize("workers", [None, 4])
+def test_every_series_runs_once_before_its_readers(registry, recorder, workers):
+    executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+    try:
+        verdicts = registry.plan().run(context(), executor)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    assert list(verdicts) == ["Trend", "Book", "Momentum", "Mood"]
+    assert sorted(recorder.log) == sorted(["a", "b", "c", "d", "Trend", "Book", "Momentum", "Mood"])
+    position = {name: recorder.log.index(name) for name in recorder.log}
+    assert position["a"] < position["b"] < position["c"] < position["Trend"]
+    assert position["b"] < position["Momentum"] and position["d"] < position["Momentum"]
+
+
+def test_a_subset_run_computes_only_the_series_it_needs(registry, recorder):
+    plan = registry.plan()
+    results = dict(plan.iter_run(context(), names=["Momentum", "Mood"]))
+    assert set(results) == {"Momentum", "Mood"}
+    assert recorder.log == ["a", "b", "d", "Momentum", "Mood"]
+
+
+def test_ready_waits_for_each_indicator_s_inputs(registry):
+    plan = registry.plan()
+    assert plan.ready({"df": None}) == ["Trend", "Momentum"]
+    assert plan.ready({"df": None, "sentiment": None}, done={"Trend": None}) == ["Momentum", "Mood"]
+
+
+def test_parse_is_case_insensitive_and_in_display_order(registry):
+    assert registry.parse("mood, trend") == ("Trend", "Mood")
+    assert registry.parse(None) == registry.names()
+    with pytest.raises(ValueError):
+        registry.parse("Volume")
+
+
+def test_register_rejects_duplicates_and_unknown_series(registry):
+    with pytest.raises(ValueError):
+        registry.register("Trend", lambda context: None)
+    with pytest.raises(ValueError):
+        registry.register("Other", lambda context: None, series=("z",))
+
+
+def test_the_default_series_table_is_a_dag():
+    plan = IndicatorRegistry().plan([])
+    ordered = plan._closure(SERIES)
+    for position, name in enumerate(ordered):
+        assert set(SERIES[name][0]) <= set(ordered[:position])
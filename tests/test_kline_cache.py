@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from kline_cache import KLINE_COLUMNS, KlineCache, merge_klines, parse_klines, tail, to_frame
+
+HOUR = 3_600_000
+
+
+def raw_klines(opens, close=100.0):
+    return [[t, str(close), str(close + 1), str(close - 1), str(close), "10.0", t + HOUR - 1,
+             "1000.0", 5, "4.0", "400.0", "0"] for t in opens]
+
+
+def test_parse_klines_types_each_column():
+    columns = parse_klines(raw_klines([0, HOUR]))
+    assert list(columns) == KLINE_COLUMNS
+    assert columns["timestamp"].dtype == np.int64
+    assert columns["close"].dtype == np.float64
+    assert columns["trades"].tolist() == [5, 5]
+
+
+def test_parse_klines_of_an_error_payload_is_empty():
+    columns = parse_klines({"code": -1121, "msg": "Invalid symbol."})
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_merge_replaces_the_overlapping_tail():
+    cached = parse_klines(raw_klines([0, HOUR, 2 * HOUR], close=100.0))
+    # The last cached candle was still open; the fresh page repeats it with its final close
+    fresh = parse_klines(raw_klines([2 * HOUR, 3 * HOUR], close=105.0))
+    merged = merge_klines(cached, fresh)
+    assert merged["timestamp"].tolist() == [0, HOUR, 2 * HOUR, 3 * HOUR]
+    assert merged["close"].tolist() == [100.0, 100.0, 105.0, 105.0]
+    assert list(merged) == KLINE_COLUMNS
+
+
+def test_merge_of_a_page_starting_inside_the_window_drops_the_duplicates():
+    cached = parse_klines(raw_klines([0, HOUR, 2 * HOUR, 3 * HOUR]))
+    fresh = parse_klines(raw_klines([HOUR, 2 * HOUR], close=90.0))
+    merged = merge_klines(cached, fresh)
+    assert merged["timestamp"].tolist() == [0, HOUR, 2 * HOUR]
+    assert merged["close"].tolist() == [100.0, 90.0, 90.0]
+
+
+def test_merge_of_an_empty_page_keeps_the_cache():
+    cached = parse_klines(raw_klines([0, HOUR]))
+    assert merge_klines(cached, parse_klines([])) is cached
+
+
+@pytest.mark.parametrize("cached_opens", [[0, HOUR], []])
+def test_merge_of_a_page_that_does_not_continue_the_cache_is_none(cached_opens):
+    assert merge_klines(parse_klines(raw_klines(cached_opens)), parse_klines(raw_klines([3 * HOUR]))) is None
+
+
+def test_tail_and_frame():
+    columns = parse_klines(raw_klines([0, HOUR, 2 * HOUR]))
+    df = to_frame(tail(columns, 2))
+    assert list(df.columns) == KLINE_COLUMNS
+    assert df["timestamp"].tolist() == [HOUR, 2 * HOUR]
+
+
+def test_cache_evicts_least_recently_used_over_budget():
+    columns = parse_klines(raw_klines(range(0, 10 * HOUR, HOUR)))
+    size = sum(values.nbytes for values in columns.values())
+    cache = KlineCache(max_bytes=2 * size)
+    cache.put("a", columns)
+    cache.put("b", columns)
+    assert cache.get("a") is columns  # "b" is now the least recently used
+    cache.put("c", columns)
+    assert cache.get("b") is None
+    assert cache.get("a") is columns and cache.get("c") is columns
+    assert len(cache) == 2
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from order_book import LocalOrderBook, parse_depth
+
+SNAPSHOT_ID = 100
+
+
+def snapshot(last_update_id=SNAPSHOT_ID):
+    return parse_depth({"lastUpdateId": last_update_id,
+                        "bids": [["100.0", "1.0"], ["99.0", "2.0"]],
+                        "asks": [["101.0", "1.0"], ["102.0", "2.0"]]})
+
+
+def diff(first, final, bids=(), asks=(), previous=None):
+    event = {"e": "depthUpdate", "U": first, "u": final, "b": list(bids), "a": list(asks)}
+    if previous is not None:
+        event["pu"] = previous  # Futures diffs carry the previous diff's final id
+    return event
+
+
+def levels(book):
+    depth = book.depth()
+    return (dict(zip(depth["bid_price"].tolist(), depth["bid_qty"].tolist())),
+            dict(zip(depth["ask_price"].tolist(), depth["ask_qty"].tolist())))
+
+
+def test_diffs_before_the_snapshot_are_buffered_and_replayed():
+    book = LocalOrderBook()
+    assert book.update(diff(95, 99, bids=[["98.0", "5.0"]]))  # Older than the snapshot
+    assert book.update(diff(100, 103, bids=[["100.0", "0"]]))  # Straddles lastUpdateId + 1
+    assert book.update(diff(104, 105, asks=[["101.5", "3.0"]]))
+    assert not book.synced
+
+    book.seed(snapshot())
+    assert book.synced
+    assert levels(book) == ({99.0: 2.0}, {101.0: 1.0, 101.5: 3.0, 102.0: 2.0})
+    assert book.depth()["last_update_id"] == 105
+
+
+def test_diffs_already_in_the_snapshot_are_ignored():
+    book = LocalOrderBook()
+    book.seed(snapshot())
+    assert book.update(diff(90, SNAPSHOT_ID, bids=[["100.0", "9.0"]]))
+    assert levels(book) == ({100.0: 1.0, 99.0: 2.0}, {101.0: 1.0, 102.0: 2.0})
+
+    assert book.update(diff(101, 102, bids=[["100.0", "4.0"]]))
+    assert book.update(diff(97, 101, bids=[["100.0", "9.0"]]))  # Stale redelivery
+    assert levels(book)[0] == {100.0: 4.0, 99.0: 2.0}
+
+
+@pytest.mark.parametrize("events", [
+    [diff(102, 103)],  # First diff skips lastUpdateId + 1
+    [diff(101, 102), diff(104, 105)],  # Gap between two diffs
+])
+def test_a_gap_drops_the_book_until_the_next_snapshot(events):
+    book = LocalOrderBook()
+    book.seed(snapshot())
+    assert [book.update(event) for event in events][-1] is False
+    assert not book.synced
+    assert levels(book) == ({}, {})
+
+    # Diffs keep buffering and bridge the next snapshot
+    assert book.update(diff(106, 110, asks=[["101.0", "0"]]))
+    book.seed(snapshot(107))
+    assert book.synced
+    assert levels(book)[1] == {102.0: 2.0}
+
+
+def test_futures_start_at_last_update_id_and_follow_pu():
+    book = LocalOrderBook()
+    book.seed(snapshot())
+    assert book.update(diff(90, 99, bids=[["100.0", "9.0"]], previous=89))  # Before the snapshot
+    # Ends exactly at lastUpdateId, which spot would drop as already applied
+    assert book.update(diff(95, SNAPSHOT_ID, bids=[["100.0", "3.0"]], previous=94))
+    # Futures ids are not contiguous; only pu has to match the last u
+    assert book.update(diff(120, 130, asks=[["101.0", "0"]], previous=SNAPSHOT_ID))
+    assert book.update(diff(131, 140, bids=[["99.5", "1.5"]], previous=130))
+    assert levels(book) == ({100.0: 3.0, 99.5: 1.5, 99.0: 2.0}, {102.0: 2.0})
+    assert book.depth()["last_update_id"] == 140
+
+    assert book.update(diff(150, 160, previous=145)) is False
+    assert not book.synced
+
+
+def test_a_futures_first_diff_after_last_update_id_is_a_gap():
+    book = LocalOrderBook()
+    book.seed(snapshot())
+    assert book.update(diff(101, 110, previous=99)) is False
+    assert not book.synced
+
+
+def test_depth_is_sorted_best_first():
+    book = LocalOrderBook()
+    book.seed(snapshot())
+    book.update(diff(101, 101, bids=[["99.5", "1.0"]], asks=[["100.5", "1.0"]]))
+    depth = book.depth()
+    np.testing.assert_array_equal(depth["bid_price"], [100.0, 99.5, 99.0])
+    np.testing.assert_array_equal(depth["ask_price"], [100.5, 101.0, 102.0])
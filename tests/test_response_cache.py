@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+class TrackedCache(ResponseCache):
+    """Signals every request that joins a computation in progress"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.joined = threading.Semaphore(0)
+
+    def _lookup(self, key):
+        outcome, found = super()._lookup(key)
+        if outcome == "shared":
+            self.joined.release()
+        return outcome, found
+
+
+@pytest.fixture
+def cache(clock):
+    return TrackedCache("test", max_entries=3, clock=clock)
+
+
+def test_a_result_is_kept_until_it_expires(cache, clock):
+    assert cache.get_or_compute("k", lambda: 1, expires_at=clock.now + 10) == (1, "miss")
+    assert cache.get_or_compute("k", lambda: 2, expires_at=clock.now + 10) == (1, "hit")
+    assert cache.get("k") == 1
+
+    clock.now += 10
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: 3, expires_at=clock.now + 10) == (3, "miss")
+
+
+def test_an_already_expired_result_is_not_stored(cache, clock):
+    cache.get_or_compute("k", lambda: 1, expires_at=0)
+    cache.put("p", 1, expires_at=clock.now)
+    assert len(cache) == 0
+
+
+def test_concurrent_misses_compute_once(cache, clock):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(cache.get_or_compute, "k", compute, clock.now + 10)
+        started.wait(5)
+        waiters = [executor.submit(cache.get_or_compute, "k", compute, clock.now + 10) for _ in range(3)]
+        for _ in waiters:
+            assert cache.joined.acquire(timeout=5)
+        release.set()
+        results = [first.result(5)] + [waiter.result(5) for waiter in waiters]
+
+    assert len(calls) == 1
+    assert results[0] == ("value", "miss")
+    assert results[1:] == [("value", "shared")] * 3
+
+
+def test_an_error_reaches_every_waiter_and_is_not_cached(cache, clock):
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise LookupError("unknown symbol")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(cache.get_or_compute, "k", fail, clock.now + 10)
+        started.wait(5)
+        waiter = executor.submit(cache.get_or_compute, "k", fail, clock.now + 10)
+        assert cache.joined.acquire(timeout=5)
+        release.set()
+        for future in (first, waiter):
+            with pytest.raises(LookupError):
+                future.result(5)
+
+    assert len(cache) == 0
+    assert cache.get_or_compute("k", lambda: 1, clock.now + 10) == (1, "miss")
+
+
+def test_async_misses_compute_once(cache, clock):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute_async("k", compute, clock.now + 10) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in results) == ["miss", "shared", "shared"]
+    assert {value for value, _ in results} == {"value"}
+
+
+def test_expired_then_oldest_entries_are_evicted_first(cache, clock):
+    cache.put("old", 1, expires_at=clock.now + 100)
+    cache.put("short", 2, expires_at=clock.now + 1)
+    cache.put("new", 3, expires_at=clock.now + 100)
+    clock.now += 1
+    cache.put("newer", 4, expires_at=clock.now + 100)
+    assert len(cache) == 3 and cache.get("old") == 1  # "short" expired and made room
+
+    cache.put("newest", 5, expires_at=clock.now + 100)
+    assert cache.get("old") is None
+    assert [cache.get(key) for key in ("new", "newer", "newest")] == [3, 4, 5]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kline_cache import KLINE_COLUMNS
+from timeframes import base_interval, divides, interval_to_ms, next_candle_open, resample_klines
+
+HOUR = 3_600_000
+DAY = 24 * HOUR
+MONDAY = pd.Timestamp("2024-01-01").value // 1_000_000  # 2024-01-01 was a Monday
+
+
+def klines(start, count, step=HOUR):
+    """``count`` fine candles from ``start`` whose open, high, low and close encode their position"""
+    opens = start + step * np.arange(count)
+    i = np.arange(count, dtype=np.float64)
+    return pd.DataFrame({
+        "timestamp": opens, "open": 100 + i, "high": 200 + i, "low": 50 - i, "close": 101 + i,
+        "volume": np.ones(count), "close_time": opens + step - 1, "quote_asset_volume": np.full(count, 2.0),
+        "trades": np.full(count, 3), "taker_buy_base_asset_volume": np.full(count, 0.5),
+        "taker_buy_quote_asset_volume": np.full(count, 1.0), "ignore": "0",
+    })[KLINE_COLUMNS]
+
+
+def test_buckets_align_to_the_epoch_and_aggregate_each_column():
+    candles = resample_klines(klines(MONDAY, 8), "4h")
+    assert candles["timestamp"].tolist() == [MONDAY, MONDAY + 4 * HOUR]
+    assert candles["close_time"].tolist() == [MONDAY + 4 * HOUR - 1, MONDAY + 8 * HOUR - 1]
+    first = candles.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (100, 203, 47, 104)
+    assert (first["volume"], first["quote_asset_volume"], first["trades"]) == (4, 8, 12)
+    assert list(candles.columns) == KLINE_COLUMNS
+    assert candles["trades"].dtype == np.int64
+
+
+def test_a_leading_partial_bucket_is_dropped():
+    # 02:00 to 09:00: the 00:00 bucket is missing its first two hours
+    candles = resample_klines(klines(MONDAY + 2 * HOUR, 8), "4h")
+    assert candles["timestamp"].tolist() == [MONDAY + 4 * HOUR, MONDAY + 8 * HOUR]
+    assert candles.iloc[0]["open"] == 102  # The 04:00 fine candle
+
+
+def test_a_trailing_partial_bucket_is_kept_like_an_open_candle():
+    candles = resample_klines(klines(MONDAY, 6), "4h")
+    assert candles["timestamp"].tolist() == [MONDAY, MONDAY + 4 * HOUR]
+    assert candles.iloc[-1]["volume"] == 2
+    assert candles.iloc[-1]["close"] == 106
+
+
+def test_weeks_start_on_monday():
+    # Thursday 2024-01-04 through two full weeks
+    candles = resample_klines(klines(MONDAY + 3 * DAY, 18, step=DAY), "1w")
+    assert candles["timestamp"].tolist() == [MONDAY + 7 * DAY, MONDAY + 14 * DAY]
+    assert candles.iloc[0]["volume"] == 7
+
+
+def test_months_start_on_the_first():
+    january = pd.Timestamp("2024-01-01").value // 1_000_000
+    candles = resample_klines(klines(january, 60, step=DAY), "1M")
+    february = pd.Timestamp("2024-02-01").value // 1_000_000
+    assert candles["timestamp"].tolist() == [january, february]
+    assert candles["volume"].tolist() == [31, 29]
+
+
+@pytest.mark.parametrize("interval, ms", [("1m", 60_000), ("15m", 900_000), ("4h", 4 * HOUR), ("1w", 7 * DAY)])
+def test_interval_to_ms(interval, ms):
+    assert interval_to_ms(interval) == ms
+
+
+@pytest.mark.parametrize("interval", ["h", "1x", "-1h"])
+def test_interval_to_ms_rejects_invalid_intervals(interval):
+    with pytest.raises(ValueError):
+        interval_to_ms(interval)
+
+
+def test_next_candle_open():
+    assert next_candle_open("4h", MONDAY + 5 * HOUR) == MONDAY + 8 * HOUR
+    assert next_candle_open("4h", MONDAY + 4 * HOUR) == MONDAY + 8 * HOUR  # A candle opening now is in progress
+    assert next_candle_open("1w", MONDAY + 3 * DAY) == MONDAY + 7 * DAY
+    assert next_candle_open("1M", pd.Timestamp("2024-12-15").value // 1_000_000) == \
+        pd.Timestamp("2025-01-01").value // 1_000_000
+
+
+def test_divides_and_base_interval():
+    assert divides("1h", "4h") and divides("1d", "1w") and divides("1h", "1M")
+    assert not divides("3m", "5m") and not divides("1w", "1M") and not divides("1M", "1w")
+    assert base_interval(["4h", "1d"], ["15m", "1h", "4h", "1w"]) == "4h"
+    assert base_interval(["5m", "3m"], ["1m", "3m", "5m"]) == "1m"
+    with pytest.raises(ValueError):
+        base_interval(["1M"], ["1w"])
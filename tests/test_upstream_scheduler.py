@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from upstream_scheduler import (BACKGROUND, INTERACTIVE, MAX_WAIT, UpstreamScheduler, UpstreamShed,
+                                UpstreamThrottled, WINDOW)
+
+HOST = "api.binance.com"
+LIMIT = 1000
+
+
+class FakeClock:
+    """Manual time: sleeping advances it instantly and records how long"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    async def sleep_async(self, seconds):
+        self.sleep(seconds)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(start=WINDOW * 1000)
+
+
+@pytest.fixture
+def scheduler(clock):
+    return UpstreamScheduler({HOST: LIMIT}, clock=clock.time, sleep=clock.sleep, async_sleep=clock.sleep_async)
+
+
+def test_background_is_shed_past_its_share(scheduler, clock):
+    scheduler.acquire(HOST, 590, BACKGROUND)
+    assert not scheduler.under_pressure(HOST)
+
+    with pytest.raises(UpstreamShed):
+        scheduler.acquire(HOST, 20, BACKGROUND)  # 610 > 60%
+    assert scheduler.under_pressure(HOST) is False  # The refused request spent nothing
+
+    scheduler.acquire(HOST, 20, INTERACTIVE)  # Interactive still fits below 90%
+    assert scheduler.used(HOST) == 610
+    assert scheduler.under_pressure(HOST)
+    assert clock.slept == []
+
+
+def test_reported_weight_counts_towards_the_shares(scheduler):
+    scheduler.observe(HOST, used_weight=600)
+    with pytest.raises(UpstreamShed):
+        scheduler.acquire(HOST, 1, BACKGROUND)
+
+
+def test_interactive_fails_fast_past_its_share_when_the_wait_is_long(scheduler, clock):
+    scheduler.acquire(HOST, 895, INTERACTIVE)
+    clock.advance(10)  # 50s left in the window, more than MAX_WAIT
+
+    with pytest.raises(UpstreamThrottled) as raised:
+        scheduler.acquire(HOST, 10, INTERACTIVE)  # 905 > 90%
+    assert not isinstance(raised.value, UpstreamShed)
+    assert clock.slept == []
+
+
+def test_interactive_waits_for_the_next_window_near_the_boundary(scheduler, clock):
+    scheduler.acquire(HOST, 900, INTERACTIVE)
+    clock.advance(WINDOW - MAX_WAIT + 2)  # 3s before the window rolls over
+
+    scheduler.acquire(HOST, 10, INTERACTIVE)
+    assert clock.slept == [pytest.approx(MAX_WAIT - 2)]
+    assert scheduler.used(HOST) == 10  # Spent in the new window
+
+
+def test_async_acquire_waits_on_the_injected_sleep(scheduler, clock):
+    scheduler.acquire(HOST, 900, INTERACTIVE)
+    clock.advance(WINDOW - 1)
+
+    asyncio.run(scheduler.acquire_async(HOST, 10, INTERACTIVE))
+    assert clock.slept == [pytest.approx(1)]
+    assert scheduler.used(HOST) == 10
+
+
+def test_a_ban_blocks_every_priority(scheduler, clock):
+    scheduler.observe(HOST, retry_after=2)
+    scheduler.acquire(HOST, 1, INTERACTIVE)
+    assert clock.slept == [pytest.approx(2)]
+
+    scheduler.observe(HOST, retry_after=2)
+    with pytest.raises(UpstreamShed):
+        scheduler.acquire(HOST, 1, BACKGROUND)
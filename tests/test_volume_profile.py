@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from volume_profile import volume_profile
+
+BINS = 10
+
+
+def reference_profile(close, volume, num_bins=BINS):
+    """The row-by-row binning ``volume_profile_verdict`` used before it was vectorized"""
+    price_bins = np.linspace(float(close.min()), float(close.max()), num_bins + 1)
+    profile = defaultdict(float)
+    for price, vol in zip(close, volume):
+        for i in range(num_bins):
+            if price_bins[i] <= price < price_bins[i + 1]:
+                profile[price_bins[i]] += vol
+                break
+    return price_bins, dict(profile)
+
+
+def reference_spread(high, low, close, volume, edges):
+    """Each candle's volume spread uniformly over its high-low range, one bin at a time"""
+    volumes = np.zeros(len(edges) - 1)
+    for h, l, c, v in zip(high, low, close, volume):
+        if h == l:
+            i = min(int(np.searchsorted(edges, c, side="right")) - 1, len(volumes) - 1)
+            volumes[i] += v
+            continue
+        for i in range(len(volumes)):
+            overlap = min(h, edges[i + 1]) - max(l, edges[i])
+            if overlap > 0:
+                volumes[i] += v * overlap / (h - l)
+    return volumes
+
+
+@pytest.fixture(params=[7, 11, 23])
+def candles(request):
+    rng = np.random.default_rng(request.param)
+    rows = 500
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))), 2)  # Ticks put closes on bin edges
+    spread = np.abs(rng.normal(0, 0.004, rows)) * close
+    spread[::50] = 0  # Some candles never traded away from their close
+    return close + spread, close - spread, close, rng.uniform(1, 10, rows)
+
+
+def test_close_profile_matches_the_row_loop(candles):
+    high, low, close, volume = candles
+    edges, volumes, touched = volume_profile(high, low, close, volume, num_bins=BINS)
+    price_bins, expected = reference_profile(close, volume)
+
+    np.testing.assert_array_equal(edges, price_bins)
+    assert {float(edges[i]) for i in np.flatnonzero(touched)} == set(expected)
+    for i in np.flatnonzero(touched):
+        assert volumes[i] == pytest.approx(expected[edges[i]], rel=1e-12)
+
+
+def test_the_maximum_close_is_left_out_like_the_row_loop(candles):
+    high, low, close, volume = candles
+    _, volumes, _ = volume_profile(high, low, close, volume, num_bins=BINS)
+    assert volumes.sum() == pytest.approx(volume[close < close.max()].sum(), rel=1e-12)
+
+
+def test_lookback_profiles_only_the_last_candles(candles):
+    high, low, close, volume = candles
+    recent = volume_profile(high, low, close, volume, num_bins=BINS, lookback=100)
+    expected = volume_profile(high[-100:], low[-100:], close[-100:], volume[-100:], num_bins=BINS)
+    for got, want in zip(recent, expected):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_spread_profile_matches_the_per_bin_overlap(candles):
+    high, low, close, volume = candles
+    edges, volumes, touched = volume_profile(high, low, close, volume, num_bins=BINS, spread=True)
+
+    assert edges[0] == low.min() and edges[-1] == high.max()
+    np.testing.assert_allclose(volumes, reference_spread(high, low, close, volume, edges), rtol=1e-9)
+    assert volumes.sum() == pytest.approx(volume.sum(), rel=1e-9)  # Nothing falls outside the range
+    np.testing.assert_array_equal(touched, volumes > 0)
+
+
+@pytest.mark.parametrize("trade_type", ["long", "short"])
+def test_verdict_matches_the_baseline(candles, trade_type):
+    from main import volume_profile_verdict
+
+    high, low, close, volume = candles
+    for end in range(60, len(close) + 1, 40):
+        df = pd.DataFrame({"high": high[:end], "low": low[:end], "close": close[:end], "volume": volume[:end]})
+        price_bins, profile = reference_profile(df["close"].to_numpy(), df["volume"].to_numpy())
+        max_volume = max(profile.values()) if profile else 0
+        strong_zones = [level for level, vol in profile.items() if vol >= max_volume * 0.7]
+        current_price = float(df["close"].iloc[-1])
+        near = any(level <= current_price <= level + (price_bins[1] - price_bins[0]) for level in strong_zones)
+
+        result = volume_profile_verdict(df, trade_type)
+        assert result["verdict"] == ("yes" if near == (trade_type == "long") else "no")
+        assert result["explanation"].startswith(f"Strong Zones: {len(strong_zones)} |")
@@ -0,0 +1,94 @@
+"""Binance interval helpers"""
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+_UNIT_MS = {
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+    "M": 2_592_000_000,  # 30 days; months are only approximated here
+}
+_DAY_MS = _UNIT_MS["d"]
+
+# Binance aligns candles to the UTC epoch, except weeks (Mondays) and months.
+# Days and weeks are expressed in hours so pandas honours the origin.
+_RESAMPLE_RULES = {"m": ("min", 1), "h": ("h", 1), "d": ("h", 24), "w": ("h", 168)}
+_WEEK_ORIGIN = pd.Timestamp("1970-01-05")
+
+_SUM_COLUMNS = ["volume", "quote_asset_volume", "trades",
+                "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume"]
+
+
+def interval_to_ms(interval):
+    """Length of one candle of ``interval`` (e.g. "15m", "4h") in milliseconds"""
+    value, unit = interval[:-1], interval[-1]
+    if unit not in _UNIT_MS or not value.isdigit():
+        raise ValueError(f"Invalid interval: {interval}")
+    return int(value) * _UNIT_MS[unit]
+
+
+def next_candle_open(interval, now_ms):
+    """Open time (ms) of the candle after the one in progress at ``now_ms``"""
+    step = interval_to_ms(interval)
+    if interval[-1] == "M":
+        now = pd.Timestamp(now_ms, unit="ms")
+        months = int(interval[:-1])
+        month = ((now.year * 12 + now.month - 1) // months + 1) * months
+        return int(pd.Timestamp(year=month // 12, month=month % 12 + 1, day=1).value // 1_000_000)
+
+    origin = _WEEK_ORIGIN.value // 1_000_000 if interval[-1] == "w" else 0
+    return origin + ((now_ms - origin) // step + 1) * step
+
+
+def divides(fine, coarse):
+    """True when ``coarse`` candles are built from whole, aligned ``fine`` candles"""
+    fine_ms = interval_to_ms(fine)
+    if coarse == "1M":
+        return _DAY_MS % fine_ms == 0
+    if fine == "1M":
+        return False
+    if coarse.endswith("w"):
+        return _DAY_MS % fine_ms == 0
+    return interval_to_ms(coarse) % fine_ms == 0
+
+
+def base_interval(intervals, candidates):
+    """Coarsest of ``candidates`` every interval in ``intervals`` can be resampled from"""
+    for candidate in sorted(candidates, key=interval_to_ms, reverse=True):
+        if all(divides(candidate, interval) for interval in intervals):
+            return candidate
+    raise ValueError(f"No common base interval for {intervals}")
+
+
+def _resample_args(interval):
+    value, unit = int(interval[:-1]), interval[-1]
+    if unit == "M":
+        return {"rule": f"{value}MS"}
+    rule, multiple = _RESAMPLE_RULES[unit]
+    return {"rule": f"{value * multiple}{rule}", "origin": _WEEK_ORIGIN if unit == "w" else "epoch"}
+
+
+def resample_klines(df, interval):
+    """Aggregate a finer kline frame into ``interval`` candles.
+
+    The leading bucket is dropped when the fine candles do not cover it from
+    its start; the trailing bucket is kept like Binance's still-open candle.
+    """
+    resample_args = _resample_args(interval)
+    index = pd.to_datetime(df["timestamp"], unit="ms")
+    grouped = df.set_index(index).resample(**resample_args, closed="left", label="left")
+
+    candles = grouped.agg({
+        "open": "first", "high": "max", "low": "min", "close": "last",
+        **{column: "sum" for column in _SUM_COLUMNS}, "ignore": "last",
+    })
+    candles = candles[grouped["timestamp"].count() > 0]
+    if len(candles) and candles.index[0] != index.iloc[0]:
+        candles = candles.iloc[1:]
+
+    starts = candles.index
+    candles.insert(0, "timestamp", (starts - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+    candles.insert(6, "close_time", (starts + to_offset(resample_args["rule"]) - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1) - 1)
+    candles["trades"] = candles["trades"].astype("int64")
+    return candles.reset_index(drop=True)
@@ -0,0 +1,217 @@
+"""Admission control for upstream requests against Binance's weight budget.
+
+Binance charges every REST call a weight (``/depth?limit=500`` costs 25
+times a ``/ticker/price``) against a per-IP budget per minute, and answers
+429 (then 418, banned) when it is exceeded. ``UpstreamScheduler`` prices each
+request with ``request_weight`` before it is sent and keeps a per-host ledger
+of the current minute, combining its own spending with the used weight
+Binance reports in ``X-MBX-USED-WEIGHT-1M``.
+
+Requests carry a priority from the ``priority`` context:
+
+* ``INTERACTIVE`` (the default, e.g. ``/analyze``) may use the budget up to
+  ``INTERACTIVE_SHARE``; past that it waits for the next minute, or fails
+  fast with ``UpstreamThrottled`` when that is more than ``MAX_WAIT`` away.
+* ``BACKGROUND`` (the periodic refreshers) stops at ``BACKGROUND_SHARE`` and
+  while any interactive request is waiting. It is shed with ``UpstreamShed``
+  rather than queued, and refreshers keep serving their last value.
+
+There is no queue: waiting interactive requests each sleep until the next
+window and retry, so they are admitted in no particular order, and the only
+priority rule is that background work never waits behind them.
+
+Callers can also degrade before anything is shed: ``under_pressure`` turns
+true once background work would be refused.
+
+The clock and both sleeps (blocking and async) are injectable, so tests can
+drive the scheduler on a fake clock without waiting:
+
+    scheduler = UpstreamScheduler(clock=clock.time, sleep=clock.sleep, async_sleep=clock.sleep_async)
+"""
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from urllib.parse import parse_qsl, urlparse
+
+import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Per-minute request weight limits published by Binance
+WEIGHT_LIMITS = {
+    "api.binance.com": 6000,
+    "fapi.binance.com": 2400,
+}
+INTERACTIVE_SHARE = 0.9  # Headroom left for other processes sharing the IP
+BACKGROUND_SHARE = 0.6
+MAX_WAIT = 5  # seconds; beyond this we fail fast instead of sleeping
+WINDOW = 60  # seconds; Binance counts weight per clock minute
+
+UPSTREAM_WEIGHT = metrics.counter("upstream_weight_total", "Request weight sent upstream by host and priority",
+                                  ["host", "priority"])
+UPSTREAM_SHED = metrics.counter("upstream_shed_total", "Requests refused by the weight budget by host and priority",
+                                ["host", "priority"])
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+class UpstreamThrottled(Exception):
+    """Raised when a host's weight budget or ban would stall the request too long"""
+
+
+class UpstreamShed(UpstreamThrottled):
+    """Raised for background work refused to keep budget for interactive requests"""
+
+
+@contextlib.contextmanager
+def priority(level):
+    """Send the upstream requests made inside the block at ``level``"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def _depth_weight(limit, futures):
+    if futures:
+        return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+    return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+
+
+def _klines_weight(limit, futures):
+    if futures:
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    return 2
+
+
+# endpoint -> weight(query, futures); ``symbol``-less ticker calls cover every symbol
+ENDPOINT_WEIGHTS = {
+    "klines": lambda query, futures: _klines_weight(int(query.get("limit", 500)), futures),
+    "depth": lambda query, futures: _depth_weight(int(query.get("limit", 100)), futures),
+    "ticker/price": lambda query, futures: (1 if futures else 2) if "symbol" in query else (2 if futures else 4),
+    "ticker/24hr": lambda query, futures: (1 if futures else 2) if "symbol" in query else (40 if futures else 80),
+    "exchangeInfo": lambda query, futures: 1 if futures else 20,
+}
+DEFAULT_WEIGHT = 1
+
+
+def request_weight(url, params=None):
+    """Binance's weight for a GET of ``url``; 0 for hosts without a budget"""
+    parts = urlparse(url)
+    if parts.netloc not in WEIGHT_LIMITS:
+        return 0
+    query = dict(parse_qsl(parts.query))
+    query.update(params or {})
+    endpoint = parts.path.split("/", 3)[-1]  # "/api/v3/ticker/price" -> "ticker/price"
+    weight = ENDPOINT_WEIGHTS.get(endpoint)
+    return weight(query, parts.netloc.startswith("fapi.")) if weight else DEFAULT_WEIGHT
+
+
+class UpstreamScheduler:
+    def __init__(self, limits=None, clock=time.time, sleep=time.sleep, async_sleep=asyncio.sleep):
+        self.limits = WEIGHT_LIMITS if limits is None else limits
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._lock = threading.Lock()
+        self._spent = {}  # host -> (weight sent by this process, minute window)
+        self._reported = {}  # host -> (used weight reported by Binance, minute window)
+        self._banned_until = {}  # host -> unix time
+        self._waiting = 0  # Interactive requests waiting for budget
+
+    def observe(self, host, used_weight=None, retry_after=None):
+        """Record a response: Binance's used-weight header and/or a 429/418 ``Retry-After``"""
+        now = self._clock()
+        with self._lock:
+            if used_weight is not None:
+                self._reported[host] = (used_weight, int(now // WINDOW))
+            if retry_after is not None:
+                self._banned_until[host] = max(self._banned_until.get(host, 0), now + retry_after)
+
+    def used(self, host):
+        """Weight used on ``host`` in the current minute, as far as we know"""
+        window = int(self._clock() // WINDOW)
+        with self._lock:
+            return self._used(host, window)
+
+    def _used(self, host, window):
+        spent, spent_window = self._spent.get(host, (0, None))
+        reported, reported_window = self._reported.get(host, (0, None))
+        return max(spent if spent_window == window else 0, reported if reported_window == window else 0)
+
+    def under_pressure(self, host):
+        """True once background requests to ``host`` would be shed"""
+        limit = self.limits.get(host)
+        return bool(limit) and self.used(host) >= limit * BACKGROUND_SHARE
+
+    def _admit(self, host, cost, level):
+        """Spend ``cost`` and return 0, or return the seconds to wait first; raises when refused"""
+        now = self._clock()
+        window = int(now // WINDOW)
+        with self._lock:
+            banned_for = self._banned_until.get(host, 0) - now
+            limit = self.limits.get(host)
+            if banned_for > 0:
+                delay = banned_for
+            elif not limit or not cost:
+                return 0
+            else:
+                share = INTERACTIVE_SHARE if level == INTERACTIVE else BACKGROUND_SHARE
+                fits = self._used(host, window) + cost <= limit * share
+                if fits and (level == INTERACTIVE or not self._waiting):
+                    spent, spent_window = self._spent.get(host, (0, None))
+                    self._spent[host] = ((spent if spent_window == window else 0) + cost, window)
+                    return 0
+                delay = (window + 1) * WINDOW - now
+
+        name = PRIORITY_NAMES.get(level, str(level))
+        if level != INTERACTIVE:
+            UPSTREAM_SHED.inc(host, name)
+            raise UpstreamShed(f"{host} weight budget reserved for interactive requests")
+        if delay > MAX_WAIT:
+            UPSTREAM_SHED.inc(host, name)
+            raise UpstreamThrottled(f"{host} rate limit reached, retry in {delay:.0f}s")
+        return delay
+
+    def acquire(self, host, cost, level=None):
+        """Block until ``cost`` weight may be sent to ``host`` at ``level`` (default: the context's)"""
+        level = current_priority() if level is None else level
+        delay = self._admit(host, cost, level)
+        if delay:
+            with self._lock:
+                self._waiting += 1
+            try:
+                while delay:
+                    self._sleep(delay)
+                    delay = self._admit(host, cost, level)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        if cost:
+            UPSTREAM_WEIGHT.inc(host, PRIORITY_NAMES.get(level, str(level)), amount=cost)
+
+    async def acquire_async(self, host, cost, level=None):
+        """``acquire`` that waits on the event loop"""
+        level = current_priority() if level is None else level
+        delay = self._admit(host, cost, level)
+        if delay:
+            with self._lock:
+                self._waiting += 1
+            try:
+                while delay:
+                    await self._async_sleep(delay)
+                    delay = self._admit(host, cost, level)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        if cost:
+            UPSTREAM_WEIGHT.inc(host, PRIORITY_NAMES.get(level, str(level)), amount=cost)
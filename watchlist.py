@@ -0,0 +1,194 @@
+"""Re-evaluate watchlists when their candles close and push verdict changes.
+
+A watchlist is a JSON file of entries such as
+
+    [{"symbol": "BTCUSDT", "market": "spot", "timeframe": "1h", "side": "long"}, ...]
+
+Entries are grouped by timeframe. The daemon sleeps until the next candle
+close of any watched timeframe (plus ``CLOSE_DELAY`` for Binance to publish
+the closed candle) and re-analyzes only the entries whose candle just
+closed. Each wakeup is one ``scan`` batch (``main.scan_symbols``) per market
+and timeframe, so every symbol's price, ticker and depth are fetched once however
+many entries share it. Every entry is analyzed once at startup to establish
+its verdict; after that only changes of the final verdict or confidence
+level are sent to the sink:
+
+    python watchlist.py watchlist.json                      # print to stdout
+    python watchlist.py watchlist.json --sink changes.jsonl # append JSON lines
+    python watchlist.py watchlist.json --sink https://example.com/hook
+    python main.py --watchlist watchlist.json --sink -      # same, from main's CLI
+"""
+import argparse
+import json
+import sys
+import time
+
+from encoders import JSON, encode_json
+from timeframes import next_candle_open
+
+CLOSE_DELAY = 2  # seconds after the boundary before the closed candle is fetched
+WEBHOOK_TIMEOUT = 5  # seconds
+
+
+class StdoutSink:
+    def send(self, event):
+        previous = event["previous"]
+        change = f"{previous['verdict'].upper()} ({previous['confidence']}) → " if previous else ""
+        print(f"{event['market_type']:<8} {event['symbol']:<12} {event['timeframe']:<4} {event['trade_type']:<5} "
+              f"{change}{event['verdict'].upper()} ({event['confidence']}) {event['score']}", flush=True)
+
+
+class FileSink:
+    """Appends one JSON line per event"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, event):
+        with open(self.path, "a") as f:
+            f.write(encode_json(event).decode() + "\n")
+
+
+class WebhookSink:
+    """POSTs each event as JSON; a failed delivery is reported and dropped"""
+
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, event):
+        import http_client
+
+        try:
+            response = http_client.post(self.url, data=encode_json(event), headers={"Content-Type": JSON},
+                                        timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Webhook delivery failed: {e}", file=sys.stderr)
+
+
+def make_sink(spec):
+    """``-``/``stdout``, an ``http(s)://`` URL, or a file path"""
+    if spec in (None, "-", "stdout"):
+        return StdoutSink()
+    if spec.startswith(("http://", "https://")):
+        return WebhookSink(spec)
+    return FileSink(spec)
+
+
+def load_entries(path, valid_intervals):
+    """Watchlist entries as ``(symbol, market_type, interval, trade_type)`` tuples; raises ValueError"""
+    with open(path) as f:
+        raw = json.load(f)
+    entries = []
+    for item in raw:
+        entry = (item["symbol"].upper(), item.get("market", "spot"), item["timeframe"], item.get("side", "long"))
+        if entry[2] not in valid_intervals:
+            raise ValueError(f"Invalid timeframe: {entry[2]}. Choose from {list(valid_intervals)}")
+        if entry[3] not in ("long", "short"):
+            raise ValueError(f'Invalid side: {entry[3]}. Use "long" or "short"')
+        entries.append(entry)
+    return list(dict.fromkeys(entries))
+
+
+class WatchlistDaemon:
+    """``scan(symbols, intervals, market_type, trade_types)`` returns ``(rows, errors)`` like ``main.scan_symbols``"""
+
+    def __init__(self, entries, sink, scan, clock=time.time, sleep=time.sleep):
+        self.sink = sink
+        self._scan = scan
+        self._clock = clock
+        self._sleep = sleep
+        self._by_interval = {}  # interval -> entries
+        for entry in entries:
+            self._by_interval.setdefault(entry[2], []).append(entry)
+        self._next_close = {}  # interval -> ms of the next candle close
+        self._last = {}  # entry -> (verdict, confidence)
+
+    def evaluate(self, intervals):
+        """Analyze every entry of ``intervals`` in one batch per market/interval; returns the change events"""
+        events = []
+        for interval in intervals:
+            groups = {}  # market_type -> entries
+            for entry in self._by_interval[interval]:
+                groups.setdefault(entry[1], []).append(entry)
+
+            for market_type, entries in groups.items():
+                symbols = list(dict.fromkeys(entry[0] for entry in entries))
+                trade_types = sorted({entry[3] for entry in entries})
+                rows, errors = self._scan(symbols, [interval], market_type, trade_types)
+                for error in errors:
+                    print(f"❌ {market_type} {error['symbol']} {interval}: {error['error']}", file=sys.stderr)
+
+                wanted = set(entries)
+                for row in rows:
+                    entry = (row['symbol'], market_type, interval, row['trade_type'])
+                    if entry not in wanted:
+                        continue
+                    state = (row['verdict'], row['confidence'])
+                    previous = self._last.get(entry)
+                    self._last[entry] = state
+                    if state == previous:
+                        continue
+                    events.append({
+                        'symbol': row['symbol'],
+                        'market_type': market_type,
+                        'timeframe': interval,
+                        'trade_type': row['trade_type'],
+                        'verdict': row['verdict'],
+                        'confidence': row['confidence'],
+                        'score': row['score'],
+                        'price': row['price'],
+                        'targets': row['targets'],
+                        'previous': {'verdict': previous[0], 'confidence': previous[1]} if previous else None,
+                        'evaluated_at': int(self._clock() * 1000),
+                    })
+        return events
+
+    def run_once(self):
+        """Evaluate the intervals whose candle has closed (all of them on the first call)"""
+        now_ms = int(self._clock() * 1000)
+        due = [interval for interval in self._by_interval
+               if interval not in self._next_close or self._next_close[interval] <= now_ms]
+        for interval in due:
+            self._next_close[interval] = next_candle_open(interval, now_ms)
+        for event in self.evaluate(due):
+            self.sink.send(event)
+        return due
+
+    def seconds_until_next(self):
+        next_close = min(self._next_close.values())
+        return max(0.0, next_close / 1000 + CLOSE_DELAY - self._clock())
+
+    def run(self):
+        while True:
+            self.run_once()
+            self._sleep(self.seconds_until_next())
+
+
+def run(path, scan, valid_intervals, sink_spec=None):
+    """Load a watchlist file and re-evaluate it forever with ``scan``.
+
+    The caller passes in the analysis, so this module never imports ``main``
+    (which would load a second copy when ``main.py`` is the running script).
+    """
+    entries = load_entries(path, valid_intervals)
+    intervals = sorted({entry[2] for entry in entries})
+    print(f"👀 Watching {len(entries)} entries on {', '.join(intervals)}", file=sys.stderr)
+    WatchlistDaemon(entries, make_sink(sink_spec), scan).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-evaluate a watchlist on every candle close")
+    parser.add_argument("path", help="JSON list of {symbol, market, timeframe, side}")
+    parser.add_argument("--sink", default="-", help="'-' for stdout, an http(s) webhook URL, or a file path")
+    args = parser.parse_args()
+
+    import main as analysis
+
+    analysis.start_background()
+    run(args.path, analysis.scan_symbols, analysis.VALID_INTERVALS, args.sink)
+
+
+if __name__ == "__main__":
+    main()